@@ -0,0 +1 @@
+""" Benchmarks (run each script directly) """
@@ -0,0 +1,91 @@
+"""
+Compares the per-request game aggregation backends on synthetic game lists:
+ - 'objects': `filter_game_list` + `GameEvent.category_total` (the original path)
+ - 'store': `GameStore` (grouped dictionaries)
+ - 'columnar': `ColumnarGameStore` (NumPy masked reductions)
+
+usage: python benchmarks/bench_game_aggregation.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from apex_db_helper import filter_game_list
+from apex_game_store import GameStore, ColumnarGameStore
+from synthetic import game_events
+
+CATEGORIES: Tuple[str, ...] = ('kills', 'wins', 'damage', 'xp_progress')
+
+
+def object_total(game_list: list, category: str, uid: int, day: str) -> int:
+    """ The original `BaseGameViewController.category_total` """
+    total: int = 0
+    for game in filter_game_list(game_list, uid=uid, day=day, category=category):
+        total += game.category_total(category)
+    return total
+
+
+def time_queries(total_method: Callable, queries: List[Tuple[int, str]]) -> float:
+    """ Returns the seconds taken to run the category totals for every query """
+    start: float = time.perf_counter()
+    for uid, day in queries:
+        for category in CATEGORIES:
+            total_method(category, uid, day)
+    return time.perf_counter() - start
+
+
+def timed_build(store_class: Callable, game_list: list) -> Tuple[float, object]:
+    """ Returns the seconds taken to build a store and the store itself """
+    start: float = time.perf_counter()
+    store = store_class(game_list)
+    return time.perf_counter() - start, store
+
+
+def random_queries(game_list: list, num_queries: int, seed: int) -> List[Tuple[int, str]]:
+    """ Returns (uid, day) pairs picked from the games """
+    rnd: random.Random = random.Random(seed)
+    uids: List[int] = sorted({int(game.uid) for game in game_list})
+    days: List[str] = sorted({game.day_of_event for game in game_list})
+    return [(rnd.choice(uids), rnd.choice(days)) for _ in range(num_queries)]
+
+
+def run(size: int, num_queries: int):
+    """ Benchmarks one list size """
+    game_list = game_events(size)
+    queries: List[Tuple[int, str]] = random_queries(game_list, num_queries, seed=size)
+    store_build, store = timed_build(GameStore, game_list)
+    columnar_build, columnar = timed_build(ColumnarGameStore, game_list)
+
+    results: dict = {
+        'objects': (0.0, time_queries(
+            lambda category, uid, day: object_total(game_list, category, uid, day), queries
+        )),
+        'store': (store_build, time_queries(
+            lambda category, uid, day: store.total(category, uid=uid, day=day), queries
+        )),
+        'columnar': (columnar_build, time_queries(
+            lambda category, uid, day: columnar.total(category, uid=uid, day=day), queries
+        )),
+    }
+    number_of_lookups: int = num_queries * len(CATEGORIES)
+    for name, (build, lookups) in results.items():
+        print(
+            f"{size:>9} games  {name:<9} build {build * 1000:10.1f} ms   "
+            f"{lookups / number_of_lookups * 1e6:12.1f} us/lookup   "
+            f"total {(build + lookups) * 1000:10.1f} ms"
+        )
+
+
+def main():
+    """ Parse the arguments and run the benchmark for each size """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=25, help="(uid, day) lookups per size")
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries)
+
+
+if __name__ == '__main__':
+    main()
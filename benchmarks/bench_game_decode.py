@@ -0,0 +1,52 @@
+"""
+Compares the per-game cost of decoding 'Game' documents read from the `event` collection:
+ - 'strict': `GameEvent(**document)` (full pydantic validation) then `apply_trackers`
+ - 'trusted': `EventCollection.game_from_trusted_dict` (`construct`, trackers applied in
+   the same pass)
+
+usage: python benchmarks/bench_game_decode.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import time
+from typing import List
+
+import mongomock
+
+from apex_db_helper import ApexDBHelper
+from models import EventCollection
+from synthetic import game_dicts
+
+
+def time_decode(event_collection: EventCollection, documents: List[dict], strict: bool) -> float:
+    """ Returns the seconds taken to decode every document """
+    start: float = time.perf_counter()
+    for document in documents:
+        event_collection.game_from_dict(document, strict=strict)
+    return time.perf_counter() - start
+
+
+def run(event_collection: EventCollection, size: int):
+    """ Benchmarks one list size """
+    documents: List[dict] = game_dicts(size, seed=size)
+    strict: float = time_decode(event_collection, documents, strict=True)
+    trusted: float = time_decode(event_collection, documents, strict=False)
+    for name, seconds in (('strict', strict), ('trusted', trusted)):
+        print(f"{size:>9} games  {name:<8} {seconds / size * 1e6:10.2f} us/game   "
+              f"total {seconds * 1000:10.1f} ms")
+    print(f"{size:>9} games  speedup  {strict / trusted:10.1f}x")
+
+
+def main():
+    """ Parse the arguments and run the benchmark for each size """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    event_collection: EventCollection = EventCollection(
+        mongomock.MongoClient().db, ApexDBHelper.load_data('tracker_info.json')
+    )
+    for size in args.sizes:
+        run(event_collection, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures what each `GameProfile` costs when loading games from a (local) mongod:
+ - the BSON bytes of the returned documents
+ - the time to fetch them (find + cursor iteration)
+ - the time to decode them into `GameEvent` objects
+ - the end to end `EventCollection.get_games` time
+
+Synthetic games are written to a scratch database which is dropped afterwards.
+
+usage: python benchmarks/bench_game_profiles.py [--mongo-uri mongodb://localhost:27017]
+           [--games 100000]
+"""
+import argparse
+import time
+from typing import List
+
+import bson
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from apex_db_helper import ApexDBHelper
+from models import EventCollection, GameProfile
+from models.event import GAME_PROFILE_PROJECTIONS
+from synthetic import game_dicts
+
+
+def run_profile(event_collection: EventCollection, database, profile: GameProfile,
+                num_games: int):
+    """ Benchmarks loading every game with one profile """
+    start: float = time.perf_counter()
+    documents: List[dict] = list(
+        database.event.find({'eventType': 'Game'}, projection=GAME_PROFILE_PROJECTIONS[profile])
+    )
+    fetch: float = time.perf_counter() - start
+    total_bytes: int = sum(len(bson.encode(document)) for document in documents)
+
+    start = time.perf_counter()
+    for document in documents:
+        event_collection.game_from_dict(document)
+    decode: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    event_collection.get_games(profile=profile)
+    end_to_end: float = time.perf_counter() - start
+    print(
+        f"{profile.value:<12} {total_bytes / 1024 / 1024:9.2f} MiB "
+        f"{total_bytes / num_games:8.1f} B/game   fetch {fetch * 1000:9.1f} ms   "
+        f"decode {decode / num_games * 1e6:7.2f} us/game   get_games {end_to_end * 1000:9.1f} ms"
+    )
+
+
+def main():
+    """ Parse the arguments, write the synthetic games and run every profile """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--database', default='apex_profile_benchmark',
+                        help="scratch database (dropped when the benchmark ends)")
+    parser.add_argument('--games', type=int, default=100000)
+    args = parser.parse_args()
+
+    client: MongoClient = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command('ping')
+    except ServerSelectionTimeoutError:
+        parser.error(f"no mongod reachable at {args.mongo_uri}")
+    database = client[args.database]
+    try:
+        database.event.drop()
+        database.event.insert_many(game_dicts(args.games))
+        event_collection: EventCollection = EventCollection(
+            database, ApexDBHelper.load_data('tracker_info.json')
+        )
+        print(f"{args.games} games")
+        for profile in GameProfile:
+            run_profile(event_collection, database, profile, args.games)
+    finally:
+        client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compares the `Config.get_rank_div_tier_for_points` lookups on random scores:
+ - 'loop': the original walk over every division / tier (a new RankTier per call)
+ - 'bisect': `get_rank_div_tier_for_points` (precomputed thresholds)
+ - 'batch': `get_rank_div_tiers_for_points` for the whole list at once
+
+usage: python benchmarks/bench_rank_tier.py [--sizes 100 10000 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Callable, List, Optional
+
+from models import Config, RankTier
+
+CONFIG_FILE: str = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'json', 'config.json'
+)
+
+
+def loop_rank_tier(config: Config, rank_points: int) -> Optional[RankTier]:
+    """ The original `Config.get_rank_div_tier_for_points` """
+    lower_rp: int = 0
+    for division in config.ranked_division_info.divisions:
+        for tier in config.ranked_division_info.tiers:
+            upper_rp = lower_rp + division.rp_between_tiers
+            if rank_points in range(lower_rp, upper_rp):
+                to_next = upper_rp - rank_points
+                return RankTier(tier=tier, division=division.name, distance_to_next=to_next)
+            lower_rp = upper_rp
+    return None
+
+
+def time_lookups(lookup: Callable[[List[int]], list], scores: List[int]) -> float:
+    """ Returns the seconds taken to look up every score """
+    start: float = time.perf_counter()
+    lookup(scores)
+    return time.perf_counter() - start
+
+
+def run(config: Config, size: int):
+    """ Benchmarks one list size """
+    rnd: random.Random = random.Random(size)
+    scores: List[int] = [rnd.randrange(0, 10000) for _ in range(size)]
+    results: dict = {
+        'loop': time_lookups(
+            lambda score_list: [loop_rank_tier(config, score) for score in score_list], scores
+        ),
+        'bisect': time_lookups(
+            lambda score_list: [config.get_rank_div_tier_for_points(score)
+                                for score in score_list], scores
+        ),
+        'batch': time_lookups(config.get_rank_div_tiers_for_points, scores),
+    }
+    for name, seconds in results.items():
+        print(f"{size:>9} scores  {name:<7} {seconds / size * 1e6:10.3f} us/lookup   "
+              f"total {seconds * 1000:10.1f} ms")
+
+
+def main():
+    """ Parse the arguments and run the benchmark for each size """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 1000000])
+    parser.add_argument('--config', default=CONFIG_FILE, help="config json file")
+    args = parser.parse_args()
+    with open(args.config, encoding='utf-8') as json_file:
+        config: Config = Config(**json.load(json_file))
+    for size in args.sizes:
+        run(config, size)
+
+
+if __name__ == '__main__':
+    main()
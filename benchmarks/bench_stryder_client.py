@@ -0,0 +1,142 @@
+"""
+Compares the two ways of polling Respawn against a local stub server:
+ - 'per-request': a new `AsyncClient` for every poll (the original `get_stryder_data`)
+ - 'shared': the process's shared keep-alive client (`get_stryder_client`)
+
+Every simulated player polls back to back, so the numbers are the client's cost (connection
+set up, pooling), plus --latency of stub server time. The stub is plain HTTP, Respawn is
+HTTPS, so the TLS handshake the shared client also saves isn't in these numbers.
+
+usage: python benchmarks/bench_stryder_client.py [--players 100] [--polls 20]
+           [--latency 0] [--modes per-request shared]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from httpx import AsyncClient
+
+from apex_api_helper import ApexAPIHelper, config, close_stryder_client, get_stryder_client, \
+    stryder_client_options
+from synthetic import cdata_dicts, player_dicts, respawn_record_dicts
+
+
+class StubRespawnServer:
+    """ Answers every HTTP/1.1 request (keeping the connection alive) with one respawn record """
+
+    def __init__(self, body: bytes, latency: float):
+        self.body: bytes = body
+        self.latency: float = latency
+        self.connections: int = 0
+        self.requests: int = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Serves the requests of one connection """
+        self.connections += 1
+        try:
+            while True:
+                request_line: bytes = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive: bool = True
+                while True:
+                    header: bytes = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    if header.lower().startswith(b'connection:') and b'close' in header.lower():
+                        keep_alive = False
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                    + f"Content-Length: {len(self.body)}\r\n\r\n".encode('ascii') + self.body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def stub_body() -> bytes:
+    """ A user-getinfo response (Respawn leaves out the outer braces, and adds trailing commas) """
+    players: List[dict] = player_dicts(1)
+    record: dict = respawn_record_dicts(players, cdata_dicts(), num_days=1, records_per_day=1)[0]
+    del record['uuid'], record['timestamp']
+    user_info: str = json.dumps(record, indent=1)
+    return f'"userInfo": {user_info[:-2]},\n}}'.encode('utf-8')
+
+
+async def per_request_poll(url: str, player_uid: int):
+    """ The original poll: a new client (and connection) every time """
+    async with AsyncClient(**stryder_client_options(config)) as client:
+        await ApexAPIHelper.fetch_stryder_data(client, url, player_uid, 'PC')
+
+
+async def shared_poll(url: str, player_uid: int):
+    """ A poll with the shared keep-alive client """
+    await ApexAPIHelper.fetch_stryder_data(get_stryder_client(), url, player_uid, 'PC')
+
+
+async def run_mode(poll: Callable[[str, int], Awaitable], server: StubRespawnServer,
+                   num_players: int, num_polls: int) -> Dict[str, float]:
+    """ Returns the throughput and latencies of every player polling `num_polls` times """
+    stub = await asyncio.start_server(server.handle, host='127.0.0.1', port=0)
+    url: str = f"http://127.0.0.1:{stub.sockets[0].getsockname()[1]}/"
+    latencies: List[float] = []
+
+    async def monitor(player_uid: int):
+        for _ in range(num_polls):
+            start: float = time.perf_counter()
+            await poll(url, player_uid)
+            latencies.append(time.perf_counter() - start)
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*(monitor(player_uid) for player_uid in range(num_players)))
+    elapsed: float = time.perf_counter() - start
+    await close_stryder_client()
+    stub.close()
+    await stub.wait_closed()
+    latencies.sort()
+    return {
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+def main():
+    """ Parse the arguments and run each mode """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--players', type=int, default=100, help="concurrent monitor tasks")
+    parser.add_argument('--polls', type=int, default=20, help="polls per player")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="seconds the stub server takes to answer")
+    parser.add_argument('--modes', nargs='+', default=['per-request', 'shared'],
+                        choices=['per-request', 'shared'])
+    args = parser.parse_args()
+    polls: Dict[str, Callable[[str, int], Awaitable]] = {
+        'per-request': per_request_poll,
+        'shared': shared_poll,
+    }
+    body: bytes = stub_body()
+    for mode in args.modes:
+        server: StubRespawnServer = StubRespawnServer(body, args.latency)
+        result: Dict[str, float] = asyncio.run(
+            run_mode(polls[mode], server, args.players, args.polls)
+        )
+        print(
+            f"{mode:<12} {result['requests_per_second']:10.1f} req/s   "
+            f"p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   "
+            f"{server.connections:6} connections for {server.requests} requests"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Times every view controller and page on a seeded synthetic database and writes the results
+as JSON, so runs can be compared between commits:
+ - controllers: IndexViewController, LeaderboardViewController, DayByDayViewController,
+   DayDetailViewController and ProfileViewController (built and used like their page does)
+ - routes: every page rendered with the Flask test client, 'cold' (view / player caches
+   cleared first) and 'warm'
+
+The synthetic data (`synthetic.dataset`) is loaded into an in-memory mongomock database,
+or into a scratch database on a local mongod with --mongo-uri (dropped afterwards).
+mongomock has no indexes, so its timings are only comparable with other mongomock runs.
+
+usage: python benchmarks/bench_views.py [--players 20] [--days 30] [--games-per-day 8]
+           [--seed 0] [--repeat 5] [--mongo-uri mongodb://localhost:27017]
+           [--output results.json] [--compare previous_results.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+import arrow
+import mongomock
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from apex_cache import ViewModelCache
+from apex_db_helper import ApexDBHelper
+from apex_player_registry import TrackedPlayerRegistry
+from apex_utilities import get_arrow_date_to_use, pacific_day, pacific_midnight, shift_day
+from apex_view_controllers import IndexViewController, LeaderboardViewController, \
+    DayByDayViewController, DayDetailViewController, ProfileViewController
+from models import Player
+from synthetic import START_TIMESTAMP, SECONDS_IN_DAY, dataset, load_dataset
+
+
+def time_runs(function: Callable[[], object], repeat: int) -> Dict[str, object]:
+    """ Runs the function once to warm up, then `repeat` timed runs (in milliseconds) """
+    function()
+    runs: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs_ms': [round(run, 3) for run in runs],
+        'min_ms': round(min(runs), 3),
+        'median_ms': round(statistics.median(runs), 3),
+        'mean_ms': round(statistics.mean(runs), 3),
+    }
+
+
+def clear_view_caches(db_helper: ApexDBHelper, view_model_cache: Optional[ViewModelCache]):
+    """ Drops every in-process cache the views read, so the next run does all the work """
+    # pylint: disable=protected-access
+    ProfileViewController._ranked_layout_cache.clear()
+    ProfileViewController._ranked_trace_cache.clear()
+    if view_model_cache:
+        view_model_cache.cache.clear()
+    if hasattr(db_helper.player_collection, 'cache'):
+        db_helper.player_collection.cache.clear()
+
+
+def controller_benchmarks(db_helper: ApexDBHelper, player: Player,
+                          day: str) -> Dict[str, Callable[[], object]]:
+    """ Returns name -> function building (and using) each view controller """
+    start_timestamp: int = pacific_midnight(day)
+    end_timestamp: int = pacific_midnight(shift_day(day, 1))
+
+    def day_by_day():
+        view_controller = DayByDayViewController(db_helper, player)
+        return list(view_controller.iter_day_summaries())
+
+    def day_detail():
+        view_controller = DayDetailViewController(db_helper, player, get_arrow_date_to_use(day))
+        return [view_controller.find_games_near_mine(game) for game in view_controller.games]
+
+    def profile():
+        clear_view_caches(db_helper, None)
+        return ProfileViewController(db_helper, player).ranked_plot()
+
+    return {
+        'controller.index': lambda: IndexViewController(
+            db_helper, start_timestamp, end_timestamp
+        ),
+        'controller.leaderboard': lambda: LeaderboardViewController(
+            db_helper, start_timestamp, end_timestamp, clan=None
+        ),
+        'controller.day_by_day': day_by_day,
+        'controller.day_detail': day_detail,
+        'controller.profile': profile,
+    }
+
+
+def route_benchmarks(db_helper: ApexDBHelper, player: Player, day: str,
+                     repeat: int) -> Dict[str, Dict[str, object]]:
+    """ Returns name -> timings of every page, rendered by the Flask test client """
+    # pylint: disable=import-outside-toplevel
+    import app as flask_app
+    # point the app at the synthetic database
+    flask_app.apex_db_helper = db_helper
+    flask_app.view_model_cache = ViewModelCache(db_helper.event_collection)
+    client = flask_app.app.test_client()
+    urls: Dict[str, str] = {
+        'index': f"/{day}/",
+        'leaderboard': f"/leaderboard/?day={day}",
+        'day_by_day': f"/day_by_day?player_uid={player.uid}",
+        'day_detail': f"/day_detail?day={day}&player_uid={player.uid}",
+        'profile': f"/profile?player_uid={player.uid}",
+        'battlepass': "/battlepass/",
+        'api_games': f"/api/v1/games?player_uid={player.uid}",
+        'api_leaderboard': f"/api/v1/leaderboard?day={day}",
+    }
+
+    def get_page(url: str, cold: bool) -> bytes:
+        if cold:
+            clear_view_caches(db_helper, flask_app.view_model_cache)
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+        return response.get_data()
+
+    results: Dict[str, Dict[str, object]] = {}
+    for name, url in urls.items():
+        results[f"route.{name}.cold"] = time_runs(partial(get_page, url, True), repeat)
+        results[f"route.{name}.warm"] = time_runs(partial(get_page, url, False), repeat)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """ Returns the commit being benchmarked (None outside a git checkout) """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(meta: dict, results: Dict[str, Dict[str, object]], previous_path: str):
+    """ Prints the median of each benchmark next to the one from a previous run """
+    with open(previous_path, encoding='utf-8') as json_file:
+        previous: dict = json.load(json_file)
+    print(f"\ncompared with {previous['meta'].get('commit')} ({previous_path})")
+    for setting in ('backend', 'players', 'days', 'games_per_day', 'seed'):
+        if previous['meta'].get(setting) != meta.get(setting):
+            print(f"warning: '{setting}' was {previous['meta'].get(setting)}, "
+                  f"now {meta.get(setting)}")
+    for name, result in results.items():
+        old_result: Optional[dict] = previous['results'].get(name)
+        if not old_result:
+            print(f"{name:<32} {result['median_ms']:10.2f} ms   (new)")
+            continue
+        ratio: float = result['median_ms'] / old_result['median_ms']
+        print(
+            f"{name:<32} {old_result['median_ms']:10.2f} ms -> {result['median_ms']:10.2f} ms"
+            f"   x{ratio:.2f}"
+        )
+
+
+def main():
+    """ Parse the arguments, load the synthetic data and run every benchmark """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--games-per-day', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--mongo-uri', help="local mongod (default: in-memory mongomock)")
+    parser.add_argument('--database', default='apex_view_benchmark',
+                        help="scratch database (dropped when the benchmark ends)")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="results JSON of a previous run to compare with")
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=3000)
+        try:
+            client.admin.command('ping')
+        except ServerSelectionTimeoutError:
+            parser.error(f"no mongod reachable at {args.mongo_uri}")
+    else:
+        client = mongomock.MongoClient()
+    database = client[args.database]
+    try:
+        start: float = time.perf_counter()
+        documents: Dict[str, List[dict]] = dataset(
+            args.players, args.days, args.games_per_day, args.seed
+        )
+        load_dataset(database, documents)
+        print(f"loaded {', '.join(f'{len(docs)} {name}' for name, docs in documents.items())}"
+              f" in {time.perf_counter() - start:.1f}s")
+
+        db_helper: ApexDBHelper = ApexDBHelper(player_cache_ttl=60.0, database=database)
+        db_helper.player_registry = TrackedPlayerRegistry(
+            db_helper.player_collection, use_change_stream=bool(args.mongo_uri)
+        )
+        player: Player = Player(**documents['player'][0])
+        day: str = pacific_day(START_TIMESTAMP + (args.days - 1) * SECONDS_IN_DAY)
+
+        results: Dict[str, Dict[str, object]] = {}
+        for name, function in controller_benchmarks(db_helper, player, day).items():
+            results[name] = time_runs(function, args.repeat)
+        results.update(route_benchmarks(db_helper, player, day, args.repeat))
+        db_helper.player_registry.stop()
+    finally:
+        client.drop_database(args.database)
+        client.close()
+
+    for name, result in results.items():
+        print(f"{name:<32} median {result['median_ms']:10.2f} ms   min {result['min_ms']:10.2f} ms")
+    report: dict = {
+        'meta': {
+            'commit': git_commit(),
+            'date': arrow.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'backend': 'mongod' if args.mongo_uri else 'mongomock',
+            'players': args.players,
+            'days': args.days,
+            'games_per_day': args.games_per_day,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as json_file:
+            json.dump(report, json_file, indent=2)
+    if args.compare:
+        print_comparison(report['meta'], results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
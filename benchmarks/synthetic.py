@@ -0,0 +1,243 @@
+""" Seeded synthetic data for the benchmarks """
+import json
+import os
+import random
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+
+import arrow
+import pymongo.database
+
+from apex_db_indexes import ensure_indexes
+from apex_utilities import pacific_days
+from models import Config, GameEvent
+
+LEGENDS: List[str] = [
+    'Ash', 'Bangalore', 'Bloodhound', 'Caustic', 'Crypto', 'Fuse', 'Gibraltar', 'Horizon',
+    'Lifeline', 'Loba', 'Mad Maggie', 'Mirage', 'Octane', 'Pathfinder', 'Rampart', 'Revenant',
+    'Seer', 'Valkyrie', 'Wattson', 'Wraith'
+]
+START_TIMESTAMP: int = arrow.get('2022-02-08T00:00:00-08:00').int_timestamp
+SECONDS_IN_HOUR: int = 60 * 60
+SECONDS_IN_DAY: int = SECONDS_IN_HOUR * 24
+FIRST_UID: int = 1000000000000
+PLATFORMS: Tuple[str, ...] = ('PC', 'PS4', 'X1', 'SWITCH')
+STATIC_DATA_PATH: str = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'flask_site', 'models', 'static_data'
+)
+
+
+def max_rank_score() -> int:
+    """ The RP where the highest division of the ranked config ends (i.e. Master) """
+    with open(os.path.join(STATIC_DATA_PATH, 'config.json'), encoding='utf-8') as json_file:
+        config: Config = Config(**json.load(json_file))
+    division_info = config.ranked_division_info
+    return sum(division.rp_between_tiers for division in division_info.divisions) * \
+        len(division_info.tiers)
+
+
+def game_dict(rnd: random.Random, uid: int, timestamp: int) -> dict:
+    """ Returns one raw 'Game' event document as it is stored in the `event` collection """
+    trackers: list = [{'value': rnd.randint(0, 2500), 'key': 'damage', 'name': 'Damage'}]
+    if rnd.random() < 0.7:
+        trackers.append(
+            {'value': rnd.randint(0, 12), 'key': 'kills_season_12', 'name': 'Season 12 kills'}
+        )
+    if rnd.random() < 0.08:
+        trackers.append({'value': 1, 'key': 'wins_season_12', 'name': 'Season 12 wins'})
+    ranked: bool = rnd.random() < 0.2
+    return {
+        'eventType': 'Game',
+        'timestamp': timestamp,
+        'uid': str(uid),
+        'player': f"player_{uid}",
+        'event': trackers,
+        'gameLength': rnd.randint(1, 25),
+        'legendPlayed': rnd.choice(LEGENDS),
+        # the rank score is filled in once the player's games are in order
+        'rankScoreChange': str(rnd.randint(-40, 120)) if ranked else '0',
+        'currentRankScore': None,
+        'xpProgress': rnd.randint(100, 12000)
+    }
+
+
+def game_dicts(num_games: int, num_players: int = 20, num_days: int = 90,
+               seed: int = 0) -> List[dict]:
+    """
+    Returns `num_games` raw game documents spread over players and days
+    Every (uid, timestamp) is unique (as it is in the `event` collection), and the ranked games
+    carry each player's running rank score, kept between 0 and `max_rank_score()`
+    """
+    rnd: random.Random = random.Random(seed)
+    num_seconds: int = num_days * SECONDS_IN_DAY
+    if num_games > num_players * num_seconds:
+        raise ValueError(f"{num_games} games don't fit in {num_players} players x {num_days} days")
+    used: Set[Tuple[int, int]] = set()
+    documents: List[dict] = []
+    for _ in range(num_games):
+        uid: int = FIRST_UID + rnd.randrange(num_players)
+        timestamp: int = START_TIMESTAMP + rnd.randrange(num_seconds)
+        while (uid, timestamp) in used:
+            timestamp = START_TIMESTAMP + rnd.randrange(num_seconds)
+        used.add((uid, timestamp))
+        documents.append(game_dict(rnd, uid, timestamp))
+    documents.sort(key=lambda document: (document['timestamp'], document['uid']))
+
+    maximum: int = max_rank_score()
+    rank_scores: Dict[str, int] = {}
+    for document in documents:
+        if document['rankScoreChange'] == '0':
+            del document['currentRankScore']
+            continue
+        rank_score: int = rank_scores.get(document['uid'], rnd.randint(0, maximum // 2))
+        rank_score = min(max(rank_score + int(document['rankScoreChange']), 0), maximum)
+        rank_scores[document['uid']] = rank_score
+        document['currentRankScore'] = str(rank_score)
+    return documents
+
+
+def game_events(num_games: int, num_players: int = 20, num_days: int = 90,
+                seed: int = 0) -> List[GameEvent]:
+    """
+    Returns `num_games` trusted `GameEvent` objects with kills / wins / damage filled in.
+    Days are bucketed for the whole list at once (`pacific_days`) so building a million
+    games stays cheap.
+    """
+    documents: List[dict] = game_dicts(num_games, num_players, num_days, seed)
+    days: List[str] = pacific_days([document['timestamp'] for document in documents])
+    game_list: List[GameEvent] = []
+    for document, day in zip(documents, days):
+        game: GameEvent = GameEvent.construct(
+            uid=document['uid'],
+            player=document['player'],
+            timestamp=document['timestamp'],
+            event_type=document['eventType'],
+            event=document['event'],
+            game_length=document['gameLength'],
+            legend_played=document['legendPlayed'],
+            rank_score_change=document['rankScoreChange'],
+            xp_progress=document['xpProgress'],
+            current_rank_score=document.get('currentRankScore'),
+            game_mode='BR'
+        )
+        for tracker in document['event']:
+            category: str = tracker['key'].split('_')[0]
+            setattr(game, category, tracker['value'])
+        # pylint: disable=protected-access
+        game._day_of_event = day
+        game_list.append(game)
+    return game_list
+
+
+def player_dicts(num_players: int = 20, seed: int = 0) -> List[dict]:
+    """ Returns the `player` documents of the players in `game_dicts` """
+    rnd: random.Random = random.Random(seed)
+    return [
+        {
+            'uid': FIRST_UID + index,
+            'name': f"player_{FIRST_UID + index}",
+            'platform': rnd.choice(PLATFORMS),
+            'is_online': int(rnd.random() < 0.2),
+            'selected_legend': rnd.choice(LEGENDS),
+            'level': rnd.randint(1, 500),
+            'battlepass_level': rnd.randint(1, 110),
+            'discord_id': index + 1,
+            'clan': rnd.choice(('NOT_SET', 'clan_a', 'clan_b')),
+        }
+        for index in range(num_players)
+    ]
+
+
+def cdata_dicts(seed: int = 0) -> List[dict]:
+    """ Returns `respawn_cdata` documents, a character and kills / damage trackers per legend """
+    rnd: random.Random = random.Random(seed)
+    documents: List[dict] = [{
+        'c_data': rnd.getrandbits(31), 'category': 'tracker', 'key': 'gcard_tracker__empty',
+        'legend': 'empty', 'name': 'Empty', 'tracker_grouping': 'ungrouped',
+        'tracker_mode': 'battle_royale'
+    }]
+    for legend in LEGENDS:
+        key: str = legend.lower().replace(' ', '')
+        documents.append({
+            'c_data': rnd.getrandbits(31), 'category': 'character',
+            'key': f"character_{key}", 'legend': 'empty', 'name': legend
+        })
+        for grouping in ('kills', 'damage'):
+            documents.append({
+                'c_data': rnd.getrandbits(31), 'category': 'tracker',
+                'key': f"gcard_tracker_{key}_{grouping}", 'legend': key,
+                'name': f"{grouping.title()} as {legend}", 'tracker_grouping': grouping,
+                'tracker_mode': 'battle_royale'
+            })
+    return documents
+
+
+def respawn_record_dicts(players: List[dict], cdata: List[dict], num_days: int = 90,
+                         records_per_day: int = 4, seed: int = 0) -> List[dict]:
+    """ Returns `respawn_record` documents for the players (stored by their cdata aliases) """
+    rnd: random.Random = random.Random(seed)
+    characters: List[int] = [
+        document['c_data'] for document in cdata if document['category'] == 'character'
+    ]
+    trackers: List[int] = [
+        document['c_data'] for document in cdata if document['category'] == 'tracker'
+    ]
+    maximum: int = max_rank_score()
+    documents: List[dict] = []
+    for player in players:
+        for day in range(num_days):
+            for record in range(records_per_day):
+                cdata_values: Dict[str, int] = {
+                    f"cdata{index}": rnd.getrandbits(31) for index in range(2, 32)
+                }
+                cdata_values['cdata2'] = rnd.choice(characters)
+                for tracker_alias in ('cdata12', 'cdata14', 'cdata16'):
+                    cdata_values[tracker_alias] = rnd.choice(trackers)
+                documents.append({
+                    'uuid': str(UUID(int=rnd.getrandbits(128))),
+                    'timestamp': START_TIMESTAMP + day * SECONDS_IN_DAY
+                    + record * SECONDS_IN_DAY // records_per_day,
+                    'uid': player['uid'],
+                    'hardware': player['platform'],
+                    'name': player['name'],
+                    'privacy': 'public',
+                    'banReason': 0,
+                    'banSeconds': 0,
+                    'rankScore': rnd.randint(0, maximum),
+                    'arenaScore': rnd.randint(0, 8000),
+                    'online': int(rnd.random() < 0.5),
+                    'joinable': 0,
+                    'partyFull': 0,
+                    'partyInMatch': 0,
+                    **cdata_values
+                })
+    return documents
+
+
+def dataset(num_players: int = 20, num_days: int = 30, games_per_day: int = 8,
+            seed: int = 0) -> Dict[str, List[dict]]:
+    """
+    Returns collection name -> documents for a reproducible database:
+    players, their Game events (about `games_per_day` each, 20% ranked), cdata and
+    respawn records
+    """
+    players: List[dict] = player_dicts(num_players, seed)
+    cdata: List[dict] = cdata_dicts(seed)
+    return {
+        'player': players,
+        'event': game_dicts(num_players * num_days * games_per_day, num_players, num_days, seed),
+        'respawn_cdata': cdata,
+        'respawn_record': respawn_record_dicts(players, cdata, num_days, seed=seed),
+    }
+
+
+def load_dataset(database: pymongo.database.Database, documents: Dict[str, List[dict]]):
+    """ Replaces the collections with the dataset's documents and creates the indexes """
+    for collection_name, collection_documents in documents.items():
+        database[collection_name].drop()
+        if collection_documents:
+            # insert_many adds an '_id' to each document, keep the dataset reusable
+            database[collection_name].insert_many(
+                [dict(document) for document in collection_documents]
+            )
+    ensure_indexes(database)
@@ -0,0 +1,45 @@
+"""
+Rebuilds the `daily_player_stats` rollup from the saved game events.
+The event scraper (`save_api_data_to_db.py`) adds each game it saves to the rollup, so it must
+be stopped first (bin/stop_tracker.sh), or the games it saves meanwhile can be lost or counted
+twice.
+
+usage: python bin/backfill_daily_player_stats.py [player_uid ...]
+"""
+import os
+import subprocess
+import sys
+from typing import List
+
+from apex_db_helper import ApexDBHelper
+# pylint: disable=import-error
+from instance.config import get_config
+
+config = get_config(os.getenv('FLASK_ENV'))
+logger = config.logger(os.path.basename(__file__))
+db_helper = ApexDBHelper()
+SCRAPER_SCRIPT: str = 'save_api_data_to_db'
+
+
+def is_scraper_running() -> bool:
+    """ Returns TRUE if the event scraper is running on this host """
+    return subprocess.run(['pgrep', '-f', SCRAPER_SCRIPT], stdout=subprocess.DEVNULL,
+                          check=False).returncode == 0
+
+
+def main(player_uids: List[int]):
+    """ Rebuilds the rollup for the given players (every tracked player if none given) """
+    if not player_uids:
+        player_uids = [player.uid for player in db_helper.player_collection.get_tracked_players()]
+    for player_uid in player_uids:
+        record_count: int = db_helper.daily_player_stats_collection.rebuild(
+            db_helper.event_collection, player_uid=player_uid
+        )
+        logger.info("Rebuilt %s daily records for %s", record_count, player_uid)
+
+
+if __name__ == "__main__":
+    if is_scraper_running():
+        logger.error("%s is running, stop it first (bin/stop_tracker.sh)", SCRAPER_SCRIPT)
+        sys.exit(1)
+    main([int(uid) for uid in sys.argv[1:]])
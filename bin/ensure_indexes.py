@@ -0,0 +1,43 @@
+"""
+Creates the indexes the site and the ingestion scripts need, then checks (`--check`)
+that no query the code issues has to scan a whole collection
+
+usage: python bin/ensure_indexes.py [--check]
+"""
+import argparse
+import os
+import sys
+from typing import List, Tuple
+
+from apex_db_helper import ApexDBHelper
+from apex_db_indexes import QueryShape, collection_scans
+# pylint: disable=import-error
+from instance.config import get_config
+
+config = get_config(os.getenv('FLASK_ENV'))
+logger = config.logger(os.path.basename(__file__))
+
+
+def main(check: bool) -> int:
+    """ Returns the number of indexes that failed plus the number of collection scans """
+    db_helper: ApexDBHelper = ApexDBHelper()
+    failures: int = 0
+    for index_name, error in db_helper.ensure_indexes().items():
+        if error:
+            failures += 1
+        else:
+            logger.info("Index ok: %s", index_name)
+    if check:
+        scans: List[Tuple[QueryShape, List[str]]] = collection_scans(db_helper.database)
+        for query_shape, stages in scans:
+            logger.error("COLLSCAN: %s %s %s", query_shape.collection,
+                         query_shape.description, stages)
+        failures += len(scans)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--check', action='store_true',
+                        help="explain() every query shape and fail on a collection scan")
+    sys.exit(1 if main(parser.parse_args().check) else 0)
@@ -1,14 +1,19 @@
 """ Ingest respawn data every 3 seconds """
 import os
 import asyncio
+import random
 from asyncio import Task
 from typing import List, Optional
 from uuid import uuid4
 
 import arrow
+from pymongo.errors import PyMongoError
 
-from apex_api_helper import ApexAPIHelper, RespawnSlowDownException
+from apex_api_helper import ApexAPIHelper, RespawnSlowDownException, close_stryder_client
 from apex_db_helper import ApexDBHelper
+from apex_metrics import Counter, Gauge, Histogram, monitor_event_loop_lag, registry, \
+    serve_metrics
+from apex_rate_limiter import AdaptiveRateLimiter
 from models import Player, RespawnRecord, RespawnIngestionTaskCollection
 # pylint: disable=import-error
 from instance.config import get_config
@@ -21,6 +26,35 @@ ingestion_task_collection: RespawnIngestionTaskCollection = RespawnIngestionTask
 
 ONLINE_DELAY = 15.0
 OFFLINE_DELAY = 60.0
+# a poll delay is made up to this fraction longer, so the players' polls drift apart
+POLL_JITTER: float = getattr(config, 'RESPAWN_POLL_JITTER', 0.1)
+# seconds between saving the progress counters to the respawn_ingestion_task collection
+PROGRESS_FLUSH_INTERVAL: float = getattr(config, 'INGESTION_PROGRESS_FLUSH_INTERVAL', 60.0)
+# local Prometheus endpoint (GET /metrics), a port of 0 turns it off
+METRICS_HOST: str = getattr(config, 'INGESTION_METRICS_HOST', '127.0.0.1')
+METRICS_PORT: int = getattr(config, 'INGESTION_METRICS_PORT', 9108)
+
+RECORDS: Counter = registry.counter(
+    'respawn_records_total', "Fetched records by result (changed, unchanged, missing)",
+    ('result',)
+)
+POLL_DELAY: Gauge = registry.gauge(
+    'respawn_poll_delay_seconds', "Seconds between polls of each player", ('player',)
+)
+RATE_LIMIT: Gauge = registry.gauge(
+    'respawn_rate_limit_per_second', "Requests a second the rate limiter lets through"
+)
+RATE_LIMIT_WAIT: Histogram = registry.histogram(
+    'respawn_rate_limit_wait_seconds', "Time a poll waited for the rate limiter"
+)
+
+# every poll (of every player) shares the request budget, a 429 slows them all down
+rate_limiter: AdaptiveRateLimiter = AdaptiveRateLimiter(
+    rate=getattr(config, 'RESPAWN_RATE_LIMIT', 5.0),
+    burst=getattr(config, 'RESPAWN_RATE_BURST', 5.0),
+    min_rate=getattr(config, 'RESPAWN_RATE_MIN', 0.2),
+    increase=getattr(config, 'RESPAWN_RATE_INCREASE', 0.05)
+)
 
 
 class TaskDiedException(Exception):
@@ -31,36 +65,34 @@ async def monitor_player(player: Player):
     """ daemon job that polls respawn """
     message = f"Starting monitor for {player.name}"
     logger.info(message)
-    previous_record: RespawnRecord = await get_respawn_obj_from_stryder(
-        player.uid, player.platform
-    )
+    previous_record: Optional[RespawnRecord] = None
+    try:
+        previous_record = await get_respawn_obj_from_stryder(player.uid, player.platform)
+    except RespawnSlowDownException:
+        pass
     if not previous_record:
+        RECORDS.inc(result='missing')
         ingestion_task_collection.fetch_error(player.name)
         logger.warning("Respawn record not found -- continuing")
 
-    slowdown = 0.0
     delay = ONLINE_DELAY if previous_record and previous_record.online else OFFLINE_DELAY
     while True:
+        POLL_DELAY.set(delay, player=player.name)
         if previous_record and previous_record.online:
             logger.debug("%s is ONLINE (delay is %s)", player.name, delay)
         else:
             logger.debug(" - %s is offline (delay is %s)", player.name, delay)
-        await asyncio.sleep(delay + slowdown)
+        await asyncio.sleep(delay * (1 + random.uniform(0, POLL_JITTER)))
         try:
             fetched_record: Optional[RespawnRecord] = await get_respawn_obj_from_stryder(
                 player.uid, player.platform
             )
         except RespawnSlowDownException:
-            slowdown += 20.0
-            message = f"Slowing down from {delay} to {delay + slowdown}"
-            logger.warning(message)
+            # the rate limiter has slowed every poll down
             ingestion_task_collection.fetch_error(player.name)
             continue
-        if slowdown:
-            slowdown -= .5
-            message = f"Speeding up from {delay} to {delay + slowdown}"
-            logger.warning(message)
         if not fetched_record:
+            RECORDS.inc(result='missing')
             ingestion_task_collection.fetch_error(player.name)
             logger.warning("Respawn record not found -- continuing")
             continue
@@ -73,6 +105,7 @@ async def monitor_player(player: Player):
 def save_record_if_changed(previous_record: RespawnRecord, fetched_record: RespawnRecord):
     """ Saves a record if it has changed """
     if not previous_record:
+        RECORDS.inc(result='unchanged')
         return
     if previous_record.online != fetched_record.online:
         if previous_record.online:
@@ -90,8 +123,11 @@ def save_record_if_changed(previous_record: RespawnRecord, fetched_record: Respa
         }
         message = f"UPDATING {previous_record.name}: Player record changed: {value}"
         logger.info(message)
+        RECORDS.inc(result='changed')
         ingestion_task_collection.inserted_record(fetched_record.name)
         fetched_record.save()
+    else:
+        RECORDS.inc(result='unchanged')
 
 
 async def get_respawn_obj_from_stryder(
@@ -99,13 +135,22 @@ async def get_respawn_obj_from_stryder(
         platform: str,
         delay: int = 0
 ) -> Optional[RespawnRecord]:
-    """ Queries respawn, and returns a respawn object """
+    """ Queries respawn (within the rate limit), and returns a respawn object """
     await asyncio.sleep(delay)
-    respawn_data: Optional[dict] = await ApexAPIHelper.get_stryder_data(
-        player_uid=player_uid,
-        platform=platform
-    )
+    RATE_LIMIT_WAIT.observe(await rate_limiter.acquire())
+    try:
+        respawn_data: Optional[dict] = await ApexAPIHelper.get_stryder_data(
+            player_uid=player_uid,
+            platform=platform
+        )
+    except RespawnSlowDownException:
+        if rate_limiter.slow_down():
+            logger.warning("Slowing every poll down to %.2f requests/s", rate_limiter.rate)
+        RATE_LIMIT.set(rate_limiter.rate)
+        raise
     if respawn_data:
+        rate_limiter.succeeded()
+        RATE_LIMIT.set(rate_limiter.rate)
         utc_time = arrow.utcnow()
         timestamp = utc_time.int_timestamp
         return (RespawnRecord(
@@ -119,23 +164,47 @@ async def get_respawn_obj_from_stryder(
     return None
 
 
+async def flush_progress():
+    """ Saves the progress counters of every player together, every PROGRESS_FLUSH_INTERVAL """
+    while True:
+        await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+        try:
+            ingestion_task_collection.flush()
+        except PyMongoError as error:
+            logger.warning("Saving the ingestion progress failed (retrying later): %s", error)
+
+
 async def main():
     """ Returns a list of respawn players for given list of players """
     players: List[Player] = db_helper.player_collection.get_tracked_players()
     ingestion_task_collection.init_tasks(players)
     task_list: List[Task] = []
     logger.info("Starting the Respawn Ingestion script")
+    if METRICS_PORT:
+        await serve_metrics(METRICS_HOST, METRICS_PORT)
+        logger.info("Serving metrics on http://%s:%s/metrics", METRICS_HOST, METRICS_PORT)
+    RATE_LIMIT.set(rate_limiter.rate)
+    task_list.append(asyncio.create_task(monitor_event_loop_lag(), name='event loop lag'))
+    task_list.append(asyncio.create_task(flush_progress(), name='progress flush'))
     for player in players:
         task = asyncio.create_task(monitor_player(player))
         task.set_name(player.name)
         task_list.append(task)
 
-    while True:
-        await asyncio.sleep(120)
-        for task in task_list:
-            if task.done():
-                logger.error("Task died: %s", {task.get_name()})
-                raise TaskDiedException
+    try:
+        while True:
+            await asyncio.sleep(120)
+            for task in task_list:
+                if task.done():
+                    logger.error("Task died: %s", {task.get_name()})
+                    raise TaskDiedException
+    finally:
+        try:
+            ingestion_task_collection.flush()
+        except PyMongoError as error:
+            # don't hide why the loop stopped
+            logger.error("Saving the ingestion progress failed: %s", error)
+        await close_stryder_client()
 
 
 if __name__ == "__main__":
@@ -127,7 +127,13 @@ def save_one_player_event_data(player: Player):
         for event_data in event_data_list:
             if event_data['timestamp'] > latest_timestamp:
                 logger.debug("Saving Player %s Data: %s", player, event_data)
-                apex_db_helper.event_collection.save_event_dict(event_data=event_data)
+                inserted: bool = apex_db_helper.event_collection.save_event_dict(
+                    event_data=event_data
+                )
+                if inserted and event_data.get('eventType') == 'Game':
+                    apex_db_helper.daily_player_stats_collection.add_game(
+                        apex_db_helper.event_collection.game_from_dict(event_data, strict=True)
+                    )
 
 
 def update_player_collection_from_api():
@@ -143,11 +149,9 @@ def update_player_collection_from_api():
 
 def is_anyone_online() -> bool:
     """ Returns TRUE if any player is currently online """
-    player: Player
-    for player in apex_db_helper.player_collection.get_tracked_players():
-        if player.is_online:
-            return True
-    return False
+    return any(
+        player.is_online for player in apex_db_helper.player_collection.get_tracked_players()
+    )
 
 
 if __name__ == "__main__":
@@ -1,17 +1,96 @@
-""" A helper module for the apex legends API """
+"""
+A helper module for the apex legends API
+Respawn is polled with one keep-alive `AsyncClient` per process (see `get_stryder_client`),
+shared by every task, so a poll doesn't pay for a new TCP / TLS connection.
+"""
+import asyncio
+import importlib.util
 import json
 import os
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 
 import httpx
 from apex_legends_api import ApexLegendsAPI, ALHTTPExceptionFromResponse, ALPlatform, ALAction
 
-from httpx import AsyncClient, Response, ReadTimeout, ConnectTimeout
+from httpx import AsyncClient, Response, ReadTimeout, ConnectTimeout, PoolTimeout
+
+from apex_metrics import Counter, Histogram, registry
 
 # pylint: disable=import-error
 from instance.config import get_config
 config = get_config(os.getenv('FLASK_ENV'))
 
+STRYDER_FETCHES: Counter = registry.counter(
+    'respawn_fetches_total', "Fetches from Respawn by outcome (ok, slowdown, timeout, error)",
+    ('outcome',)
+)
+STRYDER_FETCH_SECONDS: Histogram = registry.histogram(
+    'respawn_fetch_seconds', "Time fetching a record from Respawn", ('outcome',)
+)
+
+# event loop -> its shared client (a client can only be used on the loop it was created on)
+_stryder_clients: Dict[asyncio.AbstractEventLoop, AsyncClient] = {}
+
+
+def _reset_after_fork():
+    """ The inherited client's connections belong to the parent process, forget it """
+    _stryder_clients.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def stryder_client_options(configuration) -> dict:
+    """
+    Returns the AsyncClient keyword arguments for the instance configuration
+    Optional settings:
+        STRYDER_TIMEOUT (seconds, default 10), STRYDER_MAX_CONNECTIONS (default 20),
+        STRYDER_MAX_KEEPALIVE_CONNECTIONS (default 20),
+        STRYDER_KEEPALIVE_EXPIRY (idle seconds before a connection is closed, default 30,
+        so an idle connection is dropped before Respawn's end closes it), STRYDER_HTTP2
+        (default FALSE, needs 'h2')
+    """
+    http2: bool = bool(getattr(configuration, 'STRYDER_HTTP2', False))
+    if http2 and importlib.util.find_spec('h2') is None:
+        logger = configuration.logger(os.path.basename(__file__))
+        logger.warning("STRYDER_HTTP2 needs the 'h2' package (httpx[http2]), using HTTP/1.1")
+        http2 = False
+    return {
+        'headers': {'User-Agent': 'Respawn HTTPS/1.0'},
+        'timeout': getattr(configuration, 'STRYDER_TIMEOUT', 10.0),
+        'limits': httpx.Limits(
+            max_connections=getattr(configuration, 'STRYDER_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=getattr(
+                configuration, 'STRYDER_MAX_KEEPALIVE_CONNECTIONS', 20
+            ),
+            keepalive_expiry=getattr(configuration, 'STRYDER_KEEPALIVE_EXPIRY', 30.0)
+        ),
+        'http2': http2,
+    }
+
+
+def get_stryder_client() -> AsyncClient:
+    """
+    Returns this process's shared client for Respawn (created on first use).
+    A client belongs to one event loop, a new loop (i.e. another `asyncio.run`) gets a new one.
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    client: Optional[AsyncClient] = _stryder_clients.get(loop)
+    if client is None or client.is_closed:
+        # the client of a finished loop can't be used (or closed) any more
+        _stryder_clients.clear()
+        client = _stryder_clients[loop] = AsyncClient(**stryder_client_options(config))
+    return client
+
+
+async def close_stryder_client():
+    """ Closes the shared client of the running loop (i.e. when the daemon stops) """
+    client: Optional[AsyncClient] = _stryder_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 class RespawnSlowDownException(Exception):
     """ A wrapper class for when respawn wants us to slow down """
@@ -42,10 +121,15 @@ class ApexAPIHelper:
 
     @staticmethod
     async def get_stryder_data(player_uid: int, platform: str) -> Optional[dict]:
-        """ Get the raw CDATA json response from Respawn """
-        headers = {'User-Agent': 'Respawn HTTPS/1.0'}
+        """ Get the raw CDATA json response from Respawn (with the shared client) """
+        return await ApexAPIHelper.fetch_stryder_data(
+            get_stryder_client(), config.STRYDER_URL, player_uid, platform
+        )
 
-        url: str = config.STRYDER_URL
+    @staticmethod
+    async def fetch_stryder_data(client: AsyncClient, url: str, player_uid: int,
+                                 platform: str) -> Optional[dict]:
+        """ Get the raw CDATA json response from Respawn with the client """
         params: dict = {
             'qt': 'user-getinfo',
             'getinfo': 1,
@@ -53,27 +137,45 @@ class ApexAPIHelper:
             'uid': player_uid,
             'hardware': platform
         }
-        client: AsyncClient
-        async with httpx.AsyncClient(headers=headers, params=params, timeout=10) as client:
-            try:
-                response: Response = await client.get(url)
-            except (ReadTimeout, ConnectTimeout) as timeout_error:
-                logger = config.logger(os.path.basename(__file__))
-                logger.warning(
-                    "Timeout fetching respawn data for %s-- continuing: %s", player_uid,
-                    timeout_error
-                )
-                return None
-            if response.status_code == 200:
-                response_text = "{" + response.content.decode().replace(",\n}", "\n}") + "}"
-                response_json = json.loads(response_text)
-            elif response.status_code == 429:
-                logger = config.logger(os.path.basename(__file__))
-                logger.error("SLOW DOWN from respawn (detail to follow)")
-                logger.error(response)
-                logger.error(response.headers)
-                raise RespawnSlowDownException(response)
-            else:
-                raise ALHTTPExceptionFromResponse(response)
+        started_at: float = time.monotonic()
+        try:
+            response: Response = await client.get(url, params=params)
+        except (ReadTimeout, ConnectTimeout, PoolTimeout) as timeout_error:
+            ApexAPIHelper.count_fetch('timeout', started_at)
+            logger = config.logger(os.path.basename(__file__))
+            logger.warning(
+                "Timeout fetching respawn data for %s-- continuing: %s", player_uid,
+                timeout_error
+            )
+            return None
+        except httpx.TransportError as transport_error:
+            # i.e. a kept alive connection the server had closed
+            ApexAPIHelper.count_fetch('error', started_at)
+            logger = config.logger(os.path.basename(__file__))
+            logger.warning(
+                "Error fetching respawn data for %s-- continuing: %s", player_uid,
+                transport_error
+            )
+            return None
+        if response.status_code == 200:
+            response_text = "{" + response.content.decode().replace(",\n}", "\n}") + "}"
+            response_json = json.loads(response_text)
+        elif response.status_code == 429:
+            ApexAPIHelper.count_fetch('slowdown', started_at)
+            logger = config.logger(os.path.basename(__file__))
+            logger.error("SLOW DOWN from respawn (detail to follow)")
+            logger.error(response)
+            logger.error(response.headers)
+            raise RespawnSlowDownException(response)
+        else:
+            ApexAPIHelper.count_fetch('error', started_at)
+            raise ALHTTPExceptionFromResponse(response)
 
+        ApexAPIHelper.count_fetch('ok', started_at)
         return response_json
+
+    @staticmethod
+    def count_fetch(outcome: str, started_at: float):
+        """ Records a fetch from Respawn (started at `time.monotonic()` `started_at`) """
+        STRYDER_FETCHES.inc(outcome=outcome)
+        STRYDER_FETCH_SECONDS.observe(time.monotonic() - started_at, outcome=outcome)
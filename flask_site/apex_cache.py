@@ -0,0 +1,165 @@
+""" Small in-process caches for computed view data """
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import arrow
+import pymongo.database
+
+from models import EventCollection, Player, PlayerCollection
+
+
+class LRUCache:
+    """ Thread safe least recently used cache where every entry can have a time to live """
+
+    def __init__(self, max_size: int = 128, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: number of entries kept before the least recently used is dropped
+            ttl: default seconds an entry lives (None lives until it is dropped)
+        """
+        self.max_size: int = max_size
+        self.ttl: Optional[float] = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """ Returns (found, value) for the key """
+        with self._lock:
+            entry: Optional[Tuple[Optional[float], Any]] = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = -1):
+        """ Saves a value (ttl of -1 uses the cache's default) """
+        if ttl == -1:
+            ttl = self.ttl
+        expires_at: Optional[float] = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any],
+                   ttl: Optional[float] = -1) -> Any:
+        """ Returns the cached value, or creates and caches it with the factory """
+        found, value = self.get(key)
+        if not found:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """ Removes one entry """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """ Removes every entry """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ViewModelCache:
+    """
+    Caches view models (view controllers, or the game stores they are built from) for a time
+    range keyed on the route parameters and the number of games in the range and the latest
+    one's timestamp (the 'data version').
+    Any new game changes the version (including one ingested late, older than the latest),
+    so entries are replaced as soon as it is saved, and past days stay cached.
+    A cached view model is shared by every request, it must not keep per-request data, nor the
+    tracked players (who change without a new game), join those per request.
+    """
+
+    def __init__(self,
+                 event_collection: EventCollection,
+                 max_size: int = 128,
+                 today_ttl: Optional[float] = 300.0,
+                 past_ttl: Optional[float] = None):
+        self._event_collection: EventCollection = event_collection
+        self._cache: LRUCache = LRUCache(max_size=max_size)
+        self.today_ttl: Optional[float] = today_ttl
+        self.past_ttl: Optional[float] = past_ttl
+
+    @property
+    def cache(self) -> LRUCache:
+        """ expose the underlying cache """
+        return self._cache
+
+    def data_version(self, start_timestamp: int, end_timestamp: int) -> Tuple[int, int]:
+        """ Returns the version of the games in the range """
+        return self._event_collection.get_data_version(
+            start_timestamp=start_timestamp, end_timestamp=end_timestamp
+        )
+
+    # pylint: disable=too-many-arguments
+    def get(self,
+            route: str,
+            params: tuple,
+            start_timestamp: int,
+            end_timestamp: int,
+            factory: Callable[[], Any]) -> Any:
+        """ Returns the cached view controller, or creates one with the factory """
+        key: tuple = (route, params, self.data_version(start_timestamp, end_timestamp))
+        ttl: Optional[float] = self.past_ttl
+        if end_timestamp >= arrow.utcnow().int_timestamp:
+            ttl = self.today_ttl
+        return self._cache.get_or_set(key, factory, ttl)
+
+
+class CachedPlayerCollection(PlayerCollection):
+    """
+    `PlayerCollection` that keeps the players it looked up by uid / discord id for a short time
+    (including 'no such player', so an unknown discord id cookie is not looked up every request).
+    `save_player` drops the saved player's entries, other processes' saves show up after the ttl.
+    """
+
+    def __init__(self, database: pymongo.database.Database, max_size: int = 256,
+                 ttl: Optional[float] = 60.0):
+        super().__init__(database)
+        self._cache: LRUCache = LRUCache(max_size=max_size, ttl=ttl)
+
+    @property
+    def cache(self) -> LRUCache:
+        """ expose the underlying cache """
+        return self._cache
+
+    def _cached_player(self, key: Tuple[str, int],
+                       factory: Callable[[], Optional[Player]]) -> Optional[Player]:
+        """ Returns a copy of the cached player, so the caller can't change the cached one """
+        player: Optional[Player] = self._cache.get_or_set(key, factory)
+        return player.copy() if player else None
+
+    def get_tracked_player_by_uid(self, uid: int) -> Optional[Player]:
+        return self._cached_player(
+            ('uid', uid), lambda: PlayerCollection.get_tracked_player_by_uid(self, uid)
+        )
+
+    def get_player_by_discord_id(self, discord_id: int) -> Optional[Player]:
+        return self._cached_player(
+            ('discord_id', discord_id),
+            lambda: PlayerCollection.get_player_by_discord_id(self, discord_id)
+        )
+
+    def save_player(self, player: Player):
+        found, cached_player = self._cache.get(('uid', player.uid))
+        super().save_player(player)
+        self._cache.invalidate(('uid', player.uid))
+        self._cache.invalidate(('discord_id', player.discord_id))
+        if found and cached_player:
+            # the player's previous discord id no longer finds them
+            self._cache.invalidate(('discord_id', cached_player.discord_id))
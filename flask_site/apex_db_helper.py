@@ -1,15 +1,19 @@
 """ Helper module for """
 import json
 import os
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from pymongo import MongoClient
 import pymongo.database
 from pymongo.collection import Collection
 
+from apex_cache import CachedPlayerCollection
+from apex_db_indexes import ensure_indexes
+from apex_mongo import get_mongo_client
+from apex_player_registry import PlayerSnapshot, TrackedPlayerRegistry
 from models import EventCollection, GameEvent, Config, PlayerCollection, ConfigCollection
 from models import SeasonCollection, RespawnRecordCollection, RespawnIngestionTaskCollection
-from models import CDataCollection
+from models import CDataCollection, DailyPlayerStatsCollection, Player
 
 # pylint: disable=import-error
 from instance.config import get_config, Config as InstanceConfig
@@ -18,22 +22,40 @@ from instance.config import get_config, Config as InstanceConfig
 class ApexDBHelper:  # noqa E0302
     """ Class for retrieving / saving data to the Apex Mongo DB """
 
-    def __init__(self):
+    def __init__(self, player_cache_ttl: Optional[float] = None, player_registry: bool = False,
+                 database: Optional[pymongo.database.Database] = None):
+        """
+        Args:
+            player_cache_ttl: seconds to keep looked up players (None doesn't cache them), only
+                for processes that don't read-modify-write players (i.e. the web site)
+            player_registry: TRUE keeps the tracked players in memory (see `tracked_players`)
+            database: use this database instead of the configured one (i.e. a benchmark's
+                synthetic database)
+        """
         self.configuration: InstanceConfig = get_config(os.getenv('FLASK_ENV'))
-        self.client: MongoClient = MongoClient(
-            host=self.configuration.MONGO_HOST,
-            username=self.configuration.MONGO_USERNAME,
-            password=self.configuration.MONGO_PASSWORD,
-            authSource=self.configuration.MONGO_DB
-        )
-
-        self.database: pymongo.database.Database = self.client[self.configuration.MONGO_DB]
+        if database is None:
+            # shared by every helper in this process, which must not be forked after
+            # the helper is built (see `apex_mongo`)
+            self.client: MongoClient = get_mongo_client(self.configuration)
+            self.database: pymongo.database.Database = self.client[self.configuration.MONGO_DB]
+        else:
+            self.client = database.client
+            self.database = database
         self.basic_player_collection: Collection = self.database.basic_player
         self.event_collection: EventCollection = EventCollection(
             self.database,
-            tracker_info_data=self.load_data('tracker_info.json')
+            tracker_info_data=self.load_data('tracker_info.json'),
+            strict=bool(getattr(self.configuration, 'STRICT_GAME_DECODE', False))
         )
         self.player_collection: PlayerCollection = PlayerCollection(self.database)
+        if player_cache_ttl is not None:
+            self.player_collection = CachedPlayerCollection(
+                self.database,
+                max_size=getattr(self.configuration, 'PLAYER_CACHE_SIZE', 256),
+                ttl=player_cache_ttl
+            )
+        self.daily_player_stats_collection: DailyPlayerStatsCollection = \
+            DailyPlayerStatsCollection(self.database)
         self.respawn_ingestion_task_collection: RespawnIngestionTaskCollection =\
             RespawnIngestionTaskCollection(self.database)
         self.season_collection: SeasonCollection = SeasonCollection(self.load_data('season.json'))
@@ -48,6 +70,51 @@ class ApexDBHelper:  # noqa E0302
             cdata_collection=self.cdata_collection,
             player_collection=self.player_collection
         )
+        self.player_registry: Optional[TrackedPlayerRegistry] = None
+        if player_registry:
+            self.player_registry = TrackedPlayerRegistry(
+                self.player_collection,
+                poll_interval=getattr(self.configuration, 'PLAYER_REGISTRY_POLL_INTERVAL', 30.0),
+                use_change_stream=getattr(
+                    self.configuration, 'PLAYER_REGISTRY_CHANGE_STREAM', True
+                ),
+                logger=self.logger
+            )
+        if getattr(self.configuration, 'ENSURE_INDEXES_ON_STARTUP', False):
+            self.ensure_indexes()
+
+    def tracked_players(self) -> Tuple[Player, ...]:
+        """
+        Returns the tracked players, from the registry if there is one
+        (shared with other readers, `copy()` a player before changing it)
+        """
+        if self.player_registry:
+            return self.player_registry.snapshot().players
+        return tuple(self.player_collection.get_tracked_players())
+
+    def tracked_players_version(self) -> Tuple[int, float]:
+        """
+        Returns (number of tracked players, time of the latest change), which changes whenever
+        a tracked player is saved (the registry's snapshot time, or the latest `updated_at`)
+        """
+        if self.player_registry:
+            snapshot: PlayerSnapshot = self.player_registry.snapshot()
+            return len(snapshot.players), snapshot.loaded_at
+        players: Tuple[Player, ...] = self.tracked_players()
+        return len(players), max((player.updated_at or 0.0 for player in players), default=0.0)
+
+    def ensure_indexes(self) -> Dict[str, Optional[str]]:
+        """ Creates any missing indexes the queries need (see `apex_db_indexes`) """
+        results: Dict[str, Optional[str]] = ensure_indexes(self.database)
+        for index_name, error in results.items():
+            if error:
+                self.logger.error("Could not create index %s: %s", index_name, error)
+        return results
+
+    @property
+    def use_daily_player_stats(self) -> bool:
+        """ True if the views should read the `daily_player_stats` rollup (once backfilled) """
+        return bool(getattr(self.configuration, 'USE_DAILY_PLAYER_STATS', False))
 
     @staticmethod
     def load_data(filename: str) -> dict:
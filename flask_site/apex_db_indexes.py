@@ -0,0 +1,169 @@
+""" Declares the indexes every query needs, and checks the query plans use them """
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pymongo
+import pymongo.database
+from pymongo.errors import OperationFailure
+
+from models.daily_player_stats import DailyPlayerStatsCollection
+from models.event import GAMES_PAGE_SORT, EventCollection
+
+
+class IndexSpec(NamedTuple):
+    """ One index on a collection """
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        """ Mongo's default index name (i.e. 'uid_1_timestamp_-1') """
+        return '_'.join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+class QueryShape(NamedTuple):
+    """ A query the code issues (with example values) """
+    collection: str
+    description: str
+    query_filter: dict
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+
+
+ASC: int = pymongo.ASCENDING
+DESC: int = pymongo.DESCENDING
+
+REQUIRED_INDEXES: Tuple[IndexSpec, ...] = (
+    # save_event_dict upserts on (uid, timestamp, eventType), a player's latest game
+    IndexSpec('event', (('uid', ASC), ('timestamp', ASC), ('eventType', ASC)), unique=True),
+    # every player's games (and the aggregations) in a time range, the api's game pages
+    IndexSpec('event', (('eventType', ASC), ('timestamp', ASC), ('uid', ASC))),
+    IndexSpec('player', (('uid', ASC),), unique=True),
+    IndexSpec('player', (('discord_id', ASC),)),
+    IndexSpec('player', (('updated_at', ASC),)),
+    IndexSpec('respawn_record', (('uuid', ASC),), unique=True),
+    IndexSpec('respawn_record', (('name', ASC), ('timestamp', ASC))),
+    IndexSpec('respawn_event', (('uuid', ASC),), unique=True),
+    IndexSpec('respawn_cdata', (('c_data', ASC),), unique=True),
+    IndexSpec('respawn_ingestion_task', (('player_name', ASC),), unique=True),
+    IndexSpec(
+        'basic_player',
+        (('global.uid', ASC), ('global.internalUpdateCount', ASC)),
+        unique=True
+    ),
+    IndexSpec(
+        'daily_player_stats',
+        (('uid', ASC), ('day', ASC), ('game_mode', ASC), ('legend', ASC)),
+        unique=True
+    ),
+    IndexSpec('daily_player_stats', (('day', ASC),)),
+)
+
+# example values for the query shapes
+_UID: int = 1
+_START_TIMESTAMP: int = 1600000000
+_END_TIMESTAMP: int = 1700000000
+_DAYS: Tuple[str, str] = ('2022-02-08', '2022-02-09')
+_BY_TIME: Tuple[Tuple[str, int], ...] = (('timestamp', ASC),)
+_BY_TIME_DESC: Tuple[Tuple[str, int], ...] = (('timestamp', DESC),)
+
+# the filters come from the helpers the queries are built with, so they can't drift
+# pylint: disable=protected-access
+QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    QueryShape('event', 'save_event_dict upsert', EventCollection._event_key(
+        {'uid': str(_UID), 'timestamp': _START_TIMESTAMP, 'eventType': 'Game'}
+    )),
+    QueryShape('event', 'get_latest_game_timestamp', {'uid': str(_UID)}, _BY_TIME_DESC),
+    QueryShape('event', 'get_games (all players)',
+               EventCollection._games_query_filter(start_end_day=_DAYS), _BY_TIME),
+    QueryShape('event', 'get_games (one player)',
+               EventCollection._games_query_filter(_UID, _DAYS), _BY_TIME_DESC),
+    QueryShape('event', 'get_games (one player, every day) / daily_player_stats rebuild',
+               EventCollection._games_query_filter(_UID), _BY_TIME),
+    QueryShape('event', 'get_ranked_games / get_latest_ranked_game_timestamp',
+               EventCollection._games_query_filter(
+                   _UID, _DAYS, EventCollection._ranked_query_filter()
+               ), _BY_TIME),
+    QueryShape('event', 'get_latest_game_timestamp_between / get_player_totals $match / '
+                        'get_data_version $match',
+               EventCollection._games_between_query_filter(
+                   start_timestamp=_START_TIMESTAMP, end_timestamp=_END_TIMESTAMP
+               ), _BY_TIME_DESC),
+    QueryShape('event', 'get_games_page / get_games_page_version (all players)',
+               EventCollection._games_page_query_filter(before=(_START_TIMESTAMP, str(_UID))),
+               tuple(GAMES_PAGE_SORT)),
+    QueryShape('event', 'get_games_page / get_games_page_version (one player)',
+               EventCollection._games_page_query_filter(_UID, (_START_TIMESTAMP, str(_UID))),
+               tuple(GAMES_PAGE_SORT)),
+    QueryShape('player', 'get_tracked_player_by_uid / save_player', {'uid': _UID}),
+    QueryShape('player', 'get_player_by_discord_id', {'discord_id': _UID}),
+    QueryShape('player', 'get_players_updated_since', {'updated_at': {'$gt': 1600000000.0}},
+               (('updated_at', ASC),)),
+    QueryShape('respawn_record', 'retrieve_one_record / save', {'uuid': 'uuid'}),
+    QueryShape('respawn_record', 'retrieve_many',
+               {'name': 'name', 'timestamp': {'$gt': _START_TIMESTAMP}}),
+    QueryShape('respawn_event', 'retrieve_one_record / save', {'uuid': 'uuid'}),
+    QueryShape('respawn_cdata', 'CData save', {'c_data': 1}),
+    QueryShape('respawn_ingestion_task', 'task counters', {'player_name': 'name'}),
+    QueryShape('basic_player', 'save_basic_player_data',
+               {'global.uid': _UID, 'global.internalUpdateCount': 1}),
+    QueryShape('daily_player_stats', 'add_game upsert',
+               {'uid': _UID, 'day': _DAYS[0], 'game_mode': 'BR', 'legend': 'Wraith'}),
+    QueryShape('daily_player_stats', 'get_totals (days)',
+               DailyPlayerStatsCollection._totals_query_filter(*_DAYS)),
+    QueryShape('daily_player_stats', 'get_totals / rebuild (one player)',
+               DailyPlayerStatsCollection._totals_query_filter(player_uid=_UID)),
+    QueryShape('daily_player_stats', 'get_days $match',
+               DailyPlayerStatsCollection._days_query_filter(_UID, _DAYS[1])),
+)
+
+
+def ensure_indexes(database: pymongo.database.Database) -> Dict[str, Optional[str]]:
+    """
+    Creates any missing `REQUIRED_INDEXES` (existing ones are left as they are)
+    Returns:
+        index name -> None if it exists, or the error creating it
+        (i.e. a unique index over existing duplicates)
+    """
+    results: Dict[str, Optional[str]] = {}
+    for index in REQUIRED_INDEXES:
+        full_name: str = f"{index.collection}.{index.name}"
+        try:
+            database[index.collection].create_index(
+                list(index.keys), name=index.name, unique=index.unique
+            )
+            results[full_name] = None
+        except OperationFailure as error:
+            results[full_name] = str(error)
+    return results
+
+
+def plan_stages(plan: dict) -> Iterator[str]:
+    """ Yields every stage of an `explain()` query plan """
+    if 'queryPlan' in plan:
+        # slot based execution wraps the classic plan
+        plan = plan['queryPlan']
+    if 'stage' in plan:
+        yield plan['stage']
+    if 'inputStage' in plan:
+        yield from plan_stages(plan['inputStage'])
+    for input_stage in plan.get('inputStages', []):
+        yield from plan_stages(input_stage)
+
+
+def explain_stages(database: pymongo.database.Database, query_shape: QueryShape) -> List[str]:
+    """ Returns the stages of the winning plan for a query shape """
+    cursor = database[query_shape.collection].find(query_shape.query_filter)
+    if query_shape.sort:
+        cursor = cursor.sort(list(query_shape.sort))
+    explanation: dict = cursor.explain()
+    return list(plan_stages(explanation['queryPlanner']['winningPlan']))
+
+
+def collection_scans(database: pymongo.database.Database) -> List[Tuple[QueryShape, List[str]]]:
+    """ Returns the query shapes (and their plan stages) that scan a whole collection """
+    scans: List[Tuple[QueryShape, List[str]]] = []
+    for query_shape in QUERY_SHAPES:
+        stages: List[str] = explain_stages(database, query_shape)
+        if 'COLLSCAN' in stages:
+            scans.append((query_shape, stages))
+    return scans
@@ -0,0 +1,282 @@
+""" Indexed storage of games for fast aggregate lookups in the view controllers """
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models import GameEvent
+
+# (uid, day, legend) where `None` means 'any'
+GroupKey = Tuple[Optional[int], Optional[str], Optional[str]]
+
+# categories that are summed up front for every group
+CATEGORIES: Tuple[str, ...] = (
+    'kills', 'wins', 'damage', 'xp_progress', 'game_length', 'rank_score_change'
+)
+
+
+def make_key(uid: int = None, day: str = None, legend: str = None) -> GroupKey:
+    """ Normalizes the filter arguments (falsy means 'any') into a group key """
+    return uid or None, day or None, legend or None
+
+
+def group_keys(uid: Optional[int], day: Optional[str], legend: Optional[str]) -> List[GroupKey]:
+    """ Returns every group key (including the 'any' wildcards) a game belongs to """
+    uid, day, legend = make_key(uid, day, legend)
+    keys: Dict[GroupKey, None] = {}
+    for key_uid in (uid, None):
+        for key_day in (day, None):
+            for key_legend in (legend, None):
+                keys[(key_uid, key_day, key_legend)] = None
+    return list(keys)
+
+
+class GameStore:
+    """
+    Games grouped once by uid, day and legend with the category sums for each group.
+    All of the aggregate accessors are a dictionary lookup.
+    """
+
+    def __init__(self, game_list: Iterable[GameEvent] = ()):
+        self._games: Dict[GroupKey, List[GameEvent]] = defaultdict(list)
+        self._counts: Dict[GroupKey, int] = defaultdict(int)
+        self._totals: Dict[GroupKey, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(CATEGORIES, 0)
+        )
+        self._extra_totals: Dict[Tuple[str, GroupKey], int] = {}
+        game: GameEvent
+        leaf_totals: Dict[GroupKey, List[int]] = {}
+        for game in game_list:
+            keys: List[GroupKey] = group_keys(int(game.uid), game.day_of_event, game.legend_played)
+            for key in keys:
+                self._games[key].append(game)
+            # sum the categories for the exact group only, then roll them up below
+            values: List[int] = [game.category_total(category) for category in CATEGORIES]
+            leaf: Optional[List[int]] = leaf_totals.get(keys[0])
+            if leaf is None:
+                leaf_totals[keys[0]] = [1] + values
+            else:
+                leaf[0] += 1
+                for index, value in enumerate(values, 1):
+                    leaf[index] += value
+        for leaf_key, leaf in leaf_totals.items():
+            for key in group_keys(*leaf_key):
+                self._add_to_group(key, leaf[0], dict(zip(CATEGORIES, leaf[1:])))
+
+    @classmethod
+    def from_totals(cls, totals_list: Iterable[dict]) -> 'GameStore':
+        """
+        Builds a store from rows that are already summed up (i.e. by the database)
+        Each row has a 'uid' and optionally a 'day' and 'legend', the number of 'games'
+        and a value for each category.  The store has no game objects so `games` is empty.
+        """
+        store: GameStore = cls()
+        for totals in totals_list:
+            for key in group_keys(totals['uid'], totals.get('day'), totals.get('legend')):
+                store._add_to_group(key, totals['games'], totals)
+        return store
+
+    def _add_to_group(self, key: GroupKey, count: int, values: dict):
+        """ Adds a count and category values to one group """
+        self._counts[key] += count
+        totals: Dict[str, int] = self._totals[key]
+        for category in CATEGORIES:
+            totals[category] += values.get(category, 0)
+
+    def games(self, uid: int = None, day: str = None, legend: str = None) -> List[GameEvent]:
+        """ Returns the list of games for the filter """
+        return self._games.get(make_key(uid, day, legend), [])
+
+    def count(self, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the number of games for the filter """
+        return self._counts.get(make_key(uid, day, legend), 0)
+
+    def total(self, category: str, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the category total for the filter (0 if there is no such category) """
+        key: GroupKey = make_key(uid, day, legend)
+        if category in CATEGORIES:
+            totals: Optional[Dict[str, int]] = self._totals.get(key)
+            return totals[category] if totals else 0
+        # uncommon category, sum it once and remember it
+        extra_key = (category, key)
+        if extra_key not in self._extra_totals:
+            self._extra_totals[extra_key] = sum(
+                game.category_total(category) for game in self.games(*key)
+                if hasattr(game, category)
+            )
+        return self._extra_totals[extra_key]
+
+    def average(self, category: str, uid: int = None, day: str = None, legend: str = None) -> float:
+        """ Returns the category average for the filter """
+        num_games: int = self.count(uid, day, legend)
+        if num_games:
+            return self.total(category, uid, day, legend) / num_games
+        return 0.0
+
+    def days(self) -> List[str]:
+        """ Returns the days that have at least one game """
+        return [day for uid, day, legend in self._counts if uid is None and legend is None and day]
+
+    def legends(self, day: str = None) -> List[str]:
+        """ Returns the legends played (on a day if given) """
+        day = day or None
+        return [
+            legend for uid, key_day, legend in self._counts
+            if uid is None and key_day == day and legend
+        ]
+
+    def maximum(self, category: str, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the largest single game value of the category for the filter """
+        return max(
+            (game.category_total(category) for game in self.games(uid, day, legend)),
+            default=0
+        )
+
+    def day_legend_totals(self) -> Dict[str, Dict[Optional[str], Tuple[int, Dict[str, int]]]]:
+        """
+        Returns day -> legend -> (number of games, category totals) in one pass,
+        the legend `None` has the whole day's totals
+        """
+        day_legends: Dict[str, Dict[Optional[str], Tuple[int, Dict[str, int]]]] = \
+            defaultdict(dict)
+        for key, count in self._counts.items():
+            uid, day, legend = key
+            if uid is None and day:
+                day_legends[day][legend] = (count, self._totals[key])
+        return day_legends
+
+
+# pylint: disable=too-many-instance-attributes
+class ColumnarGameStore:
+    """
+    Games stored as NumPy columns, aggregates are vectorized masked reductions.
+    Has the same accessors as `GameStore` and can be swapped in for it.
+    """
+
+    def __init__(self, game_list: Iterable[GameEvent] = ()):
+        self._game_list: List[GameEvent] = list(game_list)
+        self._day_list: List[str] = sorted({game.day_of_event for game in self._game_list})
+        self._legend_list: List[str] = sorted({game.legend_played for game in self._game_list})
+        self._day_codes: Dict[str, int] = {
+            day: index for index, day in enumerate(self._day_list)
+        }
+        self._legend_codes: Dict[str, int] = {
+            legend: index for index, legend in enumerate(self._legend_list)
+        }
+        size: int = len(self._game_list)
+        self.uid: np.ndarray = np.fromiter(
+            (int(game.uid) for game in self._game_list), dtype=np.int64, count=size
+        )
+        self.day_index: np.ndarray = np.fromiter(
+            (self._day_codes[game.day_of_event] for game in self._game_list),
+            dtype=np.int32, count=size
+        )
+        self.legend_code: np.ndarray = np.fromiter(
+            (self._legend_codes[game.legend_played] for game in self._game_list),
+            dtype=np.int32, count=size
+        )
+        self._columns: Dict[str, np.ndarray] = {}
+        for category in CATEGORIES:
+            self._columns[category] = np.fromiter(
+                (game.category_total(category) for game in self._game_list),
+                dtype=np.int64, count=size
+            )
+
+    def column(self, category: str) -> Optional[np.ndarray]:
+        """ Returns the column for the category (None if there is no such column) """
+        return self._columns.get(category)
+
+    def _mask(self, uid: int = None, day: str = None, legend: str = None) -> np.ndarray:
+        """ Returns the boolean mask of games matching the filter """
+        mask: np.ndarray = np.ones(len(self._game_list), dtype=bool)
+        if uid:
+            mask &= self.uid == uid
+        if day:
+            if day not in self._day_codes:
+                return np.zeros(len(self._game_list), dtype=bool)
+            mask &= self.day_index == self._day_codes[day]
+        if legend:
+            if legend not in self._legend_codes:
+                return np.zeros(len(self._game_list), dtype=bool)
+            mask &= self.legend_code == self._legend_codes[legend]
+        return mask
+
+    def games(self, uid: int = None, day: str = None, legend: str = None) -> List[GameEvent]:
+        """ Returns the list of games for the filter """
+        return [self._game_list[index] for index in np.flatnonzero(self._mask(uid, day, legend))]
+
+    def count(self, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the number of games for the filter """
+        return int(np.count_nonzero(self._mask(uid, day, legend)))
+
+    def total(self, category: str, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the category total for the filter (0 if there is no such category) """
+        column: Optional[np.ndarray] = self.column(category)
+        if column is None:
+            return sum(
+                game.category_total(category) for game in self.games(uid, day, legend)
+                if hasattr(game, category)
+            )
+        return int(column[self._mask(uid, day, legend)].sum())
+
+    def average(self, category: str, uid: int = None, day: str = None, legend: str = None) -> float:
+        """ Returns the category average for the filter """
+        num_games: int = self.count(uid, day, legend)
+        if num_games:
+            return self.total(category, uid, day, legend) / num_games
+        return 0.0
+
+    def maximum(self, category: str, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the largest single game value of the category for the filter """
+        column: Optional[np.ndarray] = self.column(category)
+        if column is None:
+            return max(
+                (game.category_total(category) for game in self.games(uid, day, legend)),
+                default=0
+            )
+        values: np.ndarray = column[self._mask(uid, day, legend)]
+        return int(values.max()) if values.size else 0
+
+    def days(self) -> List[str]:
+        """ Returns the days that have at least one game """
+        return list(self._day_list)
+
+    def legends(self, day: str = None) -> List[str]:
+        """ Returns the legends played (on a day if given) """
+        codes: np.ndarray = np.unique(self.legend_code[self._mask(day=day)])
+        return [self._legend_list[code] for code in codes]
+
+    def _group_totals(self, group_code: np.ndarray) -> List[Tuple[int, int, Dict[str, int]]]:
+        """ Returns (group code, number of games, category totals) for every group code """
+        groups, group_index, counts = np.unique(
+            group_code, return_inverse=True, return_counts=True
+        )
+        sums: Dict[str, np.ndarray] = {
+            category: np.bincount(group_index, weights=column, minlength=len(groups))
+            for category, column in self._columns.items()
+        }
+        return [
+            (code, int(counts[index]),
+             {category: int(values[index]) for category, values in sums.items()})
+            for index, code in enumerate(groups.tolist())
+        ]
+
+    def day_legend_totals(self) -> Dict[str, Dict[Optional[str], Tuple[int, Dict[str, int]]]]:
+        """
+        Returns day -> legend -> (number of games, category totals) in one pass,
+        the legend `None` has the whole day's totals
+        """
+        day_legends: Dict[str, Dict[Optional[str], Tuple[int, Dict[str, int]]]] = \
+            defaultdict(dict)
+        if not self._game_list:
+            return day_legends
+        legend_count: int = len(self._legend_list)
+        day_legend_code: np.ndarray = self.day_index.astype(np.int64) * legend_count \
+            + self.legend_code
+        for code, count, totals in self._group_totals(day_legend_code):
+            day_code, legend_code = divmod(code, legend_count)
+            legend: Optional[str] = self._legend_list[legend_code] or None
+            day_legends[self._day_list[day_code]][legend] = (count, totals)
+        for code, count, totals in self._group_totals(self.day_index):
+            day_legends[self._day_list[code]][None] = (count, totals)
+        return day_legends
@@ -0,0 +1,92 @@
+""" JSON representations, pagination cursors and ETags for the /api/v1 routes """
+import base64
+import binascii
+import hashlib
+import json
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from models import GameEvent, Player
+
+if TYPE_CHECKING:
+    from apex_view_controllers import LeaderboardViewController
+
+API_VERSION: str = 'v1'
+LEADERBOARD_CATEGORIES: Tuple[str, ...] = ('kills_total', 'damage_total', 'wins', 'xp_total')
+
+
+class BadCursorException(Exception):
+    """ Raised when a pagination cursor cannot be decoded """
+
+
+def strong_etag(*parts) -> str:
+    """ Returns a strong ETag (without quotes) for the route, its parameters and data version """
+    payload: str = json.dumps([API_VERSION, *parts], default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def encode_cursor(game: GameEvent) -> str:
+    """ Returns the opaque cursor for the page after the game """
+    return base64.urlsafe_b64encode(f"{game.timestamp}:{game.uid}".encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """ Returns the (timestamp, uid) of a cursor from `encode_cursor` """
+    try:
+        timestamp, uid = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split(':')
+        return int(timestamp), str(int(uid))
+    except (ValueError, binascii.Error, UnicodeError) as error:
+        raise BadCursorException(f"Invalid cursor: {cursor}") from error
+
+
+def game_json(game: GameEvent) -> dict:
+    """ Returns the JSON representation of one game """
+    current_rank_score: Optional[str] = getattr(game, 'current_rank_score', None)
+    return {
+        'uid': int(game.uid),
+        'player': game.player,
+        'timestamp': game.timestamp,
+        'day': game.day_of_event,
+        'legend': game.legend_played,
+        'game_mode': game.game_mode.value if game.game_mode else None,
+        'kills': game.category_total('kills'),
+        'wins': game.category_total('wins'),
+        'damage': game.category_total('damage'),
+        'xp_progress': game.category_total('xp_progress'),
+        'game_length': game.category_total('game_length'),
+        'rank_score_change': game.category_total('rank_score_change'),
+        'current_rank_score': int(current_rank_score) if current_rank_score else None,
+    }
+
+
+def games_page_json(game_list: List[GameEvent], limit: int) -> dict:
+    """ Returns one page of games and the cursor for the next page (None on the last page) """
+    next_cursor: Optional[str] = None
+    if game_list and len(game_list) == limit:
+        next_cursor = encode_cursor(game_list[-1])
+    return {'games': [game_json(game) for game in game_list], 'next_cursor': next_cursor}
+
+
+def leaderboard_json(view_controller: 'LeaderboardViewController', day: str,
+                     clan: Optional[str]) -> dict:
+    """ Returns the leaderboard's players with their totals, places and points """
+    player: Player
+    players: List[dict] = []
+    for player in view_controller.players_sorted_by_key('point_total'):
+        players.append({
+            'uid': player.uid,
+            'name': player.name,
+            'clan': player.clan,
+            'games_played': player.games_played,
+            'minute_total': player.minute_total,
+            'point_total': player.point_total,
+            'position': view_controller.position('point_total', player.uid),
+            'categories': {
+                category: {
+                    'total': getattr(player, category),
+                    'position': view_controller.position(category, player.uid),
+                    'points': view_controller.points_for_category(category, player.uid),
+                }
+                for category in LEADERBOARD_CATEGORIES
+            },
+        })
+    return {'day': day, 'clan': clan, 'players': players}
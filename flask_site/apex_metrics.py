@@ -0,0 +1,250 @@
+"""
+In-process metrics (counters, gauges and histograms) in the Prometheus text format.
+Metrics are declared once at module level on the process wide `registry`, i.e.
+    FETCHES = registry.counter('respawn_fetches_total', "Fetches from Respawn", ('outcome',))
+    FETCHES.inc(outcome='ok')
+and served by `serve_metrics` (an asyncio HTTP server for the daemons).
+"""
+import asyncio
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _format_value(value: float) -> str:
+    """ A sample value the way Prometheus writes it """
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    """ A named metric, with one value per combination of label values """
+    metric_type: str = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._lock: threading.Lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, object]) -> LabelValues:
+        """ Returns the label values in `label_names` order """
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} has the labels {self.label_names}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _label_text(self, label_values: LabelValues, extra: str = '') -> str:
+        """ Returns '{name="value",...}' (empty without labels) """
+        pairs: List[str] = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self) -> List[str]:
+        """ Returns the sample lines """
+        raise NotImplementedError
+
+    def exposition(self) -> str:
+        """ Returns the metric in the Prometheus text format """
+        lines: List[str] = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric):
+    """ A total that only goes up """
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """ Adds the amount """
+        if amount < 0:
+            raise ValueError("A counter can't go down")
+        key: LabelValues = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """ Returns the current total """
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values: List[Tuple[LabelValues, float]] = sorted(self._values.items())
+        return [
+            f"{self.name}{self._label_text(key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """ A value that goes up and down """
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        """ Sets the value """
+        key: LabelValues = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        """ Adds the amount (which can be negative) """
+        key: LabelValues = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Histogram(Metric):
+    """ Counts of observations in cumulative buckets, with their sum """
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # label values -> (count per bucket (the last one is +Inf), sum)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        """ Records one observation """
+        key: LabelValues = self._label_values(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        """ Returns the number of observations """
+        counts, _ = self._values.get(self._label_values(labels), ([0], [0.0]))
+        return sum(counts)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(
+                (key, list(counts), total[0]) for key, (counts, total) in self._values.items()
+            )
+        lines: List[str] = []
+        for key, counts, total in values:
+            cumulative: int = 0
+            for upper_bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_label: str = self._label_text(key, f'le="{_format_value(upper_bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_label} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """ The metrics of a process, by name """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        """ Adds the metric, or returns the one already registered with its name and type """
+        with self._lock:
+            existing: Optional[Metric] = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+            raise ValueError(f"{metric.name} is already registered differently")
+        return existing
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """ Returns the counter with the name (created on first use) """
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        """ Returns the gauge with the name (created on first use) """
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """ Returns the histogram with the name (created on first use) """
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def exposition(self) -> str:
+        """ Returns every metric in the Prometheus text format """
+        with self._lock:
+            metrics: List[Metric] = [self._metrics[name] for name in sorted(self._metrics)]
+        return ''.join(metric.exposition() for metric in metrics)
+
+
+registry: MetricsRegistry = MetricsRegistry()
+
+
+async def _handle_metrics_request(metrics_registry: MetricsRegistry,
+                                  reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """ Answers one HTTP request: GET /metrics, anything else is a 404 """
+    try:
+        request_line: bytes = await asyncio.wait_for(reader.readline(), timeout=5)
+        # the headers are ignored
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+            pass
+        parts: List[str] = request_line.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+            status, body = '200 OK', metrics_registry.exposition().encode('utf-8')
+        else:
+            status, body = '404 Not Found', b'Not Found\n'
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int,
+                        metrics_registry: MetricsRegistry = registry) -> asyncio.AbstractServer:
+    """ Starts serving GET /metrics over HTTP on the running event loop """
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_metrics_request(metrics_registry, reader, writer),
+        host=host, port=port
+    )
+
+
+async def monitor_event_loop_lag(interval: float = 1.0,
+                                 metrics_registry: MetricsRegistry = registry):
+    """ Measures how late the event loop wakes up a sleeping task, forever """
+    lag_seconds: Histogram = metrics_registry.histogram(
+        'event_loop_lag_seconds', "How late the event loop woke up a sleeping task",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+    )
+    last_lag: Gauge = metrics_registry.gauge(
+        'event_loop_lag_last_seconds', "The event loop's latest lag"
+    )
+    while True:
+        started_at: float = time.monotonic()
+        await asyncio.sleep(interval)
+        lag: float = max(time.monotonic() - started_at - interval, 0.0)
+        lag_seconds.observe(lag)
+        last_lag.set(lag)
@@ -0,0 +1,70 @@
+"""
+Process wide registry of MongoClients, so every `ApexDBHelper` in a process shares one
+connection pool.
+Clients are created with `connect=False` (no sockets or monitor threads until the first
+query) and closed when the process exits.
+A MongoClient can't be used across a fork, and the helpers keep the client they were built
+with, so build them in the process that uses them (i.e. gunicorn without `--preload`, which
+imports the app in each worker).
+"""
+import atexit
+import threading
+from typing import Dict, Optional, Tuple
+
+from pymongo import MongoClient
+
+_lock: threading.Lock = threading.Lock()
+_clients: Dict[Tuple[Tuple[str, object], ...], MongoClient] = {}
+
+
+def client_options(configuration) -> dict:
+    """
+    Returns the MongoClient keyword arguments for the instance configuration
+    Optional settings (pymongo's default if not set):
+        MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+        MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+        MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS
+    """
+    options: dict = {
+        'host': configuration.MONGO_HOST,
+        'username': configuration.MONGO_USERNAME,
+        'password': configuration.MONGO_PASSWORD,
+        'authSource': configuration.MONGO_DB,
+        'connect': False,
+    }
+    optional_settings: Dict[str, str] = {
+        'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+        'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+        'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+        'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+        'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+        'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+        'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    }
+    for setting, option in optional_settings.items():
+        value: Optional[int] = getattr(configuration, setting, None)
+        if value is not None:
+            options[option] = value
+    return options
+
+
+def get_mongo_client(configuration) -> MongoClient:
+    """ Returns this process's shared client for the configuration (created on first use) """
+    options: dict = client_options(configuration)
+    key: Tuple[Tuple[str, object], ...] = tuple(sorted(options.items()))
+    with _lock:
+        client: Optional[MongoClient] = _clients.get(key)
+        if client is None:
+            client = _clients[key] = MongoClient(**options)
+    return client
+
+
+def close_mongo_clients():
+    """ Closes every client this process created (i.e. when a script exits) """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_mongo_clients)
@@ -0,0 +1,167 @@
+"""
+In memory registry of the tracked players.
+Players are loaded once, then kept current from a change stream on the `player` collection,
+or (where the server has no change streams) by polling for players with a newer `updated_at`.
+Every change publishes a new immutable `PlayerSnapshot`, so reading the roster is O(1).
+"""
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import OperationFailure, PyMongoError
+
+from models import Player, PlayerCollection
+
+
+class PlayerSnapshot(NamedTuple):
+    """
+    The tracked players at one point in time.
+    The players are shared by every reader, `copy()` one before changing it.
+    """
+    players: Tuple[Player, ...]
+    by_uid: Mapping[int, Player]
+    loaded_at: float
+
+    @classmethod
+    def from_players(cls, players: Iterable[Player]) -> 'PlayerSnapshot':
+        """ Builds a snapshot (the last player with a uid wins) """
+        by_uid: Dict[int, Player] = {player.uid: player for player in players}
+        return cls(tuple(by_uid.values()), MappingProxyType(by_uid), time.time())
+
+
+class TrackedPlayerRegistry:
+    """
+    Keeps a `PlayerSnapshot` current from a background thread, started on the first
+    `snapshot()` in each process (so a forked worker runs its own).
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self,
+                 player_collection: PlayerCollection,
+                 poll_interval: float = 30.0,
+                 full_reload_interval: float = 600.0,
+                 use_change_stream: bool = True,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            poll_interval: seconds between polls (and between retries of a failed change stream)
+            full_reload_interval: seconds between full reloads when polling, which pick up
+                deleted players and players saved without an `updated_at`
+            use_change_stream: FALSE always polls
+        """
+        self._player_collection: PlayerCollection = player_collection
+        self.poll_interval: float = poll_interval
+        self.full_reload_interval: float = full_reload_interval
+        self.use_change_stream: bool = use_change_stream
+        self._logger: logging.Logger = logger or logging.getLogger(__name__)
+        # guards starting the thread and publishing (the thread and `refresh()` both publish)
+        self._lock: threading.RLock = threading.RLock()
+        self._stop_event: threading.Event = threading.Event()
+        self._snapshot: Optional[PlayerSnapshot] = None
+        self._updated_at: float = 0.0
+        self._pid: Optional[int] = None
+
+    def snapshot(self) -> PlayerSnapshot:
+        """ Returns the current tracked players """
+        if self._pid != os.getpid():
+            self._start()
+        return self._snapshot
+
+    def stop(self):
+        """ Stops following the collection (the last snapshot stays readable) """
+        self._stop_event.set()
+
+    def refresh(self):
+        """ Picks up the players saved since the last snapshot now """
+        self._publish(self._player_collection.get_players_updated_since(self._updated_at))
+
+    def _start(self):
+        """ Loads the players and starts the background thread (once per process) """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._load_all()
+            self._stop_event = threading.Event()
+            threading.Thread(
+                name='TrackedPlayerRegistry', target=self._run, daemon=True
+            ).start()
+            self._pid = os.getpid()
+
+    def _load_all(self):
+        """ Replaces the snapshot with every player in the collection """
+        players: List[Player] = self._player_collection.get_tracked_players()
+        with self._lock:
+            self._updated_at = max((player.updated_at or 0.0 for player in players), default=0.0)
+            self._snapshot = PlayerSnapshot.from_players(players)
+
+    def _publish(self, changed_players: List[Player]):
+        """ Publishes a new snapshot with the changed players """
+        if not changed_players:
+            return
+        with self._lock:
+            players: Dict[int, Player] = dict(self._snapshot.by_uid)
+            for player in changed_players:
+                players[player.uid] = player
+                self._updated_at = max(self._updated_at, player.updated_at or 0.0)
+            self._snapshot = PlayerSnapshot.from_players(players.values())
+
+    def _run(self):
+        """
+        Follows the change stream until it isn't available, then polls.
+        Any failure is logged and retried after `poll_interval`, the thread never dies
+        (which would leave the snapshot stale for the life of the process).
+        """
+        while self.use_change_stream and not self._stop_event.is_set():
+            try:
+                self._follow_change_stream()
+            except OperationFailure as error:
+                self._logger.info("No player change stream (%s), polling instead", error)
+                self.use_change_stream = False
+            except PyMongoError as error:
+                self._logger.warning("Player change stream failed: %s", error)
+                self._stop_event.wait(self.poll_interval)
+            except Exception:  # pylint: disable=broad-except
+                self._logger.exception("Following the player change stream failed")
+                self._stop_event.wait(self.poll_interval)
+        self._poll()
+
+    def _follow_change_stream(self):
+        """ Applies every change to the collection """
+        with self._player_collection.watch() as change_stream:
+            # changes from before the stream opened are in the reload
+            self._load_all()
+            while not self._stop_event.is_set():
+                change: Optional[dict] = change_stream.try_next()
+                if change is None:
+                    continue
+                full_document: Optional[dict] = change.get('fullDocument')
+                if change['operationType'] in ('insert', 'update', 'replace') and full_document:
+                    try:
+                        player: Player = Player(**full_document)
+                    except ValidationError as error:
+                        self._logger.warning("Skipping invalid player %s: %s",
+                                             full_document.get('uid'), error)
+                        continue
+                    self._publish([player])
+                else:
+                    # a delete (which only has the _id), drop, rename or invalidate
+                    self._load_all()
+
+    def _poll(self):
+        """ Polls for newly saved players, with a periodic full reload """
+        last_full_reload: float = time.monotonic()
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                if time.monotonic() - last_full_reload >= self.full_reload_interval:
+                    self._load_all()
+                    last_full_reload = time.monotonic()
+                else:
+                    self.refresh()
+            except PyMongoError as error:
+                self._logger.warning("Polling the players failed: %s", error)
+            except Exception:  # pylint: disable=broad-except
+                self._logger.exception("Polling the players failed")
@@ -0,0 +1,95 @@
+"""
+Process wide asyncio rate limiter for the requests to Respawn.
+A token bucket (`rate` tokens a second, up to `burst` saved) shared by every task, whose rate
+adapts AIMD style: it creeps up while requests succeed and halves when any task is told to
+slow down, so every task backs off together.
+Waiting tasks are served first come first served, so spreading the polls out (jitter) is up to
+the callers, before they ask for a token.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AdaptiveRateLimiter:
+    """ Token bucket with an additive increase / multiplicative decrease rate """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self,
+                 rate: float,
+                 *,
+                 burst: float = 1.0,
+                 min_rate: float = 0.1,
+                 increase: float = 0.05,
+                 decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 2.0):
+        """
+        Args:
+            rate: the most requests a second (and the starting rate)
+            burst: tokens saved up while idle, sent without waiting
+            min_rate: the rate never drops below this
+            increase: requests a second added for every second without a slow down
+            decrease_factor: the rate is multiplied by this on a slow down
+            decrease_cooldown: seconds after a decrease in which more slow downs (from the
+                requests already sent) are ignored
+        """
+        self.max_rate: float = rate
+        self.rate: float = rate
+        self.burst: float = burst
+        self.min_rate: float = min_rate
+        self.increase: float = increase
+        self.decrease_factor: float = decrease_factor
+        self.decrease_cooldown: float = decrease_cooldown
+        self.slow_downs: int = 0
+        self._tokens: float = burst
+        self._refilled_at: float = time.monotonic()
+        self._increased_at: float = self._refilled_at
+        self._decreased_at: Optional[float] = None
+        # created on first use, on the loop that uses it
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def acquire(self) -> float:
+        """
+        Waits for a token (first come first served)
+        Returns:
+            seconds waited
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        started_at: float = time.monotonic()
+        async with self._lock:
+            self._refill(time.monotonic())
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill(time.monotonic())
+            self._tokens -= 1
+        return time.monotonic() - started_at
+
+    def succeeded(self):
+        """ Additive increase: a request went through """
+        now: float = time.monotonic()
+        if self.rate < self.max_rate:
+            self._refill(now)
+            self.rate = min(self.max_rate, self.rate + (now - self._increased_at) * self.increase)
+        self._increased_at = now
+
+    def slow_down(self) -> bool:
+        """
+        Multiplicative decrease: a request was told to slow down (i.e. a 429)
+        Returns:
+            TRUE if the rate was lowered (FALSE within the cool down of the last decrease)
+        """
+        now: float = time.monotonic()
+        self.slow_downs += 1
+        if self._decreased_at is not None and now - self._decreased_at < self.decrease_cooldown:
+            return False
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        # the saved up burst goes too, everyone waits for the new rate
+        self._tokens = 0.0
+        self._decreased_at = self._increased_at = now
+        return True
@@ -0,0 +1,214 @@
+"""
+Lightweight per-request timing.
+A sampled request gets a `RequestTiming`. `span()` blocks (and every Mongo command, through
+`MongoTimingListener`) add their time to a named phase, i.e. 'db', 'compute' or 'render'.
+A span only counts its own time (the queries a view controller runs are 'db', not 'compute'),
+so the phases of a request add up to at most its total.
+A request that isn't sampled has no `RequestTiming`, and a span costs one context lookup.
+"""
+import contextlib
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from typing import ContextManager, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import monitoring
+
+_current_timing: contextvars.ContextVar = contextvars.ContextVar('request_timing', default=None)
+_NO_SPAN: ContextManager = contextlib.nullcontext()
+_END: object = object()
+PERCENTILES: Tuple[int, ...] = (50, 95, 99)
+
+
+class RequestTiming:
+    """ Milliseconds (and number of spans) in each phase of one request """
+
+    def __init__(self):
+        self.started_at: float = time.perf_counter()
+        # phase -> [milliseconds, spans]
+        self.phases: Dict[str, List[float]] = {}
+        # milliseconds spent in spans nested in each open span
+        self._nested_ms: List[float] = []
+
+    def add(self, phase: str, milliseconds: float, own_milliseconds: Optional[float] = None):
+        """
+        Records a finished span
+        Args:
+            milliseconds: the span's whole time (taken out of the span it is nested in)
+            own_milliseconds: the time not spent in nested spans (default all of it)
+        """
+        totals: List[float] = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += milliseconds if own_milliseconds is None else own_milliseconds
+        totals[1] += 1
+        if self._nested_ms:
+            self._nested_ms[-1] += milliseconds
+
+    def total_ms(self) -> float:
+        """ Milliseconds since the request started """
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def phase_ms(self) -> Dict[str, float]:
+        """ Returns phase -> milliseconds """
+        return {phase: totals[0] for phase, totals in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """ Returns the value of a Server-Timing header for the request so far """
+        metrics: List[str] = [
+            f'{phase};dur={totals[0]:.2f};desc="{totals[1]:.0f} spans"'
+            for phase, totals in self.phases.items()
+        ]
+        metrics.append(f"total;dur={self.total_ms():.2f}")
+        return ', '.join(metrics)
+
+
+class _Span:
+    """ Times a block into a phase of a `RequestTiming` """
+
+    def __init__(self, timing: RequestTiming, phase: str):
+        self.timing: RequestTiming = timing
+        self.phase: str = phase
+        self.started_at: float = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        # pylint: disable=protected-access
+        self.timing._nested_ms.append(0.0)
+
+    def __exit__(self, *_):
+        milliseconds: float = (time.perf_counter() - self.started_at) * 1000
+        # pylint: disable=protected-access
+        nested_ms: float = self.timing._nested_ms.pop()
+        self.timing.add(self.phase, milliseconds, milliseconds - nested_ms)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """ Returns the timing of the current request (None if it isn't sampled) """
+    return _current_timing.get()
+
+
+def span(phase: str) -> ContextManager:
+    """ Times the block into the phase of the current request (does nothing if not sampled) """
+    timing: Optional[RequestTiming] = _current_timing.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, phase)
+
+
+def timed_iterator(phase: str, iterable: Iterable) -> Iterator:
+    """ Times producing each item (i.e. each chunk of a streamed template) into the phase """
+    iterator: Iterator = iter(iterable)
+    while True:
+        with span(phase):
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+def start_request(sample_rate: float) -> Optional[RequestTiming]:
+    """ Starts timing the current request, if it is sampled (0 never samples, 1 always) """
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        _current_timing.set(None)
+        return None
+    timing: RequestTiming = RequestTiming()
+    _current_timing.set(timing)
+    return timing
+
+
+def finish_request() -> Optional[RequestTiming]:
+    """ Stops timing the current request and returns its timing (None if it wasn't sampled) """
+    timing: Optional[RequestTiming] = _current_timing.get()
+    _current_timing.set(None)
+    return timing
+
+
+class MongoTimingListener(monitoring.CommandListener):
+    """ Adds every Mongo command run by a sampled request to its 'db' phase """
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        timing: Optional[RequestTiming] = _current_timing.get()
+        if timing is not None:
+            timing.add('db', event.duration_micros / 1000)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        timing: Optional[RequestTiming] = _current_timing.get()
+        if timing is not None:
+            timing.add('db', event.duration_micros / 1000)
+
+
+def install_mongo_listener():
+    """ Times the Mongo commands of every MongoClient created after this call """
+    monitoring.register(MongoTimingListener())
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """ Returns the nearest rank percentile of sorted values """
+    if not sorted_values:
+        return 0.0
+    rank: int = max(int(-(-percent * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+class TimingStats:
+    """
+    The most recent timings of each route (in this process), summarized as percentiles.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        """
+        Args:
+            max_samples: timings kept per route (older ones are dropped)
+        """
+        self.max_samples: int = max_samples
+        self._lock: threading.Lock = threading.Lock()
+        # route -> (total milliseconds, phase -> milliseconds)
+        self._samples: Dict[str, Deque[Tuple[float, Dict[str, float]]]] = {}
+        self._requests: Dict[str, int] = {}
+
+    def record(self, route: str, timing: RequestTiming):
+        """ Saves the timing of a finished request """
+        sample: Tuple[float, Dict[str, float]] = (timing.total_ms(), timing.phase_ms())
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self.max_samples)
+                self._requests[route] = 0
+            samples.append(sample)
+            self._requests[route] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Returns route -> {'requests': sampled requests, 'samples': timings kept,
+        'total' / <phase>: {'p50': ms, 'p95': ms, 'p99': ms}}
+        """
+        with self._lock:
+            routes: Dict[str, List[Tuple[float, Dict[str, float]]]] = {
+                route: list(samples) for route, samples in self._samples.items()
+            }
+            requests: Dict[str, int] = dict(self._requests)
+        summary: Dict[str, dict] = {}
+        for route, samples in sorted(routes.items()):
+            phases: List[str] = sorted({phase for _, phase_ms in samples for phase in phase_ms})
+            values: Dict[str, List[float]] = {'total': [total for total, _ in samples]}
+            for phase in phases:
+                values[phase] = [phase_ms.get(phase, 0.0) for _, phase_ms in samples]
+            route_summary: dict = {'requests': requests[route], 'samples': len(samples)}
+            for name, phase_values in values.items():
+                phase_values.sort()
+                route_summary[name] = {
+                    f"p{percent}": round(percentile(phase_values, percent), 3)
+                    for percent in PERCENTILES
+                }
+            summary[route] = route_summary
+        return summary
+
+    def clear(self):
+        """ Forgets every timing """
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
@@ -1,10 +1,15 @@
 """ A collection of utilities so I don't repeat myself """
-from datetime import datetime
-from typing import Tuple
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
 
 import arrow
+import numpy as np
 from arrow import Arrow
 
+PACIFIC: ZoneInfo = ZoneInfo('US/Pacific')
+
 
 def players_sorted_by_key(tracked_players: list, key: str):
     """ returns back a list of players sorted by the category """
@@ -26,6 +31,25 @@ def players_sorted_by_key(tracked_players: list, key: str):
     return sorted_players
 
 
+def competition_ranks(sorted_players: list, key: str) -> Dict[int, int]:
+    """
+    Returns the 'standard competition' rank (1, 2, 2, 4) of each player by uid
+    Args:
+        sorted_players: players already sorted by the key (i.e. `players_sorted_by_key`)
+        key: attribute the players were sorted by (missing counts as 0)
+    """
+    ranks: Dict[int, int] = {}
+    place: int = 0
+    previous_value = None
+    for index, player in enumerate(sorted_players, start=1):
+        value = getattr(player, key, 0)
+        if index == 1 or value != previous_value:
+            place = index
+        ranks[player.uid] = place
+        previous_value = value
+    return ranks
+
+
 def get_arrow_date_prev_next_date_to_use(day: str) -> Tuple[Arrow, str, str, str]:
     """ Returns arrow date, prev and next day strings
     Args:
@@ -36,23 +60,124 @@ def get_arrow_date_prev_next_date_to_use(day: str) -> Tuple[Arrow, str, str, str
     date_to_use = get_arrow_date_to_use(day)
 
     if not day:
-        day = date_to_use.format('YYYY-MM-DD')
-    prev_day = date_to_use.shift(days=-1).format('YYYY-MM-DD')
+        day = date_to_use.date().isoformat()
+    prev_day = shift_day(day, -1)
     today = arrow.now('US/Pacific')
     next_day = None
     if date_to_use < today.shift(days=-1):
-        next_day = date_to_use.shift(days=+1).format('YYYY-MM-DD')
+        next_day = shift_day(day, +1)
     return date_to_use, prev_day, next_day, day
 
 
 def get_arrow_date_to_use(day: str) -> Arrow:
     """ Returns arrow date to use """
     if day:
-        date_parts = day.split("-")
-        date_to_use = arrow.get(
-            datetime(int(date_parts[0]), int(date_parts[1]), int(date_parts[2])),
-            'US/Pacific'
+        return _arrow_pacific_midnight(day)
+    return arrow.now('US/Pacific')
+
+
+@lru_cache(maxsize=1024)
+def _arrow_pacific_midnight(day: str) -> Arrow:
+    """ Arrow for the start of the day (Pacific), cached as Arrow objects are immutable """
+    day_date: date = pacific_date(day)
+    return arrow.get(datetime(day_date.year, day_date.month, day_date.day), 'US/Pacific')
+
+
+@lru_cache(maxsize=4096)
+def pacific_date(day: str) -> date:
+    """ Returns the date for a 'YYYY-MM-DD' day string """
+    year, month, day_of_month = day.split('-')
+    return date(int(year), int(month), int(day_of_month))
+
+
+@lru_cache(maxsize=4096)
+def pacific_midnight(day: str) -> int:
+    """ Returns the timestamp of the start of the 'YYYY-MM-DD' day (Pacific) """
+    day_date: date = pacific_date(day)
+    return int(datetime(day_date.year, day_date.month, day_date.day, tzinfo=PACIFIC).timestamp())
+
+
+def shift_day(day: str, days: int) -> str:
+    """ Returns the 'YYYY-MM-DD' day `days` before / after the day """
+    return (pacific_date(day) + timedelta(days=days)).isoformat()
+
+
+class DayBuckets:
+    """
+    Pacific midnight boundaries between two days, so timestamps map to their
+    'YYYY-MM-DD' day with a (vectorized) binary search instead of a timezone conversion.
+    The boundaries come from zoneinfo so the 23 / 25 hour DST days are handled.
+    """
+
+    def __init__(self, start_day: str, end_day: str):
+        """
+        Args:
+            start_day: first day (inclusive) format 'YYYY-MM-DD'
+            end_day: last day (inclusive) format 'YYYY-MM-DD'
+        """
+        self.days: List[str] = []
+        day_date: date = pacific_date(start_day)
+        last_date: date = pacific_date(end_day)
+        while day_date <= last_date:
+            self.days.append(day_date.isoformat())
+            day_date += timedelta(days=1)
+        # midnight of every day plus the end of the last day
+        self.boundaries: np.ndarray = np.array(
+            [pacific_midnight(day) for day in self.days] + [pacific_midnight(day_date.isoformat())],
+            dtype=np.int64
         )
-    else:
-        date_to_use = arrow.now('US/Pacific')
-    return date_to_use
+
+    @classmethod
+    def for_season(cls, season) -> 'DayBuckets':
+        """ Returns the buckets for every day of a `Season` """
+        return cls(season.start_date, season.end_date)
+
+    def day_for_timestamp(self, timestamp: int) -> Optional[str]:
+        """ Returns the day of the timestamp (None if it is outside the buckets) """
+        index: int = int(np.searchsorted(self.boundaries, timestamp, side='right')) - 1
+        if 0 <= index < len(self.days):
+            return self.days[index]
+        return None
+
+    def days_for_timestamps(self, timestamps: Sequence[int]) -> List[Optional[str]]:
+        """ Returns the day of every timestamp (None where it is outside the buckets) """
+        indexes: List[int] = (
+            np.searchsorted(self.boundaries, np.asarray(timestamps, dtype=np.int64), side='right')
+            - 1
+        ).tolist()
+        number_of_days: int = len(self.days)
+        return [self.days[index] if 0 <= index < number_of_days else None for index in indexes]
+
+
+@lru_cache(maxsize=64)
+def _year_buckets(year: int) -> DayBuckets:
+    """ Day buckets for one (Pacific) calendar year """
+    return DayBuckets(f"{year}-01-01", f"{year}-12-31")
+
+
+def pacific_day(timestamp: int) -> str:
+    """ Returns the 'YYYY-MM-DD' day (Pacific) of the timestamp """
+    year: int = datetime.fromtimestamp(timestamp, timezone.utc).year
+    day: Optional[str] = _year_buckets(year).day_for_timestamp(timestamp)
+    if day is None:
+        # the first hours of the UTC year are still the previous year in Pacific
+        day = _year_buckets(year - 1).day_for_timestamp(timestamp)
+    return day
+
+
+def pacific_days(timestamps: Sequence[int]) -> List[str]:
+    """ Returns the 'YYYY-MM-DD' day (Pacific) of every timestamp """
+    if len(timestamps) == 0:
+        return []
+    buckets: DayBuckets = DayBuckets(
+        pacific_day(min(timestamps)), pacific_day(max(timestamps))
+    )
+    return buckets.days_for_timestamps(timestamps)
+
+
+def pacific_time_of_day(timestamp: int) -> str:
+    """ Returns the time of day (Pacific) of the timestamp formatted 'h:mma' (i.e. 3:07pm) """
+    local_time: datetime = datetime.fromtimestamp(int(timestamp), PACIFIC)
+    hour: int = local_time.hour % 12 or 12
+    am_pm: str = 'am' if local_time.hour < 12 else 'pm'
+    return f"{hour}:{local_time.minute:02d}{am_pm}"
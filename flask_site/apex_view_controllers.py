@@ -1,16 +1,23 @@
 """ This module contains all the controllers for each of the views """
-from typing import List, Tuple, Optional
+import copy
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Tuple, Optional, Type, Union
 import json
 from dataclasses import dataclass
 
 import arrow
 import pymongo
 from arrow import Arrow
+from pymongo.errors import OperationFailure
 
+from apex_cache import LRUCache
 from apex_db_helper import ApexDBHelper, filter_game_list
+from apex_game_store import GameStore, ColumnarGameStore
 from models.config import Config
 from models import GameEvent, RankTier, Division, RankedDivisionInfo, Player, Season
-from apex_utilities import players_sorted_by_key
+from models import EventCollection, GameProfile
+from apex_utilities import players_sorted_by_key, competition_ranks, pacific_day, \
+    pacific_midnight
 import plotly.graph_objects as go
 import plotly.utils as ut
 
@@ -22,25 +29,66 @@ class RankedGameDay:
     number_of_games: int
 
 
+@dataclass
+class GroupTotals:
+    """ Number of games and category totals of a day (or a legend on a day) """
+    games: int = 0
+    kills: int = 0
+    wins: int = 0
+    damage: int = 0
+    xp_progress: int = 0
+
+    @classmethod
+    def from_totals(cls, games: int, totals: Dict[str, int]) -> 'GroupTotals':
+        """ From a game store's (number of games, category totals) """
+        return cls(games, totals['kills'], totals['wins'], totals['damage'], totals['xp_progress'])
+
+    def average(self, category: str) -> float:
+        """ Returns the category's average per game """
+        if self.games:
+            return getattr(self, category) / self.games
+        return 0.0
+
+
+@dataclass
+class DaySummary:
+    """ A day's totals and the totals of each legend (by name) played that day """
+    day: str
+    totals: GroupTotals
+    legends: Dict[str, GroupTotals]
+
+
 class BaseGameViewController:
     """ Base controller for all views that deal with games """
+    # `ColumnarGameStore` may be used instead for very large game lists
+    game_store_class: Type[Union[GameStore, ColumnarGameStore]] = GameStore
 
     def __init__(self,
                  db_helper: ApexDBHelper,
                  query_filter: dict,
-                 game_mode: Optional[str] = None):
+                 game_mode: Optional[str] = None,
+                 game_store: Optional[GameStore] = None):
+        self._game_list: List[GameEvent] = []
+        if game_store is not None:
+            # already aggregated, there are no games to load
+            self._game_store = game_store
+            return
+        self._game_list = self._load_games(db_helper, query_filter, game_mode)
+        self._game_store = self.game_store_class(self._game_list)
+
+    @staticmethod
+    def _load_games(db_helper: ApexDBHelper,
+                    query_filter: dict,
+                    game_mode: Optional[str] = None) -> List[GameEvent]:
+        """ Returns the games matching the filter (optionally only one game mode) """
         # we must convert this to a string for the db (for now)
         if query_filter.get('uid'):
             query_filter['uid'] = str(query_filter['uid'])
 
         game_list: List[GameEvent] = db_helper.event_collection.get_games(
-            additional_filter=query_filter
+            additional_filter=query_filter, profile=GameProfile.LEADERBOARD
         )
-        self._game_list: List[GameEvent] = []
-        for game in game_list:
-            if game_mode and game_mode != game.game_mode:
-                continue
-            self._game_list.append(game)
+        return [game for game in game_list if not game_mode or game_mode == game.game_mode]
 
     @property
     def game_list(self):
@@ -49,22 +97,15 @@ class BaseGameViewController:
 
     def games_played(self, uid: int = None, day: str = None, legend: str = None):
         """ Returns a list of games played that day """
-        return filter_game_list(self.game_list, uid=uid, day=day, legend=legend)
+        return self._game_store.games(uid=uid, day=day, legend=legend)
+
+    def game_count(self, uid: int = None, day: str = None, legend: str = None) -> int:
+        """ Returns the number of games played """
+        return self._game_store.count(uid=uid, day=day, legend=legend)
 
     def category_total(self, category: str, day: str = None, uid: int = None, legend: str = None):
         """ Returns a filtered category total """
-        total = 0
-        filtered_list = filter_game_list(
-            self.game_list,
-            uid=uid,
-            day=day,
-            category=category,
-            legend=legend
-        )
-        game: GameEvent
-        for game in filtered_list:
-            total += game.category_total(category)
-        return total
+        return self._game_store.total(category, uid=uid, day=day, legend=legend)
 
     def category_average(
             self,
@@ -74,23 +115,65 @@ class BaseGameViewController:
             legend: str = None
     ) -> float:
         """ Returns the average for the category for a given player """
-        average = 0.0
-        total = self.category_total(category, day=day, uid=uid, legend=legend)
-        num_games = len(self.games_played(uid=uid, day=day, legend=legend))
-        if num_games:
-            average = total / num_games
-
-        return average
+        return self._game_store.average(category, uid=uid, day=day, legend=legend)
 
 
 class IndexViewController(BaseGameViewController):
-    """ Class for performing stats on a set of games """
-
+    """
+    Class for performing stats on a set of games
+    The per-player totals are joined to the current tracked players, so only the game store
+    (see `load_game_store`) may be cached, the view controller is built per request.
+    """
+    # sum the player totals in Mongo, loading every game is the fallback
+    use_aggregation: bool = True
+
+    # pylint: disable=too-many-arguments
     def __init__(self,
                  db_helper: ApexDBHelper,
                  start_timestamp: int,
                  end_timestamp: int,
-                 game_mode: str = None):
+                 game_mode: str = None,
+                 game_store: Optional[GameStore] = None):
+        if game_store is None:
+            game_store = self.load_game_store(db_helper, start_timestamp, end_timestamp,
+                                              game_mode)
+        super().__init__(db_helper, {}, game_mode, game_store)
+        # copies, the totals are set on them below
+        self.tracked_players: List[Player] = [
+            player.copy() for player in db_helper.tracked_players()
+        ]
+
+        for player in self.tracked_players:
+            uid = player.uid
+            player.games_played = self.game_count(uid=uid)
+            player.kills_avg = self.category_average('kills', uid=uid)
+            player.wins = self.category_total('wins', uid=uid)
+            player.damage_avg = self.category_average('damage', uid=uid)
+
+    @classmethod
+    def load_game_store(cls,
+                        db_helper: ApexDBHelper,
+                        start_timestamp: int,
+                        end_timestamp: int,
+                        game_mode: str = None) -> GameStore:
+        """ Returns the store of every player's games (or game totals) in the range """
+        if db_helper.use_daily_player_stats:
+            return GameStore.from_totals(
+                db_helper.daily_player_stats_collection.get_totals(
+                    start_day=pacific_day(start_timestamp),
+                    end_day=pacific_day(end_timestamp - 1),
+                    game_mode=game_mode
+                )
+            )
+        if cls.use_aggregation:
+            try:
+                return GameStore.from_totals(
+                    db_helper.event_collection.get_player_totals(
+                        start_timestamp, end_timestamp, game_mode
+                    )
+                )
+            except OperationFailure as error:
+                db_helper.logger.warning("Aggregating player totals failed: %s", error)
         query_filter: dict = {
             "eventType": "Game",
             "timestamp": {
@@ -98,15 +181,7 @@ class IndexViewController(BaseGameViewController):
                 "$lte": end_timestamp
             }
         }
-        super().__init__(db_helper, query_filter, game_mode)
-        self.tracked_players = db_helper.player_collection.get_tracked_players()
-
-        for player in self.tracked_players:
-            uid = player.uid
-            player.games_played = len(self.games_played(uid=uid))
-            player.kills_avg = self.category_average('kills', uid=uid)
-            player.wins = self.category_total('wins', uid=uid)
-            player.damage_avg = self.category_average('damage', uid=uid)
+        return cls.game_store_class(cls._load_games(db_helper, query_filter, game_mode))
 
     def max_category(self, category: str) -> int:
         """ Returns the maximum category total for the day """
@@ -136,36 +211,120 @@ class IndexViewController(BaseGameViewController):
 
 
 class DayByDayViewController(BaseGameViewController):
-    """ Class for giving player game stats """
-
-    def __init__(self, db_helper: ApexDBHelper, player: Player):
+    """
+    Class for giving player game stats
+    Loads one page of whole days (newest first) before the `before_day` cursor,
+    `next_day` is the cursor of the older days (None on the last page)
+    """
+    # games loaded per page (rounded up to whole days), or days per page from the daily stats
+    page_games: int = 500
+    page_days: int = 30
+
+    def __init__(self, db_helper: ApexDBHelper, player: Player, before_day: Optional[str] = None):
         self.player = player
+        self._db_helper: ApexDBHelper = db_helper
+        self.next_day: Optional[str] = None
         query_filter: dict = {
             "eventType": "Game",
             "uid": str(player.uid)
         }
-        super().__init__(db_helper, query_filter)
-        self._days_played: set = set()
-        for game in self.game_list:
-            self._days_played.add(game.day_of_event)
+        game_list: List[GameEvent] = []
+        if db_helper.use_daily_player_stats:
+            days: List[str] = db_helper.daily_player_stats_collection.get_days(
+                player.uid, before_day=before_day, limit=self.page_days + 1
+            )
+            if len(days) > self.page_days:
+                days = days[:self.page_days]
+                self.next_day = days[-1]
+            totals: List[dict] = []
+            if days:
+                totals = db_helper.daily_player_stats_collection.get_totals(
+                    start_day=days[-1], end_day=days[0], player_uid=player.uid
+                )
+            game_store = GameStore.from_totals(totals)
+        else:
+            game_list = self._load_page(db_helper.event_collection, before_day)
+            game_store = self.game_store_class(game_list)
+        super().__init__(db_helper, query_filter, game_store=game_store)
+        self._game_list = game_list
+        # every day's and legend's totals, newest day first, built once for the template
+        self.day_summaries: List[DaySummary] = []
+        day: str
+        for day, legends in sorted(self._game_store.day_legend_totals().items(), reverse=True):
+            self.day_summaries.append(DaySummary(
+                day=day,
+                totals=GroupTotals.from_totals(*legends[None]),
+                legends={
+                    legend: GroupTotals.from_totals(*legends[legend])
+                    for legend in sorted(legend for legend in legends if legend)
+                }
+            ))
+        self._day_summaries_by_day: Dict[str, DaySummary] = {
+            day_summary.day: day_summary for day_summary in self.day_summaries
+        }
+
+    def _load_page(self, event_collection: EventCollection,
+                   before_day: Optional[str]) -> List[GameEvent]:
+        """ Returns the newest `page_games` games before the day, and the rest of the oldest day """
+        before: Optional[Tuple[int, str]] = None
+        if before_day:
+            before = (pacific_midnight(before_day), str(self.player.uid))
+        game_list: List[GameEvent] = event_collection.get_games_page(
+            self.player.uid, before=before, limit=self.page_games,
+            profile=GameProfile.LEADERBOARD
+        )
+        if len(game_list) == self.page_games:
+            oldest_game: GameEvent = game_list[-1]
+            self.next_day = oldest_game.day_of_event
+            game_list.extend(event_collection.get_games(
+                self.player.uid,
+                additional_filter={'timestamp': {
+                    '$gte': pacific_midnight(self.next_day), '$lt': oldest_game.timestamp
+                }},
+                sort=pymongo.DESCENDING,
+                profile=GameProfile.LEADERBOARD
+            ))
+        return game_list
+
+    def iter_day_summaries(self, max_pages: int = 0) -> Iterator[DaySummary]:
+        """
+        Yields this page's days, then loads the older pages one at a time
+        (so only one page is in memory) up to `max_pages` pages (0 is every page).
+        Afterwards `next_day` is the cursor of the days that were not yielded.
+        """
+        page: DayByDayViewController = self
+        pages: int = 1
+        while True:
+            yield from page.day_summaries
+            self.next_day = page.next_day
+            if not page.next_day or (max_pages and pages >= max_pages):
+                return
+            page = type(self)(self._db_helper, self.player, page.next_day)
+            pages += 1
 
     def days_played(self, reverse: bool = True) -> list:
         """ returns a list of days (format 'YYYY-MM-DD') that the player actually PLAYED a game """
-        return sorted(self._days_played, reverse=reverse)
+        days: List[str] = [day_summary.day for day_summary in self.day_summaries]
+        return days if reverse else days[::-1]
 
     def get_legends_played(self, day: str) -> list:
         """ Returns a list of legends played on a given day """
-        legend_set: set = set()
-        game: GameEvent
-        for game in filter_game_list(self._game_list, category=None, day=day):
-            legend_set.add(game.legend_played)
-        return sorted(legend_set)
+        day_summary: Optional[DaySummary] = self._day_summaries_by_day.get(day)
+        return list(day_summary.legends) if day_summary else []
 
 
 class LeaderboardViewController(IndexViewController):
     """ Class for showing the leaderboard for kills, wins, damage """
-    def __init__(self, db_helper: ApexDBHelper, start_timestamp: int, end_timestamp: int, clan):
-        super().__init__(db_helper, start_timestamp, end_timestamp, game_mode="BR")
+    game_mode: str = "BR"
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, db_helper: ApexDBHelper, start_timestamp: int, end_timestamp: int, clan,
+                 game_store: Optional[GameStore] = None):
+        # each key is sorted and ranked only once
+        self._sorted_players: Dict[str, List[Player]] = {}
+        self._ranks: Dict[str, Dict[int, int]] = {}
+        super().__init__(db_helper, start_timestamp, end_timestamp, game_mode=self.game_mode,
+                         game_store=game_store)
         self.leader_player_list: List[Player] = []
         category_list = ['damage_total', 'kills_total', 'xp_total', 'wins']
         for player in self.tracked_players:
@@ -176,61 +335,95 @@ class LeaderboardViewController(IndexViewController):
             player.xp_total = self.category_total('xp_progress', uid=player.uid)
             player.minute_total = self.category_total('game_length', uid=player.uid)
             self.leader_player_list.append(player)
+        self._leaders_by_uid: Dict[int, Player] = {
+            player.uid: player for player in self.leader_player_list
+        }
 
         for player in self.leader_player_list:
             player.point_total = 0
             for category in category_list:
                 player.point_total += self.points_for_category(category, player.uid)
 
+    def ranks_for_key(self, key: str) -> Dict[int, int]:
+        """ Returns the competition rank (ties share the higher place) of each leader by uid """
+        if key not in self._ranks:
+            self._ranks[key] = competition_ranks(self.players_sorted_by_key(key), key)
+        return self._ranks[key]
+
+    def position(self, key: str, player_uid: int) -> int:
+        """ Returns the player's place on the leaderboard for the key """
+        ranks: Dict[int, int] = self.ranks_for_key(key)
+        if player_uid in ranks:
+            return ranks[player_uid]
+        # players not on the leaderboard share the last place
+        if self.leader_player_list:
+            return ranks[self.players_sorted_by_key(key)[-1].uid]
+        return 0
+
+    def leader(self, player_uid: int) -> Optional[Player]:
+        """ Returns the leaderboard player for the uid (None if not on the leaderboard) """
+        return self._leaders_by_uid.get(player_uid)
+
     def points_for_category(self, category: str, player_uid: int) -> int:
         """ Returns the points for a given category """
-        sorted_players: List[Player] = self.players_sorted_by_key(category)
-        max_points: int = len(sorted_players)
-        position_index: int = 0
-        current_player: Optional[Player] = None
-        for player in sorted_players:
-            if player.uid == player_uid:
-                current_player = player
-                break
-            position_index += 1
-        searching_for_players: bool = True
-        my_total = getattr(current_player, category)
-        if my_total == 0:
+        if not getattr(self._leaders_by_uid[player_uid], category):
             return 0
-        while position_index and searching_for_players:
-            player_above = sorted_players[position_index-1]
-            player_above_total = getattr(player_above, category)
-            if my_total == player_above_total:
-                position_index -= 1
-            else:
-                searching_for_players = False
-        return max_points - position_index
+        return len(self.leader_player_list) - self.ranks_for_key(category)[player_uid] + 1
 
     def players_sorted_by_key(self, key: str) -> List[Player]:
         """ Wrapper for utility function """
-        return players_sorted_by_key(self.leader_player_list, key)
+        if key not in self._sorted_players:
+            self._sorted_players[key] = players_sorted_by_key(self.leader_player_list, key)
+        return self._sorted_players[key]
 
 
 class DayDetailViewController:
-    """ View Controller for the Day Detail """
-
-    def __init__(self, db_helper: ApexDBHelper, player: Player, day: Arrow):
-        self.player = player
-        starting_timestamp = day.floor('day').int_timestamp
-        ending_timestamp = day.shift(days=+1).floor('day').int_timestamp
-        self.leaderboard_view_controller: LeaderboardViewController = LeaderboardViewController(
-            db_helper=db_helper,
-            start_timestamp=starting_timestamp,
-            end_timestamp=ending_timestamp,
-            clan=None
-        )
+    """
+    View Controller for the Day Detail
+    Only keeps the player's uid, so one controller (cached) can be rendered for any request.
+    The leaderboard shows the current players, a cached controller is rendered
+    `with_leaderboard` the request's own.
+    """
+
+    def __init__(self, db_helper: ApexDBHelper, player: Player, day: Arrow,
+                 leaderboard_view_controller: Optional[LeaderboardViewController] = None):
+        self.player_uid: int = player.uid
+        if leaderboard_view_controller is None:
+            leaderboard_view_controller = LeaderboardViewController(
+                db_helper=db_helper,
+                start_timestamp=day.floor('day').int_timestamp,
+                end_timestamp=day.shift(days=+1).floor('day').int_timestamp,
+                clan=None
+            )
+        self.leaderboard_view_controller: LeaderboardViewController = leaderboard_view_controller
         start_day = day.format('YYYY-MM-DD')
         end_day = day.shift(days=+1).format('YYYY-MM-DD')
         self.all_games: List[GameEvent] = db_helper.event_collection.get_games(
-            start_end_day=(start_day, end_day), sort=pymongo.DESCENDING
+            start_end_day=(start_day, end_day), sort=pymongo.DESCENDING,
+            profile=GameProfile.DAY_DETAIL
         )
         self.games: List[GameEvent] = filter_game_list(self.all_games, uid=player.uid)
-        self.player.minute_total = self.category_total('game_length')
+        # the day's games sorted by time (and original position) for the squad window
+        self._games_by_time: List[Tuple[int, int, GameEvent]] = sorted(
+            (game.timestamp, index, game) for index, game in enumerate(self.all_games)
+        )
+        self._timestamps: List[int] = [timestamp for timestamp, _, _ in self._games_by_time]
+        self._squads: Dict[Tuple[str, int], List[GameEvent]] = {
+            (game.uid, game.timestamp): self._find_squad_games(game) for game in self.games
+        }
+
+    def with_leaderboard(self,
+                         leaderboard_view_controller: LeaderboardViewController
+                         ) -> 'DayDetailViewController':
+        """ Returns a copy (sharing the games) showing the leaderboard """
+        view_controller: DayDetailViewController = copy.copy(self)
+        view_controller.leaderboard_view_controller = leaderboard_view_controller
+        return view_controller
+
+    @property
+    def minute_total(self) -> int:
+        """ The player's minutes played on the day """
+        return self.category_total('game_length')
 
     def category_total(self, category: str) -> int:
         """ Returns the category total """
@@ -249,7 +442,7 @@ class DayDetailViewController:
     def avg_time_played(self):
         """ Returns the average time played in minutes / seconds """
         return_string: str = ""
-        total_time = self.player.minute_total
+        total_time = self.minute_total
         if len(self.games) > 0:
             avg_minutes: float = total_time / len(self.games)
             avg_seconds = avg_minutes * 60
@@ -278,29 +471,37 @@ class DayDetailViewController:
 
     def find_games_near_mine(self, in_game: GameEvent) -> List[GameEvent]:
         """Find games that might be people I played with """
-        games_found: List[GameEvent] = []
+        squad: Optional[List[GameEvent]] = self._squads.get((in_game.uid, in_game.timestamp))
+        if squad is None:
+            squad = self._find_squad_games(in_game)
+        return squad
+
+    def _find_squad_games(self, in_game: GameEvent) -> List[GameEvent]:
+        """ Searches the games within the timestamp window for other squad members """
         gt_padding = 10
         gl_padding = 1
-        gt_range = range(in_game.timestamp-gt_padding, in_game.timestamp+gt_padding+1)
-        gl_range = range(in_game.game_length-gl_padding, in_game.game_length+gl_padding+1)
-        for game in self.all_games:
+        first: int = bisect_left(self._timestamps, in_game.timestamp - gt_padding)
+        last: int = bisect_right(self._timestamps, in_game.timestamp + gt_padding)
+        games_found: List[Tuple[int, GameEvent]] = []
+        for _, index, game in self._games_by_time[first:last]:
             if game.uid != in_game.uid:
                 if game.is_ranked_game == in_game.is_ranked_game and \
-                        game.timestamp in gt_range and game.game_length in gl_range:
-                    games_found.append(game)
-        return games_found
+                        abs(game.game_length - in_game.game_length) <= gl_padding:
+                    games_found.append((index, game))
+        # keep the order of `all_games`
+        return [game for _, game in sorted(games_found, key=lambda found: found[0])]
 
     def total_time_played(self) -> str:
         """ Returns a formatted string for the total time played """
-        total_time = self.player.minute_total
+        total_time = self.minute_total
         hours, minutes = divmod(total_time, 60)
         return f"{hours}h {minutes}m"
 
-    def leaderboard_points(self, key: str = 'point_total') -> int:
+    def leaderboard_points(self) -> int:
         """ Returns the player's point total for the day """
-        for player in self.leaderboard_view_controller.players_sorted_by_key(key):
-            if player.name == self.player.name:
-                return player.point_total
+        player: Optional[Player] = self.leaderboard_view_controller.leader(self.player_uid)
+        if player:
+            return player.point_total
         return 0
 
     def leaderboard_place(self) -> str:
@@ -319,20 +520,7 @@ class DayDetailViewController:
 
     def leaderboard_position(self, key: str = 'point_total') -> int:
         """ Returns the string of the placement on the leaderboard """
-
-        index: int = 0
-        place: int = 0
-        previous_key_total: int = -1
-        for player in self.leaderboard_view_controller.players_sorted_by_key(key):
-            index += 1
-            key_total: int = int(getattr(player, key))
-            if key_total != previous_key_total:
-                place = index
-            if player.name == self.player.name:
-                break
-            previous_key_total = key_total
-
-        return place
+        return self.leaderboard_view_controller.position(key, self.player_uid)
 
     def leaderboard_player_count(self) -> int:
         """ Returns the number of players on the leaderboard """
@@ -341,14 +529,27 @@ class DayDetailViewController:
 
 class ProfileViewController:
     """ View controller for the player detail page """
+    # layouts only change with the config / season, traces only with a new ranked game
+    _ranked_layout_cache: LRUCache = LRUCache(max_size=32)
+    _ranked_trace_cache: LRUCache = LRUCache(max_size=256)
+
     def __init__(self, db_helper: ApexDBHelper, player: Player):
         self.player = player
         self._config = db_helper.config
+        self._event_collection: EventCollection = db_helper.event_collection
         self.season: Season = db_helper.season_collection.get_current_season()
-        self._ranked_games = db_helper.event_collection.get_ranked_games(
-            season=self.season,
-            player_uid=self.player.uid
-        )
+        self._ranked_games: Optional[List[GameEvent]] = None
+
+    @property
+    def ranked_games(self) -> List[GameEvent]:
+        """ The player's ranked games this season (loaded on first use) """
+        if self._ranked_games is None:
+            self._ranked_games = self._event_collection.get_ranked_games(
+                season=self.season,
+                player_uid=self.player.uid,
+                profile=GameProfile.RANKED_PLOT
+            )
+        return self._ranked_games
 
     def get_platform_logo(self) -> str:
         """ Return friendly version of the player's platform"""
@@ -369,10 +570,11 @@ class ProfileViewController:
         rank_info: RankedGameDay
         prev_rank: int = 0
         distance_to_next: int = 0
-        for day, rank_info in rank_dict.items():
-            rank_tier: RankTier = self._config.get_rank_div_tier_for_points(
-                rank_info.end_of_day_score
-            )
+        rank_tiers: List[Optional[RankTier]] = self._config.get_rank_div_tiers_for_points(
+            [rank_info.end_of_day_score for rank_info in rank_dict.values()]
+        )
+        rank_tier: RankTier
+        for (day, rank_info), rank_tier in zip(rank_dict.items(), rank_tiers):
             distance_token: str = '🟢'
             distance_from_prev: int = rank_info.end_of_day_score - prev_rank
             if distance_from_prev < 0:
@@ -396,7 +598,7 @@ class ProfileViewController:
         rank_dict: dict = {}
         game_count: int = 0
         ranked_game: GameEvent
-        for ranked_game in self._ranked_games:
+        for ranked_game in self.ranked_games:
             date: str = ranked_game.day_of_event
             score: int = int(ranked_game.current_rank_score)
             if not rank_dict.get(date):
@@ -452,16 +654,23 @@ class ProfileViewController:
                 y=1.1
             )
 
-    def ranked_plot(self):
-        """ Create a spline smoothed chart """
-        x_axis, y_axis, text_list = self.get_ranked_plot_data()
-        fig = go.Figure()
-        self.add_rank_bands_to_fig(fig)
-        fig.add_trace(go.Scatter(x=x_axis, y=y_axis, name="spline",
-                                 text=text_list))
-        fig.update_traces(hovertemplate=None)
-        fig.update_layout(hovermode="x unified")
-        fig.update_layout(hoverlabel=dict(font_color='black', bgcolor='wheat'))
+    def ranked_plot(self) -> str:
+        """ Create a spline smoothed chart (JSON) """
+        latest_timestamp: int = self._event_collection.get_latest_ranked_game_timestamp(
+            player_uid=self.player.uid, season=self.season
+        )
+        trace_json, y_range = self._ranked_trace_cache.get_or_set(
+            (self.player.uid, self.season.season_number, latest_timestamp),
+            self.ranked_trace_json
+        )
+        layout_json: str = self._ranked_layout_cache.get_or_set(
+            (self.season.json(), self._config.ranked_division_info.json(), y_range),
+            lambda: self.ranked_layout_json(y_range)
+        )
+        return '{"data": [' + trace_json + '], "layout": ' + layout_json + '}'
+
+    def ranked_tick_values(self) -> Tuple[list, list]:
+        """ Returns the y axis tick values and text (one per division) """
         # initialize with bottom value
         y_tick_value: int = 0
         tick_values: list = [y_tick_value]
@@ -471,6 +680,14 @@ class ProfileViewController:
             y_tick_value = y_tick_value + (division.rp_between_tiers * 4)
             tick_values.append(y_tick_value - 1)
             tick_text.append(division.name)
+        return tick_values, tick_text
+
+    def ranked_trace_json(self) -> Tuple[str, Tuple[int, int]]:
+        """ Returns the JSON of the player's ranked trace and the y axis range to show it """
+        x_axis, y_axis, text_list = self.get_ranked_plot_data()
+        trace = go.Scatter(x=x_axis, y=y_axis, name="spline", text=text_list)
+        trace.update(hovertemplate=None)
+        tick_values, _ = self.ranked_tick_values()
         max_y = 10000
         min_y = 0
         if y_axis:
@@ -486,21 +703,29 @@ class ProfileViewController:
                     new_max_y = value
             max_y = new_max_y
             min_y = new_min_y
+        return json.dumps(trace, cls=ut.PlotlyJSONEncoder), (min_y, max_y)
 
+    def ranked_layout_json(self, y_range: Tuple[int, int]) -> str:
+        """ Returns the JSON of the chart layout (rank bands, split line and axis) """
+        fig = go.Figure()
+        self.add_rank_bands_to_fig(fig)
+        fig.update_layout(hovermode="x unified")
+        fig.update_layout(hoverlabel=dict(font_color='black', bgcolor='wheat'))
+        tick_values, tick_text = self.ranked_tick_values()
         fig.update_layout(
             template="plotly_dark",
             legend=dict(y=0.5, traceorder='reversed', font_size=16),
-            yaxis_range=[min_y, max_y],
+            yaxis_range=list(y_range),
             yaxis=dict(tickvals=tick_values, ticktext=tick_text, tickmode='array')
         )
-        return json.dumps(fig, cls=ut.PlotlyJSONEncoder)
+        return json.dumps(fig.layout, cls=ut.PlotlyJSONEncoder)
 
 
 class BattlePassViewController:
     """ View controller for the battlepass page """
 
     def __init__(self, db_helper: ApexDBHelper):
-        self.tracked_players: List[Player] = db_helper.player_collection.get_tracked_players()
+        self.tracked_players: List[Player] = list(db_helper.tracked_players())
         self.config: Config = db_helper.config
         self.season: Season = db_helper.season_collection.get_current_season()
         self.battlepass_data: dict = {}
@@ -529,9 +754,9 @@ class ClaimProfileViewController:
         self.player_collection = db_helper.player_collection
         player: Player
         self.tracked_players: List[Player] = []
-        for player in self.player_collection.get_tracked_players():
+        for player in db_helper.tracked_players():
             if not player.discord_id:
-                self.tracked_players.append(player)
+                self.tracked_players.append(player.copy())
         self.tracked_players = players_sorted_by_key(self.tracked_players, 'name')
 
     def claim_profile_with_discord_id(self, player_uid: int, discord_id: int):
@@ -1,15 +1,21 @@
 """ Flask application for Apex Legends API Tracker """
 import os
-from typing import Optional, Tuple
+from functools import partial
+from typing import Iterator, Optional, Tuple
 
-from flask import Flask, redirect, url_for, render_template, \
-    abort, send_from_directory, request, session
-from flask_profile import Profiler
+from flask import Flask, redirect, url_for, render_template as flask_render_template, \
+    abort, send_from_directory, request, session, jsonify, Response, stream_with_context
+from jinja2.environment import Template, TemplateStream
 from flask_discord import DiscordOAuth2Session, requires_authorization, Unauthorized
 
 from apex_api_helper import ApexAPIHelper
+from apex_cache import ViewModelCache
 from apex_db_helper import ApexDBHelper
-from apex_utilities import get_arrow_date_prev_next_date_to_use
+from apex_game_store import GameStore
+import apex_timing
+from apex_json_api import BadCursorException, decode_cursor, games_page_json, \
+    leaderboard_json, strong_etag
+from apex_utilities import get_arrow_date_prev_next_date_to_use, pacific_date
 from apex_view_controllers import IndexViewController, \
     DayByDayViewController, ProfileViewController, BattlePassViewController, \
     ClaimProfileViewController, DayDetailViewController, LeaderboardViewController
@@ -18,6 +24,9 @@ from models import Player
 from instance.config import get_config
 config = get_config(os.getenv('FLASK_ENV'))
 
+API_PAGE_SIZE: int = 100
+API_MAX_PAGE_SIZE: int = 500
+
 # timeout in seconds * minutes
 seconds_in_one_day: int = 60*60*24
 days_for_timeout: int = 14
@@ -33,15 +42,59 @@ os.environ['DISCORD_REDIRECT_URI'] = config.DISCORD_REDIRECT_URI
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = config.OAUTHLIB_INSECURE_TRANSPORT
 discord = DiscordOAuth2Session(app)
 
+# fraction of requests timed (0 turns timing off), i.e. 0.01
+TIMING_SAMPLE_RATE: float = getattr(config, 'TIMING_SAMPLE_RATE', 0.0)
+# serves /internal/metrics (to anyone who can reach the site, keep it off on a public site)
+INTERNAL_METRICS_ENABLED: bool = getattr(config, 'INTERNAL_METRICS_ENABLED', False)
+if TIMING_SAMPLE_RATE > 0:
+    # before the first MongoClient is created
+    apex_timing.install_mongo_listener()
+timing_stats = apex_timing.TimingStats(max_samples=getattr(config, 'TIMING_MAX_SAMPLES', 1000))
+
 apex_api_helper = ApexAPIHelper()
-apex_db_helper = ApexDBHelper()
-Profiler(app)
-app.config["flask_profiler"] = {
-    "storage": {
-        "engine": "mongodb",
-    },
-    "profile_dir": "/Users/johnsturgeon/Code/apex-legends-tracker/log"
-}
+apex_db_helper = ApexDBHelper(
+    player_cache_ttl=getattr(config, 'PLAYER_CACHE_TTL', 60.0),
+    player_registry=getattr(config, 'PLAYER_REGISTRY', True)
+)
+view_model_cache = ViewModelCache(
+    apex_db_helper.event_collection,
+    max_size=getattr(config, 'VIEW_CACHE_SIZE', 128),
+    today_ttl=getattr(config, 'VIEW_CACHE_TODAY_TTL', 300.0),
+    past_ttl=getattr(config, 'VIEW_CACHE_PAST_TTL', None)
+)
+
+
+def leaderboard_view_controller(start_timestamp: int, end_timestamp: int,
+                                clan: Optional[str]) -> LeaderboardViewController:
+    """ The leaderboard of the current players, from the (cached) game totals of the range """
+    game_store: GameStore = view_model_cache.get(
+        'leaderboard', (), start_timestamp, end_timestamp,
+        lambda: LeaderboardViewController.load_game_store(
+            apex_db_helper, start_timestamp, end_timestamp, LeaderboardViewController.game_mode
+        )
+    )
+    return LeaderboardViewController(
+        db_helper=apex_db_helper,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+        clan=clan,
+        game_store=game_store
+    )
+
+
+def render_template(template_name: str, **context) -> str:
+    """ Flask's `render_template`, timed as the request's 'render' phase """
+    with apex_timing.span('render'):
+        return flask_render_template(template_name, **context)
+
+
+def stream_template(template_name: str, **context) -> Iterator[str]:
+    """ Like `render_template`, but renders the template in chunks as the response is sent """
+    app.update_template_context(context)
+    template: Template = app.jinja_env.get_template(template_name)
+    stream: TemplateStream = template.stream(context)
+    stream.enable_buffering(16)
+    return apex_timing.timed_iterator('render', stream)
 
 
 def get_player_from_session() -> Optional[Player]:
@@ -64,11 +117,21 @@ def get_player_from_cookie() -> Optional[Player]:
     return None
 
 
+def get_discord_user_id() -> Optional[int]:
+    """ Returns the logged in discord user's id, fetched from discord once per session """
+    discord_user_id: Optional[int] = session.get('discord_user_id')
+    if discord_user_id is None:
+        discord_user = discord.fetch_user()
+        if discord_user:
+            discord_user_id = session['discord_user_id'] = discord_user.id
+    return discord_user_id
+
+
 def get_player_from_discord_login() -> Optional[Player]:
     """ Returns the currently logged in player, None if not logged in """
-    discord_user = discord.fetch_user()
-    if discord_user:
-        return apex_db_helper.player_collection.get_player_by_discord_id(discord_user.id)
+    discord_user_id: Optional[int] = get_discord_user_id()
+    if discord_user_id:
+        return apex_db_helper.player_collection.get_player_by_discord_id(discord_user_id)
 
     return None
 
@@ -76,6 +139,7 @@ def get_player_from_discord_login() -> Optional[Player]:
 @app.before_request
 def before_request():
     """ This runs before every single request to check for maintenance mode """
+    apex_timing.start_request(TIMING_SAMPLE_RATE)
     if not get_player_from_session():
         player: Player = get_player_from_cookie()
         if player:
@@ -97,10 +161,22 @@ def after_request(response):
             player = get_player_from_discord_login()
     if player:
         response.set_cookie('discord_id', str(player.discord_id), max_age=COOKIE_TIME_OUT)
+    timing: Optional[apex_timing.RequestTiming] = apex_timing.current_timing()
+    if timing:
+        # a streamed page only has the time until it starts sending
+        response.headers['Server-Timing'] = timing.server_timing()
+        response.call_on_close(partial(record_request_timing, request.endpoint))
 
     return response
 
 
+def record_request_timing(endpoint: Optional[str]):
+    """ Saves the timing of a request once its response is sent (streamed pages included) """
+    timing: Optional[apex_timing.RequestTiming] = apex_timing.finish_request()
+    if timing and endpoint:
+        timing_stats.record(endpoint, timing)
+
+
 @app.errorhandler(503)
 def under_maintenance(_):
     """ Render the default maintenance page """
@@ -118,6 +194,7 @@ def favicon():
 def callback():
     """ discord callback url """
     discord.callback()
+    session.pop('discord_user_id', None)
     player: Player = get_player_from_discord_login()
     if player is None:
         return redirect(url_for("claim_profile"))
@@ -165,6 +242,7 @@ def logout():
     """ get and pop the discord session """
     if session.get('player'):
         session.pop('player')
+    session.pop('discord_user_id', None)
     session['clear_discord_id'] = "YES"
     return redirect(url_for('index'))
 
@@ -177,9 +255,16 @@ def index(day: str, sort_key: str):
     date_to_use, prev_day, next_day, new_day = get_arrow_date_prev_next_date_to_use(day)
     starting_timestamp = date_to_use.floor('day').int_timestamp
     ending_timestamp = date_to_use.shift(days=+1).floor('day').int_timestamp
-    index_view_controller = IndexViewController(
-        apex_db_helper, starting_timestamp, ending_timestamp
-    )
+    with apex_timing.span('compute'):
+        game_store: GameStore = view_model_cache.get(
+            'index', (), starting_timestamp, ending_timestamp,
+            lambda: IndexViewController.load_game_store(
+                apex_db_helper, starting_timestamp, ending_timestamp
+            )
+        )
+        index_view_controller = IndexViewController(
+            apex_db_helper, starting_timestamp, ending_timestamp, game_store=game_store
+        )
     return render_template(
         'index.html',
         day=new_day,
@@ -195,14 +280,22 @@ def index(day: str, sort_key: str):
 def day_by_day():
     """ List of player matches and some detail / day """
     player, is_not_me = get_player_for_view(request.args.get('player_uid'))
+    before_day: Optional[str] = request.args.get('before')
+    if before_day:
+        try:
+            pacific_date(before_day)
+        except ValueError:
+            abort(400)
 
-    view_controller = DayByDayViewController(apex_db_helper, player=player)
+    view_controller = DayByDayViewController(apex_db_helper, player=player, before_day=before_day)
 
-    return render_template(
+    # the first days are sent while the older ones load
+    return Response(stream_with_context(stream_template(
         'day_by_day.html',
         view_controller=view_controller,
-        is_not_me=is_not_me
-    )
+        is_not_me=is_not_me,
+        max_pages=getattr(config, 'DAY_BY_DAY_STREAM_PAGES', 10)
+    )))
 
 
 @app.route('/day_detail')
@@ -212,11 +305,22 @@ def day_detail():
     date_to_use, prev_day, next_day, new_day = get_arrow_date_prev_next_date_to_use(day)
     player, is_not_me = get_player_for_view(request.args.get('player_uid'))
 
-    view_controller = DayDetailViewController(apex_db_helper, player=player, day=date_to_use)
+    starting_timestamp = date_to_use.floor('day').int_timestamp
+    ending_timestamp = date_to_use.shift(days=+1).floor('day').int_timestamp
+    with apex_timing.span('compute'):
+        leaderboard_controller = leaderboard_view_controller(
+            starting_timestamp, ending_timestamp, clan=None
+        )
+        view_controller = view_model_cache.get(
+            'day_detail', (player.uid,), starting_timestamp, ending_timestamp,
+            lambda: DayDetailViewController(apex_db_helper, player=player, day=date_to_use,
+                                            leaderboard_view_controller=leaderboard_controller)
+        ).with_leaderboard(leaderboard_controller)
 
     return render_template(
         'day_detail.html',
         view_controller=view_controller,
+        player=player,
         is_not_me=is_not_me,
         day=new_day,
         next_day=next_day,
@@ -229,10 +333,11 @@ def profile():
     """ Simple player profile page """
     player, is_not_me = get_player_for_view(request.args.get('player_uid'))
 
-    view_controller = ProfileViewController(
-        db_helper=apex_db_helper,
-        player=player
-    )
+    with apex_timing.span('compute'):
+        view_controller = ProfileViewController(
+            db_helper=apex_db_helper,
+            player=player
+        )
     return render_template(
         'profile.html',
         view_controller=view_controller,
@@ -243,7 +348,8 @@ def profile():
 @app.route('/battlepass/')
 def battlepass():
     """ Battle pass page """
-    view_controller = BattlePassViewController(db_helper=apex_db_helper)
+    with apex_timing.span('compute'):
+        view_controller = BattlePassViewController(db_helper=apex_db_helper)
     return render_template(
         'battlepass.html',
         view_controller=view_controller
@@ -284,12 +390,8 @@ def leaderboard():
     starting_timestamp = date_to_use.floor('day').int_timestamp
     ending_timestamp = date_to_use.shift(days=+1).floor('day').int_timestamp
 
-    view_controller = LeaderboardViewController(
-        db_helper=apex_db_helper,
-        start_timestamp=starting_timestamp,
-        end_timestamp=ending_timestamp,
-        clan=clan
-    )
+    with apex_timing.span('compute'):
+        view_controller = leaderboard_view_controller(starting_timestamp, ending_timestamp, clan)
     return render_template(
         'leaderboard.html',
         day=new_day,
@@ -301,5 +403,82 @@ def leaderboard():
     )
 
 
+def json_response(payload: dict, etag: str) -> Response:
+    """ JSON response with a strong ETag, clients must revalidate before reusing it """
+    response: Response = jsonify(payload)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified_response(etag: str) -> Response:
+    """ Empty 304 response for a client that already has the data """
+    response: Response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route('/api/v1/games')
+def api_games():
+    """ Games newest first, paged with the 'next_cursor' of the previous page """
+    player_uid: int = request.args.get('player_uid', default=0, type=int)
+    limit: int = request.args.get('limit', default=API_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), API_MAX_PAGE_SIZE)
+    cursor: Optional[str] = request.args.get('cursor')
+    before: Optional[Tuple[int, str]] = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except BadCursorException:
+            abort(400)
+    page_version: tuple = apex_db_helper.event_collection.get_games_page_version(
+        player_uid, before, limit
+    )
+    etag: str = strong_etag('games', player_uid, cursor, limit, page_version)
+    if request.if_none_match.contains(etag):
+        return not_modified_response(etag)
+    game_list = apex_db_helper.event_collection.get_games_page(player_uid, before, limit)
+    with apex_timing.span('compute'):
+        payload: dict = games_page_json(game_list, limit)
+    return json_response(payload, etag)
+
+
+@app.route('/api/v1/leaderboard')
+def api_leaderboard():
+    """ The leaderboard for a day (default today) as JSON """
+    clan: Optional[str] = request.args.get('clan')
+    try:
+        date_to_use = get_arrow_date_prev_next_date_to_use(request.args.get('day'))[0]
+    except ValueError:
+        abort(400)
+    day: str = date_to_use.date().isoformat()
+    starting_timestamp = date_to_use.floor('day').int_timestamp
+    ending_timestamp = date_to_use.shift(days=+1).floor('day').int_timestamp
+    data_version: Tuple[int, int] = apex_db_helper.event_collection.get_data_version(
+        start_timestamp=starting_timestamp, end_timestamp=ending_timestamp
+    )
+    # the players' names and clans are in the payload too
+    etag: str = strong_etag('leaderboard', day, clan, data_version,
+                            apex_db_helper.tracked_players_version())
+    if request.if_none_match.contains(etag):
+        return not_modified_response(etag)
+    with apex_timing.span('compute'):
+        view_controller = leaderboard_view_controller(starting_timestamp, ending_timestamp, clan)
+    return json_response(leaderboard_json(view_controller, day, clan), etag)
+
+
+@app.route('/internal/metrics')
+def internal_metrics():
+    """ p50 / p95 / p99 milliseconds per route and phase, from this worker's sampled requests """
+    if not INTERNAL_METRICS_ENABLED:
+        abort(404)
+    return jsonify({
+        'sample_rate': TIMING_SAMPLE_RATE,
+        'pid': os.getpid(),
+        'routes': timing_stats.summary(),
+    })
+
+
 if __name__ == '__main__':
     app.run()
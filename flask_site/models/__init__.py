@@ -2,7 +2,7 @@
 # pylint: disable=import-error
 from .config import Config, RankedDivisionInfo, ConfigCollection, RankTier, Division
 from .base_db_model import BaseDBModel
-from .event import GameEvent, EventCollection
+from .event import GameEvent, GameProfile, EventCollection
 from .player import Player, PlayerCollection, BadDictException
 from .tracker_info import TrackerInfo, TrackerInfoCollection
 from .season import SeasonCollection, Season
@@ -10,14 +10,17 @@ from .respawn_cdata import CDataCollection
 from .respawn_record import RespawnRecordCollection, RespawnRecord, RespawnLegend
 from .respawn_ingestion_task import RespawnIngestionTaskCollection
 from .respawn_event import RespawnEvent
+from .daily_player_stats import DailyPlayerStatsCollection
 __all__ = [
     'BadDictException',
     'BaseDBModel',
     'Config',
     'ConfigCollection',
+    'DailyPlayerStatsCollection',
     'Division',
     'EventCollection',
     'GameEvent',
+    'GameProfile',
     'Player',
     'PlayerCollection',
     'RankTier',
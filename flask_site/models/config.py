@@ -1,7 +1,9 @@
 """ Data model for the apex_info collection """
-from typing import List, Optional
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, PrivateAttr
 
 
 # pylint: disable=missing-class-docstring
@@ -10,6 +12,9 @@ class RankTier(BaseModel):
     tier: str
     distance_to_next: int
 
+    class Config:
+        frozen = True
+
 
 class Division(BaseModel):
     name: str
@@ -26,6 +31,40 @@ class Config(BaseModel):
     ranked_division_info: RankedDivisionInfo
     battlepass_goal: int
 
+    # upper RP bound (exclusive) and (division, tier) of every tier, lowest first
+    _tier_upper_rp: List[int] = PrivateAttr(default_factory=list)
+    _tier_names: List[Tuple[str, str]] = PrivateAttr(default_factory=list)
+    # shared (immutable) RankTier for each score looked up
+    _rank_tiers: Dict[int, RankTier] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._build_rank_table()
+
+    def _build_rank_table(self):
+        """ Precompute the cumulative RP thresholds of the ranked divisions / tiers """
+        upper_rp: int = 0
+        for division in self.ranked_division_info.divisions:
+            for tier in self.ranked_division_info.tiers:
+                upper_rp += division.rp_between_tiers
+                self._tier_upper_rp.append(upper_rp)
+                self._tier_names.append((division.name, tier))
+
+    def _rank_tier(self, tier_index: int, rank_points: int) -> Optional[RankTier]:
+        """ Returns the RankTier for a score in the tier at `tier_index` """
+        if rank_points < 0 or tier_index >= len(self._tier_upper_rp):
+            return None
+        rank_tier: Optional[RankTier] = self._rank_tiers.get(rank_points)
+        if rank_tier is None:
+            division, tier = self._tier_names[tier_index]
+            rank_tier = RankTier.construct(
+                division=division,
+                tier=tier,
+                distance_to_next=self._tier_upper_rp[tier_index] - rank_points
+            )
+            self._rank_tiers[rank_points] = rank_tier
+        return rank_tier
+
     def get_rank_div_tier_for_points(self, rank_points: int) -> Optional[RankTier]:
         """
         Get the RankTier for a given score
@@ -36,18 +75,33 @@ class Config(BaseModel):
             RankTier (i.e. 'Platinum', 'IV')
 
         """
-        lower_rp: int = 0
-        for division in self.ranked_division_info.divisions:
-            tier_index = 1
-            for tier in self.ranked_division_info.tiers:
-                upper_rp = lower_rp + division.rp_between_tiers
-                if rank_points in range(lower_rp, upper_rp):
-                    to_next = upper_rp - rank_points
-                    return RankTier(tier=tier, division=division.name, distance_to_next=to_next)
-                tier_index += 1
-                lower_rp = upper_rp
-
-        return None
+        rank_tier: Optional[RankTier] = self._rank_tiers.get(rank_points)
+        if rank_tier is not None:
+            return rank_tier
+        return self._rank_tier(bisect_right(self._tier_upper_rp, rank_points), rank_points)
+
+    def get_rank_div_tiers_for_points(self,
+                                      rank_points_list: Sequence[int]
+                                      ) -> List[Optional[RankTier]]:
+        """
+        Get the RankTier for each score (i.e. a whole season of end of day scores)
+        Args:
+            rank_points_list (): Ranking Points
+
+        Returns:
+            list of RankTier (None where the score is out of range)
+
+        """
+        tier_indexes: List[int] = np.searchsorted(
+            self._tier_upper_rp, rank_points_list, side='right'
+        ).tolist()
+        rank_tier_list: List[Optional[RankTier]] = []
+        for tier_index, rank_points in zip(tier_indexes, rank_points_list):
+            rank_tier: Optional[RankTier] = self._rank_tiers.get(rank_points)
+            if rank_tier is None:
+                rank_tier = self._rank_tier(tier_index, int(rank_points))
+            rank_tier_list.append(rank_tier)
+        return rank_tier_list
 
 
 class ConfigCollection:
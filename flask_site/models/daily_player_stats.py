@@ -0,0 +1,142 @@
+""" Collection of daily per-player game totals (rolled up as the games are saved) """
+from typing import Dict, List, Optional, Tuple
+
+import pymongo
+import pymongo.database
+
+from models.event import GameEvent, GameProfile, EventCollection
+from models.tracker_info import GameMode
+
+# totals kept for each (uid, day, game_mode, legend), named after the `GameEvent` category
+STAT_CATEGORIES: Tuple[str, ...] = (
+    'kills', 'wins', 'damage', 'xp_progress', 'game_length', 'rank_score_change'
+)
+
+
+def stats_key(game: GameEvent) -> dict:
+    """ Returns the rollup key for a game """
+    return {
+        'uid': int(game.uid),
+        'day': game.day_of_event,
+        'game_mode': GameMode(game.game_mode).value if game.game_mode else None,
+        'legend': game.legend_played
+    }
+
+
+def stats_increment(game: GameEvent) -> dict:
+    """ Returns the totals one game adds to its rollup """
+    increment: Dict[str, int] = {'games': 1}
+    for category in STAT_CATEGORIES:
+        increment[category] = game.category_total(category)
+    return increment
+
+
+class DailyPlayerStatsCollection:
+    """
+    Collection object for `daily_player_stats`
+    One record per (uid, Pacific day, game_mode, legend) with the number of games and
+    the total of each category ('game_length' is minutes, 'rank_score_change' is RP)
+    """
+    def __init__(self, database: pymongo.database.Database):
+        self._collection: pymongo.collection.Collection = database.daily_player_stats
+
+    def add_game(self, game: GameEvent):
+        """ Adds one newly saved game to its daily totals """
+        self._collection.update_one(
+            filter=stats_key(game),
+            update={'$inc': stats_increment(game)},
+            upsert=True
+        )
+
+    def rebuild(self, event_collection: EventCollection, player_uid: int = 0) -> int:
+        """
+        Rebuilds the daily totals from the saved games.
+        Run it with the event scraper stopped: a game `add_game` counts while the games are
+        read can be lost, or counted twice (`bin/backfill_daily_player_stats.py` checks).
+        Args:
+            event_collection: source of the games
+            player_uid: only rebuild this player (default all players)
+
+        Returns:
+            number of daily records written
+        """
+        rollup: Dict[tuple, dict] = {}
+        for game in event_collection.get_games(player_uid=player_uid,
+                                               profile=GameProfile.LEADERBOARD):
+            key: dict = stats_key(game)
+            record: Optional[dict] = rollup.get(tuple(key.values()))
+            if record is None:
+                rollup[tuple(key.values())] = {**key, **stats_increment(game)}
+                continue
+            for category, value in stats_increment(game).items():
+                record[category] += value
+
+        self._collection.delete_many(self._totals_query_filter(player_uid=player_uid))
+        if rollup:
+            self._collection.insert_many(list(rollup.values()))
+        return len(rollup)
+
+    def get_totals(self,
+                   start_day: Optional[str] = None,
+                   end_day: Optional[str] = None,
+                   player_uid: int = 0,
+                   game_mode: Optional[GameMode] = None) -> List[dict]:
+        """
+        Returns the daily records between two days
+        Args:
+            start_day: first day (inclusive) format 'YYYY-MM-DD' (default the first day)
+            end_day: last day (inclusive) format 'YYYY-MM-DD' (default the last day)
+            player_uid: filter by player (optional)
+            game_mode: BR for Battle Royale, Arena for Arena (default is Both)
+
+        Returns:
+            list of dicts with uid, day, legend, games and the category totals
+        """
+        return list(self._collection.find(
+            self._totals_query_filter(start_day, end_day, player_uid, game_mode),
+            projection={'_id': False}
+        ))
+
+    @staticmethod
+    def _totals_query_filter(start_day: Optional[str] = None,
+                             end_day: Optional[str] = None,
+                             player_uid: int = 0,
+                             game_mode: Optional[GameMode] = None) -> dict:
+        """ Returns the `daily_player_stats` query filter for `get_totals` """
+        query_filter: dict = {}
+        if start_day or end_day:
+            query_filter['day'] = {}
+        if start_day:
+            query_filter['day']['$gte'] = start_day
+        if end_day:
+            query_filter['day']['$lte'] = end_day
+        if player_uid:
+            query_filter['uid'] = int(player_uid)
+        if game_mode:
+            query_filter['game_mode'] = GameMode(game_mode).value
+        return query_filter
+
+    def get_days(self, player_uid: int, before_day: Optional[str] = None,
+                 limit: int = 0) -> List[str]:
+        """
+        Returns the days (format 'YYYY-MM-DD') the player played, newest first
+        Args:
+            before_day: only the days before this one (optional)
+            limit: maximum number of days (0 is no limit)
+        """
+        pipeline: List[dict] = [
+            {'$match': self._days_query_filter(player_uid, before_day)},
+            {'$group': {'_id': '$day'}},
+            {'$sort': {'_id': pymongo.DESCENDING}},
+        ]
+        if limit:
+            pipeline.append({'$limit': limit})
+        return [day['_id'] for day in self._collection.aggregate(pipeline)]
+
+    @staticmethod
+    def _days_query_filter(player_uid: int, before_day: Optional[str] = None) -> dict:
+        """ Returns the `daily_player_stats` query filter for `get_days` """
+        query_filter: dict = {'uid': int(player_uid)}
+        if before_day:
+            query_filter['day'] = {'$lt': before_day}
+        return query_filter
@@ -1,14 +1,13 @@
 """ Dataclass to represent event collection """
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional, Union
 from enum import Enum
 import pymongo
 import pymongo.database
-import arrow
 from pydantic import BaseModel, Field, PrivateAttr
 
 from models.tracker_info import TrackerInfoCollection, GameMode
 from models.season import Season
-from apex_utilities import get_arrow_date_to_use
+from apex_utilities import pacific_day, pacific_days, pacific_midnight, pacific_time_of_day
 
 
 # pylint: disable=missing-class-docstring
@@ -89,14 +88,14 @@ class GameEvent(BaseEvent):
     def day_of_event(self) -> str:
         """ Returns the 'day' of the event formatted 'YYYY-MMM-DD' (Pacific time) """
         if not self._day_of_event:
-            self._day_of_event = arrow.get(self.timestamp).to('US/Pacific').format('YYYY-MM-DD')
+            self._day_of_event = pacific_day(self.timestamp)
         return self._day_of_event
 
     @property
     def formatted_time(self) -> str:
         """ Returns the formatted time of the event in Pacific """
         if not self._formatted_time:
-            self._formatted_time = arrow.get(self.timestamp).to('US/Pacific').format('h:mma')
+            self._formatted_time = pacific_time_of_day(self.timestamp)
         return self._formatted_time
 
     @property
@@ -117,14 +116,74 @@ class GameEvent(BaseEvent):
         return super().dict(exclude={'game_mode', 'kills', 'damage', 'wins'}, **kwargs)
 
 
+class GameProfile(str, Enum):
+    """ Named sets of the `event` fields a view needs (see `GAME_PROFILE_PROJECTIONS`) """
+    FULL = 'full'
+    LEADERBOARD = 'leaderboard'
+    DAY_DETAIL = 'day_detail'
+    RANKED_PLOT = 'ranked_plot'
+
+
+def _projection(*fields: str) -> dict:
+    """ Returns the Mongo projection for the `event` fields """
+    return {'_id': False, 'uid': True, 'timestamp': True, 'eventType': True,
+            **{field: True for field in fields}}
+
+
+# Mongo projection of each profile (None loads the whole document)
+GAME_PROFILE_PROJECTIONS: Dict[GameProfile, Optional[dict]] = {
+    GameProfile.FULL: None,
+    # category totals, grouped by player / day / legend
+    GameProfile.LEADERBOARD: _projection(
+        'event.key', 'event.value', 'legendPlayed', 'gameLength', 'xpProgress', 'rankScoreChange'
+    ),
+    # every game shown on the page (the tracker names are never shown)
+    GameProfile.DAY_DETAIL: _projection(
+        'event.key', 'event.value', 'player', 'legendPlayed', 'gameLength', 'xpProgress',
+        'rankScoreChange', 'currentRankScore'
+    ),
+    # end of day ranked scores
+    GameProfile.RANKED_PLOT: _projection('rankScoreChange', 'currentRankScore'),
+}
+
+# (GameEvent field, `event` document field) copied when the document has it
+_GAME_DOCUMENT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('player', 'player'),
+    ('game_length', 'gameLength'),
+    ('legend_played', 'legendPlayed'),
+    ('rank_score_change', 'rankScoreChange'),
+    ('xp_progress', 'xpProgress'),
+    ('current_rank_score', 'currentRankScore'),
+)
+
+# the order of `get_games_page` (newest first), the api's cursors are (timestamp, uid)
+GAMES_PAGE_SORT: List[Tuple[str, int]] = [('timestamp', pymongo.DESCENDING),
+                                          ('uid', pymongo.DESCENDING)]
+
+
 class EventCollection:
     """ Class for abstracting the event collection """
 
-    def __init__(self, database: pymongo.database.Database, tracker_info_data: dict):
+    def __init__(self,
+                 database: pymongo.database.Database,
+                 tracker_info_data: dict,
+                 strict: bool = False):
+        """
+        Args:
+            database: the apex database
+            tracker_info_data: contents of 'tracker_info.json'
+            strict: validate every game read from the db (default trusts our own records)
+        """
+        self.strict: bool = strict
         self._event_collection: pymongo.collection.Collection = database.event
         self._tracker_info_collection: TrackerInfoCollection = TrackerInfoCollection(
             tracker_info_data
         )
+        # tracker key -> (GameEvent field the value is saved to (None to skip), game mode)
+        self._tracker_plan: Dict[str, Tuple[Optional[str], GameMode]] = {
+            tracker.tracker_key: self._plan_for_key(tracker.tracker_key)
+            for tracker in self._tracker_info_collection.tracker_info_list
+        }
 
     # pylint: disable=too-many-arguments
     def get_games(self,
@@ -132,10 +191,14 @@ class EventCollection:
                   start_end_day: Tuple[str, str] = None,
                   game_mode: Optional[GameMode] = None,
                   additional_filter: dict = None,
-                  sort: int = pymongo.ASCENDING) -> List[GameEvent]:
+                  *,
+                  sort: int = pymongo.ASCENDING,
+                  profile: Union[GameProfile, str] = GameProfile.FULL) -> List[GameEvent]:
         """
 
         Args:
+            profile (): fields to load (`GameProfile`), the others are left unset
+                (strict decoding always loads the whole document)
             sort (): defines sort order 1 ascending -1 descending
             additional_filter (): query filter for the 'event' db
             start_end_day (): format 'YYYY-MM-DD'
@@ -146,6 +209,120 @@ class EventCollection:
         Returns:
 
         """
+        query_filter: dict = self._games_query_filter(player_uid, start_end_day, additional_filter)
+        projection: Optional[dict] = None
+        if not self.strict:
+            projection = GAME_PROFILE_PROJECTIONS[GameProfile(profile)]
+        event_list: Iterable[dict] = self._get_event_dict(query_filter, sort, projection)
+        return self._games_from_documents(event_list, game_mode)
+
+    def _games_from_documents(self,
+                              event_list: Iterable[dict],
+                              game_mode: Optional[GameMode] = None) -> List[GameEvent]:
+        """ Decodes the 'Game' documents (optionally only one game mode) """
+        game_list: List[GameEvent] = []
+        for game in event_list:
+            game_event: GameEvent = self.game_from_dict(game)
+            if game_mode and game_mode != game_event.game_mode:
+                continue
+            game_list.append(game_event)
+        # bucket every game into its day at once rather than converting each timestamp
+        for game_event, day in zip(game_list, pacific_days([game.timestamp for game in game_list])):
+            # pylint: disable=protected-access
+            game_event._day_of_event = day
+        return game_list
+
+    def get_games_page(self,
+                       player_uid: int = 0,
+                       before: Optional[Tuple[int, str]] = None,
+                       limit: int = 100,
+                       profile: Union[GameProfile, str] = GameProfile.DAY_DETAIL
+                       ) -> List[GameEvent]:
+        """
+        Returns one page of games, newest first (keyset pagination)
+        Args:
+            player_uid: filter by player (optional)
+            before: (timestamp, uid) of the last game of the previous page (None for the first)
+            limit: maximum number of games
+            profile: fields to load (`GameProfile`)
+
+        Returns:
+            games sorted by timestamp then uid, both descending
+        """
+        projection: Optional[dict] = None
+        if not self.strict:
+            projection = GAME_PROFILE_PROJECTIONS[GameProfile(profile)]
+        cursor = self._event_collection.find(
+            self._games_page_query_filter(player_uid, before), projection=projection
+        ).sort(GAMES_PAGE_SORT).limit(limit)
+        return self._games_from_documents(cursor)
+
+    def get_games_page_version(self,
+                               player_uid: int = 0,
+                               before: Optional[Tuple[int, str]] = None,
+                               limit: int = 100) -> Tuple[int, Tuple, Tuple]:
+        """
+        Returns (number of games, (timestamp, uid) of the first and of the last game) of the
+        `get_games_page` page, which changes whenever a game is saved into the page.
+        Only reads the page's index keys (at most `limit`), not the games.
+        """
+        cursor = self._event_collection.find(
+            self._games_page_query_filter(player_uid, before),
+            projection={'_id': False, 'timestamp': True, 'uid': True}
+        ).sort(GAMES_PAGE_SORT).limit(limit)
+        keys: List[Tuple[int, str]] = [(game['timestamp'], game['uid']) for game in cursor]
+        if not keys:
+            return 0, (), ()
+        return len(keys), keys[0], keys[-1]
+
+    def get_data_version(self,
+                         player_uid: int = 0,
+                         start_timestamp: Optional[int] = None,
+                         end_timestamp: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Returns (number of games, latest game timestamp) in the range (inclusive),
+        which changes whenever a game in the range is saved
+        """
+        for version in self._event_collection.aggregate([
+            {'$match': self._games_between_query_filter(player_uid, start_timestamp,
+                                                        end_timestamp)},
+            {'$group': {'_id': None, 'games': {'$sum': 1}, 'latest': {'$max': '$timestamp'}}}
+        ]):
+            return int(version['games']), int(version['latest'] or 0)
+        return 0, 0
+
+    @staticmethod
+    def _games_between_query_filter(player_uid: int = 0,
+                                    start_timestamp: Optional[int] = None,
+                                    end_timestamp: Optional[int] = None) -> dict:
+        """ Returns the `event` query filter for the games in a time range (inclusive) """
+        query_filter: dict = EventCollection._games_query_filter(player_uid)
+        if start_timestamp is not None or end_timestamp is not None:
+            query_filter['timestamp'] = {}
+        if start_timestamp is not None:
+            query_filter['timestamp']['$gte'] = start_timestamp
+        if end_timestamp is not None:
+            query_filter['timestamp']['$lte'] = end_timestamp
+        return query_filter
+
+    @staticmethod
+    def _games_page_query_filter(player_uid: int = 0,
+                                 before: Optional[Tuple[int, str]] = None) -> dict:
+        """ Returns the `event` query filter for `get_games_page` (the games after `before`) """
+        query_filter: dict = EventCollection._games_query_filter(player_uid)
+        if before:
+            timestamp, uid = before
+            query_filter['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, 'uid': {'$lt': str(uid)}}
+            ]
+        return query_filter
+
+    @staticmethod
+    def _games_query_filter(player_uid: int = 0,
+                            start_end_day: Tuple[str, str] = None,
+                            additional_filter: dict = None) -> dict:
+        """ Returns the `event` query filter for `get_games` """
         query_filter: dict = {
             "eventType": "Game"
         }
@@ -153,28 +330,62 @@ class EventCollection:
             query_filter['uid'] = str(player_uid)
         if start_end_day:
             start_day, end_day = start_end_day
-            start_timestamp = get_arrow_date_to_use(start_day).int_timestamp
-            end_timestamp = get_arrow_date_to_use(end_day).int_timestamp
+            start_timestamp = pacific_midnight(start_day)
+            end_timestamp = pacific_midnight(end_day)
             query_filter['timestamp'] = {"$gt": start_timestamp, "$lt": end_timestamp}
         if additional_filter:
             query_filter.update(additional_filter)
+        return query_filter
 
-        event_list: list = self._get_event_dict(query_filter, sort)
-
-        game_list: List[GameEvent] = []
-        for game in event_list:
-            game_event: GameEvent = GameEvent(**game)
-            self.update_game_category_totals(game_event)
-            self.update_game_mode(game_event)
-            if game_mode and game_mode != game.game_mode:
-                continue
-            game_list.append(game_event)
-        return game_list
+    def game_from_dict(self, event_data: dict, strict: Optional[bool] = None) -> GameEvent:
+        """
+        Returns a `GameEvent` with the category totals and game mode filled in
+        Args:
+            event_data: 'Game' event document
+            strict: validate the document with pydantic (default `self.strict`)
+                use for data that did not come from the `event` collection
+        """
+        if strict is None:
+            strict = self.strict
+        if not strict:
+            return self.game_from_trusted_dict(event_data)
+        game_event: GameEvent = GameEvent(**event_data)
+        self.apply_trackers(game_event)
+        return game_event
+
+    def game_from_trusted_dict(self, event_data: dict) -> GameEvent:
+        """
+        Returns a `GameEvent` for a document read back from the `event` collection
+        without pydantic validation (`construct`), applying the trackers while
+        the details are built. Fields a projection left out are left unset.
+        """
+        details: List[GameEventDetail] = []
+        tracker_values: dict = {}
+        game_mode: Optional[GameMode] = None
+        tracker: dict
+        for tracker in event_data.get('event', ()):
+            details.append(GameEventDetail.construct(**tracker))
+            field, game_mode = self._tracker_plan_for_key(tracker['key'])
+            if field:
+                tracker_values[field] = tracker['value']
+        game_values: dict = {
+            'uid': event_data['uid'],
+            'timestamp': event_data['timestamp'],
+            'event_type': EventType(event_data['eventType']),
+            'event': details,
+            'game_mode': game_mode
+        }
+        for field, document_field in _GAME_DOCUMENT_FIELDS:
+            if document_field in event_data:
+                game_values[field] = event_data[document_field]
+        game_values.update(tracker_values)
+        return GameEvent.construct(**game_values)
 
     def get_ranked_games(self,
                          player_uid: int = 0,
                          season: Optional[Season] = None,
-                         split_number: int = 0
+                         split_number: int = 0,
+                         profile: Union[GameProfile, str] = GameProfile.FULL
                          ) -> List[GameEvent]:
         """
         Returns a list of 'filtered' games based on season / split (current if none given)
@@ -182,17 +393,48 @@ class EventCollection:
             player_uid:  Player UID for ranked games (default all players)
             season: Season to get ranked games for
             split_number: Split number (cannot be zero of season given)
+            profile: fields to load (`GameProfile`)
 
         Returns:
             List of all ranked game events
         """
+        return self.get_games(
+            player_uid,
+            start_end_day=self._ranked_start_end_day(season, split_number),
+            additional_filter=self._ranked_query_filter(),
+            profile=profile
+        )
+
+    def get_latest_ranked_game_timestamp(self,
+                                         player_uid: int = 0,
+                                         season: Optional[Season] = None,
+                                         split_number: int = 0) -> int:
+        """ returns the timestamp of the most recent game `get_ranked_games` returns, 0 if none """
+        query_filter: dict = self._games_query_filter(
+            player_uid,
+            start_end_day=self._ranked_start_end_day(season, split_number),
+            additional_filter=self._ranked_query_filter()
+        )
+        record = self._event_collection.find_one(
+            query_filter,
+            projection={'timestamp': True, '_id': False},
+            sort=[('timestamp', pymongo.DESCENDING)]
+        )
+        if record:
+            return int(record['timestamp'])
+        return 0
+
+    @staticmethod
+    def _ranked_start_end_day(season: Season, split_number: int = 0) -> Tuple[str, str]:
+        """ Returns the start / end day of the season or the split """
         if not split_number:
-            start_date = season.start_date
-            end_date = season.end_date
-        else:
-            start_date, end_date = season.get_ranked_split_dates(split_number=split_number)
+            return season.start_date, season.end_date
+        return season.get_ranked_split_dates(split_number=split_number)
 
-        query_filter: dict = {
+    @staticmethod
+    def _ranked_query_filter() -> dict:
+        """ Returns the query filter for ranked games """
+        return {
             "rankScoreChange": {
                 "$ne": "0"
             },
@@ -200,49 +442,164 @@ class EventCollection:
                 "$exists": True
             }
         }
-        return self.get_games(
-            player_uid,
-            start_end_day=(start_date, end_date),
-            additional_filter=query_filter
-        )
+
+    def get_player_totals(self,
+                          start_timestamp: int,
+                          end_timestamp: int,
+                          game_mode: Optional[GameMode] = None) -> List[dict]:
+        """
+        Sums each player's games server side with an aggregation pipeline
+        Args:
+            start_timestamp: first timestamp (inclusive)
+            end_timestamp: last timestamp (inclusive)
+            game_mode: BR for Battle Royale, Arena for Arena (default is Both)
+
+        Returns:
+            one dict per player:
+                uid, games, kills, wins, damage, xp_progress and game_length (minutes)
+        """
+        pipeline: List[dict] = [
+            {'$match': self._games_between_query_filter(
+                start_timestamp=start_timestamp, end_timestamp=end_timestamp
+            )},
+            {'$project': {
+                'uid': 1,
+                'xpProgress': 1,
+                'gameLength': 1,
+                'game_mode': self._game_mode_expression(),
+                **{
+                    category: self._tracker_value_expression(category)
+                    for category in ('kills', 'wins', 'damage')
+                }
+            }}
+        ]
+        if game_mode:
+            pipeline.append({'$match': {'game_mode': GameMode(game_mode).value}})
+        pipeline.append({'$group': {
+            '_id': '$uid',
+            'games': {'$sum': 1},
+            'kills': {'$sum': '$kills'},
+            'wins': {'$sum': '$wins'},
+            'damage': {'$sum': '$damage'},
+            'xp_progress': {'$sum': '$xpProgress'},
+            'game_length': {'$sum': '$gameLength'}
+        }})
+        totals_list: List[dict] = []
+        for totals in self._event_collection.aggregate(pipeline):
+            totals['uid'] = int(totals.pop('_id'))
+            totals_list.append(totals)
+        return totals_list
+
+    def _tracker_value_expression(self, category: str) -> dict:
+        """
+        Aggregation expression matching `update_game_category_totals`
+        (the value of the last tracker in the category, 0 if there is none)
+        """
+        return {'$let': {
+            'vars': {'matched': {'$filter': {
+                'input': '$event',
+                'as': 'tracker',
+                'cond': {'$in': [
+                    '$$tracker.key', self._tracker_info_collection.keys_for_category(category)
+                ]}
+            }}},
+            'in': {'$ifNull': [{'$arrayElemAt': ['$$matched.value', -1]}, 0]}
+        }}
+
+    def _game_mode_expression(self) -> dict:
+        """
+        Aggregation expression matching `update_game_mode`
+        (the mode of the last tracker, None if there are no trackers)
+        """
+        last_key: dict = {'$ifNull': [{'$arrayElemAt': ['$event.key', -1]}, None]}
+        arena_keys: List[str] = self._tracker_info_collection.keys_for_mode(GameMode.ARENA)
+        return {'$cond': [
+            {'$eq': [last_key, None]},
+            None,
+            {'$cond': [
+                {'$in': [last_key, arena_keys]}, GameMode.ARENA.value, GameMode.BR.value
+            ]}
+        ]}
+
+    def _plan_for_key(self, key: str) -> Tuple[Optional[str], GameMode]:
+        """ Returns the (GameEvent field, game mode) a tracker key is applied as """
+        category: str = self._tracker_info_collection.category_for_key(key)
+        field: Optional[str] = category if category in GameEvent.__fields__ else None
+        return field, self._tracker_info_collection.mode_for_key(key)
+
+    def _tracker_plan_for_key(self, key: str) -> Tuple[Optional[str], GameMode]:
+        """ Returns the plan for a tracker key (unknown keys are added on first use) """
+        plan: Optional[Tuple[Optional[str], GameMode]] = self._tracker_plan.get(key)
+        if plan is None:
+            plan = self._tracker_plan[key] = self._plan_for_key(key)
+        return plan
+
+    def apply_trackers(self, game: GameEvent):
+        """
+        Adds the category totals and the Game Mode to the game in a single pass
+        (the same result as `update_game_category_totals` then `update_game_mode`)
+        """
+        tracker: GameEventDetail
+        for tracker in game.event:
+            field, game_mode = self._tracker_plan_for_key(tracker.key)
+            if field:
+                setattr(game, field, tracker.value)
+            game.game_mode = game_mode
 
     def update_game_category_totals(self, game: GameEvent):
         """ Checks the game event to see if it has the category, and adds it """
         tracker: GameEventDetail
         for tracker in game.event:
-            tracker_cat: str = self._tracker_info_collection.category_for_key(
-                tracker.key
-            )
-            if hasattr(game, tracker_cat):
-                setattr(game, tracker_cat, tracker.value)
+            field: Optional[str] = self._tracker_plan_for_key(tracker.key)[0]
+            if field:
+                setattr(game, field, tracker.value)
         # Category not found
 
     def update_game_mode(self, game: GameEvent):
         """ Adds the Game Mode (BR, or Arena) to the game"""
         tracker: GameEventDetail
         for tracker in game.event:
-            game.game_mode = self._tracker_info_collection.mode_for_key(
-                tracker.key
-            )
+            game.game_mode = self._tracker_plan_for_key(tracker.key)[1]
 
-    def _get_event_dict(self, query_filter: dict, sort_order: int = 0) -> list:
-        """ Query the DB for events based on filter """
+    def _get_event_dict(self,
+                        query_filter: dict,
+                        sort_order: int = 0,
+                        projection: Optional[dict] = None) -> Iterable[dict]:
+        """ Query the DB for events based on filter (only the projected fields) """
         assert sort_order in (pymongo.ASCENDING, 0, pymongo.DESCENDING)
+        cursor = self._event_collection.find(query_filter, projection=projection)
         if sort_order:
-            return list(
-                self._event_collection.find(query_filter).sort('timestamp', sort_order)
-            )
-        return list(self._event_collection.find(query_filter))
-
-    def save_event_dict(self, event_data: dict):
-        """ Saves any 'new' event data record """
-        uid = event_data['uid']
-        timestamp = event_data['timestamp']
-        event_type = event_data['eventType']
-        key = {"uid": uid, "timestamp": timestamp, "eventType": event_type}
-        self._event_collection.update_one(
-            filter=key, update={"$set": event_data}, upsert=True
+            return cursor.sort('timestamp', sort_order)
+        return cursor
+
+    def save_event_dict(self, event_data: dict) -> bool:
+        """ Saves any 'new' event data record, returns True if the record was inserted """
+        result = self._event_collection.update_one(
+            filter=self._event_key(event_data), update={"$set": event_data}, upsert=True
         )
+        return result.upserted_id is not None
+
+    @staticmethod
+    def _event_key(event_data: dict) -> dict:
+        """ Returns the `event` query filter for the saved copy of the event """
+        return {
+            "uid": event_data['uid'],
+            "timestamp": event_data['timestamp'],
+            "eventType": event_data['eventType']
+        }
+
+    def get_latest_game_timestamp_between(self, start_timestamp: int, end_timestamp: int) -> int:
+        """ returns the most recent game timestamp in the range (inclusive), 0 if none """
+        record = self._event_collection.find_one(
+            self._games_between_query_filter(
+                start_timestamp=start_timestamp, end_timestamp=end_timestamp
+            ),
+            projection={'timestamp': True, '_id': False},
+            sort=[('timestamp', pymongo.DESCENDING)]
+        )
+        if record:
+            return int(record['timestamp'])
+        return 0
 
     def get_latest_game_timestamp(self, uid: str) -> int:
         """ returns the most recent timestamp """
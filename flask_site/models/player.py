@@ -1,7 +1,10 @@
 """ Dataclass to represent player collection """
+import time
 from typing import Optional, List, Any
 
+import pymongo
 import pymongo.database
+from pymongo.change_stream import CollectionChangeStream
 
 from pydantic import BaseModel
 
@@ -35,6 +38,8 @@ class Player(BaseModel):
     xp_total: Optional[int] = None
     point_total: Optional[int] = None
     minute_total: Optional[int] = None
+    # epoch seconds of the last `save_player`
+    updated_at: Optional[float] = None
 
     def dict(self, **kwargs):
         return super().dict(
@@ -71,8 +76,26 @@ class PlayerCollection:
             return Player(**player_dict)
         return None
 
+    def get_players_updated_since(self, updated_at: float) -> List[Player]:
+        """ Returns the players saved after `updated_at` (oldest first) """
+        return [
+            Player(**player_data) for player_data in self._collection.find(
+                {'updated_at': {'$gt': updated_at}}
+            ).sort('updated_at', pymongo.ASCENDING)
+        ]
+
+    def watch(self, max_await_time_ms: int = 1000) -> CollectionChangeStream:
+        """
+        Returns a change stream of the saved players (with the full document)
+        Raises `OperationFailure` if the server has no change streams (i.e. not a replica set)
+        """
+        return self._collection.watch(
+            full_document='updateLookup', max_await_time_ms=max_await_time_ms
+        )
+
     def save_player(self, player: Player):
         """ Saves player to database """
+        player.updated_at = time.time()
         key = {'uid': player.uid}
         self._collection.update_one(
             filter=key,
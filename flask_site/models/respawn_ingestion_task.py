@@ -1,9 +1,11 @@
 """ Dataclass to represent respawn ingestion job collection """
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
 
 import pymongo.database
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
 # pylint: disable=import-error
 from instance.config import get_config
@@ -13,12 +15,18 @@ config = get_config('development')
 
 
 class RespawnIngestionTaskCollection:
-    """ Collection object for inserting records into the db """
+    """
+    Collection object for inserting records into the db
+    The progress counters are kept in memory and saved together by `flush`
+    """
     def __init__(self, database: pymongo.database.Database):
         self._collection: pymongo.collection.Collection = database.respawn_ingestion_task
+        # player name -> field -> count since the last flush
+        self._pending: Dict[str, Dict[str, int]] = {}
 
     def init_tasks(self, players: List[Player]):
         """ Clears the collection of previous records and creates new fresh ones """
+        self._pending = {}
         self._collection.delete_many({})
         for player in players:
             self._collection.update_one(
@@ -36,25 +44,54 @@ class RespawnIngestionTaskCollection:
             )
 
     def fetched_record(self, player_name: str):
-        """ Saves one record to the respawn DB"""
-        key_filter = {'player_name': player_name}
-        self._collection.update_one(filter=key_filter, update={
-            "$inc": {'records_fetched': 1},
-            "$currentDate": {'last_update': True}
-        })
+        """ Counts one fetched record (saved by the next `flush`) """
+        self._count(player_name, 'records_fetched')
 
     def inserted_record(self, player_name: str):
-        """ Saves one record to the respawn DB"""
-        key_filter = {'player_name': player_name}
-        self._collection.update_one(filter=key_filter, update={
-            "$inc": {'records_inserted': 1},
-            "$currentDate": {'last_update': True}
-        })
+        """ Counts one inserted record (saved by the next `flush`) """
+        self._count(player_name, 'records_inserted')
 
     def fetch_error(self, player_name: str):
-        """ Saves one record to the respawn DB"""
-        key_filter = {'player_name': player_name}
-        self._collection.update_one(filter=key_filter, update={
-            "$inc": {'fetch_errors': 1},
-            "$currentDate": {'last_update': True}
-        })
+        """ Counts one fetch error (saved by the next `flush`) """
+        self._count(player_name, 'fetch_errors')
+
+    def _count(self, player_name: str, field: str, count: int = 1):
+        counts: Dict[str, int] = self._pending.setdefault(player_name, {})
+        counts[field] = counts.get(field, 0) + count
+
+    def _requeue(self, player_name: str, counts: Dict[str, int]):
+        """ Keeps counts that weren't saved for the next flush """
+        for field, count in counts.items():
+            self._count(player_name, field, count)
+
+    def flush(self) -> int:
+        """
+        Saves the counts since the last flush, with one write for all the players
+        Returns:
+            number of players updated
+        """
+        pending: Dict[str, Dict[str, int]] = self._pending
+        if not pending:
+            return 0
+        self._pending = {}
+        player_names: List[str] = list(pending)
+        try:
+            self._collection.bulk_write([
+                UpdateOne({'player_name': player_name}, {
+                    '$inc': pending[player_name],
+                    '$currentDate': {'last_update': True}
+                })
+                for player_name in player_names
+            ], ordered=False)
+        except BulkWriteError as error:
+            # the other updates were applied, only the failed ones are kept for the next flush
+            for write_error in error.details.get('writeErrors', []):
+                player_name: str = player_names[write_error['index']]
+                self._requeue(player_name, pending[player_name])
+            raise
+        except PyMongoError:
+            # none of them are known to be applied, keep them all for the next flush
+            for player_name, counts in pending.items():
+                self._requeue(player_name, counts)
+            raise
+        return len(pending)
@@ -1,6 +1,6 @@
 """ Dataclass to represent tracker_info collection """
 from enum import Enum
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel
 
@@ -31,18 +31,34 @@ class TrackerInfoCollection:
             if tracker['mode'] not in ['BR', 'Arena']:
                 continue
             self.tracker_info_list.append(TrackerInfo(**tracker))
+        # the first tracker with a key wins
+        self._category_by_key: Dict[str, str] = {}
+        self._mode_by_key: Dict[str, GameMode] = {}
+        for tracker_info in self.tracker_info_list:
+            self._category_by_key.setdefault(tracker_info.tracker_key, tracker_info.category)
+            self._mode_by_key.setdefault(tracker_info.tracker_key, tracker_info.mode)
 
     def category_for_key(self, key: str) -> str:
         """ Returns the category for the key """
-        for tracker in self.tracker_info_list:
-            if tracker.tracker_key == key:
-                return tracker.category
-        return key
+        return self._category_by_key.get(key, key)
 
     def mode_for_key(self, key: str) -> GameMode:
         """ Returns the mode (BR or Arena) for the key """
-        for tracker in self.tracker_info_list:
-            if tracker.tracker_key == key:
-                return tracker.mode
         # reasonable default
-        return GameMode.BR
+        return self._mode_by_key.get(key, GameMode.BR)
+
+    def keys_for_category(self, category: str) -> List[str]:
+        """ Returns every key that `category_for_key` maps to the category """
+        keys: List[str] = [
+            tracker.tracker_key for tracker in self.tracker_info_list
+            if tracker.category == category
+        ]
+        if self.category_for_key(category) == category:
+            keys.append(category)
+        return keys
+
+    def keys_for_mode(self, mode: GameMode) -> List[str]:
+        """ Returns the tracker keys for the mode """
+        return [
+            tracker.tracker_key for tracker in self.tracker_info_list if tracker.mode == mode
+        ]
@@ -58,3 +58,11 @@ def config_dict():
 def cdata():
     with open(get_full_filepath('respawn_cdata.json'), encoding='utf-8') as json_file:
         yield json.load(json_file)
+
+
+@pytest.fixture()
+def tracker_info_data():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.abspath(file_path + "/../flask_site/models/static_data/tracker_info.json")
+    with open(filepath, encoding='utf-8') as json_file:
+        yield json.load(json_file)
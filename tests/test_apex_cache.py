@@ -0,0 +1,76 @@
+""" cache tests """
+import mongomock
+
+from apex_cache import CachedPlayerCollection, LRUCache, ViewModelCache
+from models.event import EventCollection
+from models.player import Player
+
+
+# pylint: disable=missing-function-docstring
+def test_lru_eviction():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == (True, 1)
+    cache.set('c', 3)
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+    assert len(cache) == 2
+
+
+def test_ttl_expiry():
+    cache = LRUCache(max_size=2, ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') == (False, None)
+    cache.set('b', 2, ttl=None)
+    assert cache.get('b') == (True, 2)
+    assert cache.get_or_set('c', lambda: 3, ttl=60) == 3
+    assert cache.get_or_set('c', lambda: 4) == 3
+
+
+def test_view_model_cache_versions(game_event_list, tracker_info_data):
+    database = mongomock.MongoClient().db
+    event_collection = EventCollection(database, tracker_info_data)
+    view_model_cache = ViewModelCache(event_collection)
+    built: list = []
+
+    def factory():
+        built.append(len(built))
+        return built[-1]
+
+    assert view_model_cache.get('index', (), 0, 10 ** 10, factory) == 0
+    assert view_model_cache.get('index', (), 0, 10 ** 10, factory) == 0
+    assert view_model_cache.get('index', ('clan',), 0, 10 ** 10, factory) == 1
+    # a new game changes the data version
+    del game_event_list[0]['_id']
+    event_collection.save_event_dict(game_event_list[0])
+    assert view_model_cache.get('index', (), 0, 10 ** 10, factory) == 2
+    # so does a game ingested late, older than the latest one
+    older_game = dict(game_event_list[0], uid='123', timestamp=game_event_list[0]['timestamp'] - 60)
+    event_collection.save_event_dict(older_game)
+    assert view_model_cache.get('index', (), 0, 10 ** 10, factory) == 3
+
+
+def test_cached_player_collection():
+    database = mongomock.MongoClient().db
+    player_collection = CachedPlayerCollection(database, ttl=60)
+    player = Player(uid=1, is_online=0, name='one', platform='PC', selected_legend='Wraith',
+                    level=1, battlepass_level=1, discord_id=0, clan='NOT_SET')
+    assert player_collection.get_player_by_discord_id(42) is None
+    player_collection.save_player(player)
+    assert player_collection.get_tracked_player_by_uid(1) == player
+    # served from the cache, and changing the result doesn't change the cache
+    database.player.update_one({'uid': 1}, {'$set': {'name': 'renamed elsewhere'}})
+    cached_player = player_collection.get_tracked_player_by_uid(1)
+    assert cached_player.name == 'one'
+    cached_player.name = 'changed'
+    assert player_collection.get_tracked_player_by_uid(1).name == 'one'
+    # saving (i.e. claiming the profile) drops the uid and the 'no player' discord entries
+    player.discord_id = 42
+    player_collection.save_player(player)
+    assert player_collection.get_player_by_discord_id(42).uid == 1
+    assert player_collection.get_tracked_player_by_uid(1).discord_id == 42
+    player.discord_id = 43
+    player_collection.save_player(player)
+    assert player_collection.get_player_by_discord_id(42) is None
@@ -0,0 +1,133 @@
+""" index management tests """
+import mongomock
+
+from apex_db_indexes import REQUIRED_INDEXES, QUERY_SHAPES, collection_scans, ensure_indexes
+from apex_db_indexes import explain_stages, plan_stages
+from models.player import Player, PlayerCollection
+
+
+# pylint: disable=missing-function-docstring
+def test_ensure_indexes():
+    database = mongomock.MongoClient().db
+    results = ensure_indexes(database)
+    assert len(results) == len(REQUIRED_INDEXES)
+    assert not any(results.values())
+    for index in REQUIRED_INDEXES:
+        index_info = database[index.collection].index_information()[index.name]
+        assert index_info['key'] == list(index.keys)
+        assert index_info.get('unique', False) == index.unique
+    # running it again is a no-op
+    assert ensure_indexes(database) == results
+
+
+def test_unique_index_over_duplicates():
+    database = mongomock.MongoClient().db
+    database.player.insert_many([{'uid': 1}, {'uid': 1}])
+    results = ensure_indexes(database)
+    assert results['player.uid_1']
+    assert results['player.discord_id_1'] is None
+
+
+def test_every_query_shape_has_an_index():
+    for query_shape in QUERY_SHAPES:
+        assert any(
+            index.collection == query_shape.collection and
+            index.keys[0][0] in query_shape.query_filter
+            for index in REQUIRED_INDEXES
+        ), query_shape.description
+
+
+def test_plan_stages():
+    plan = {'stage': 'FETCH', 'inputStage': {'stage': 'SORT', 'inputStages': [
+        {'stage': 'IXSCAN'}, {'queryPlan': {'stage': 'COLLSCAN'}}
+    ]}}
+    assert list(plan_stages(plan)) == ['FETCH', 'SORT', 'IXSCAN', 'COLLSCAN']
+
+
+class ExplainedCollection:
+    """ Stands in for a collection, explaining every query with the same plan """
+    def __init__(self, winning_plan: dict, sorts: list):
+        self.winning_plan = winning_plan
+        self.sorts = sorts
+
+    def find(self, query_filter):
+        assert isinstance(query_filter, dict)
+        return self
+
+    def sort(self, key_or_list):
+        self.sorts.append(key_or_list)
+        return self
+
+    def explain(self) -> dict:
+        return {'queryPlanner': {'winningPlan': self.winning_plan}}
+
+
+def test_collection_scans():
+    sorts: list = []
+    index_scan = {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}
+    database = {
+        collection: ExplainedCollection(index_scan, sorts)
+        for collection in {query_shape.collection for query_shape in QUERY_SHAPES}
+    }
+    database['player'] = ExplainedCollection({'stage': 'COLLSCAN'}, sorts)
+    scans = collection_scans(database)
+    assert [query_shape for query_shape, _ in scans] == [
+        query_shape for query_shape in QUERY_SHAPES if query_shape.collection == 'player'
+    ]
+    assert all(stages == ['COLLSCAN'] for _, stages in scans)
+    assert sorts == [list(query_shape.sort) for query_shape in QUERY_SHAPES if query_shape.sort]
+    assert explain_stages(database, QUERY_SHAPES[0]) == ['FETCH', 'IXSCAN']
+
+
+# pylint: disable=redefined-builtin
+class RecordingCollection:
+    """ A collection that records the (collection, filter fields) of every query """
+    def __init__(self, collection, shapes):
+        self._collection = collection
+        self._shapes = shapes
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, filter=None, **kwargs):
+        self._shapes.append((self._collection.name, frozenset(filter or {})))
+        return self._collection.find(filter, **kwargs)
+
+    def find_one(self, filter=None, **kwargs):
+        self._shapes.append((self._collection.name, frozenset(filter or {})))
+        return self._collection.find_one(filter, **kwargs)
+
+    def update_one(self, filter, *args, **kwargs):
+        self._shapes.append((self._collection.name, frozenset(filter)))
+        return self._collection.update_one(filter, *args, **kwargs)
+
+
+class RecordingDatabase:
+    """ A database whose collections record their queries """
+    def __init__(self, database, shapes: list):
+        self._database = database
+        self._shapes = shapes
+
+    def __getattr__(self, name):
+        return RecordingCollection(self._database[name], self._shapes)
+
+
+def test_player_query_shapes_match_the_queries():
+    # the event and daily_player_stats shapes are built from the collections' own filters
+    database = mongomock.MongoClient().db
+    shapes: list = []
+    player_collection = PlayerCollection(RecordingDatabase(database, shapes))
+    player_collection.save_player(Player(
+        uid=1, is_online=0, name='one', platform='PC', selected_legend='Wraith',
+        level=1, battlepass_level=1, discord_id=1, clan='NOT_SET'
+    ))
+    player_collection.get_tracked_player_by_uid(1)
+    player_collection.get_player_by_discord_id(1)
+    player_collection.get_players_updated_since(0.0)
+    declared = [
+        (query_shape.collection, frozenset(query_shape.query_filter))
+        for query_shape in QUERY_SHAPES
+    ]
+    assert shapes
+    for shape in shapes:
+        assert shape in declared, shape
@@ -0,0 +1,70 @@
+""" json api tests """
+import mongomock
+import pytest
+
+from apex_json_api import BadCursorException, decode_cursor, encode_cursor, games_page_json, \
+    strong_etag
+from models.event import EventCollection, GameEvent
+
+
+# pylint: disable=missing-function-docstring
+def make_event_collection(game_event_list, tracker_info_data) -> EventCollection:
+    database = mongomock.MongoClient().db
+    for index, game in enumerate(game_event_list):
+        del game['_id']
+        # two games with the same timestamp so the pages must break the tie on uid
+        if index == 1:
+            game['timestamp'] = game_event_list[0]['timestamp']
+    database.event.insert_many(game_event_list)
+    return EventCollection(database, tracker_info_data)
+
+
+def test_cursor_round_trip(game_event_list):
+    game: GameEvent = GameEvent(**game_event_list[0])
+    assert decode_cursor(encode_cursor(game)) == (game.timestamp, game.uid)
+    for cursor in ('', 'not a cursor', 'MTIzNA==', 'YTpi'):
+        with pytest.raises(BadCursorException):
+            decode_cursor(cursor)
+
+
+def test_strong_etag():
+    assert strong_etag('games', 0, None, 100, (5, 1600000000)) == \
+           strong_etag('games', 0, None, 100, (5, 1600000000))
+    assert strong_etag('games', 0, None, 100, (5, 1600000000)) != \
+           strong_etag('games', 0, None, 100, (6, 1600000000))
+
+
+def test_games_pages(game_event_list, tracker_info_data):
+    event_collection = make_event_collection(game_event_list, tracker_info_data)
+    expected = sorted(
+        ((game['timestamp'], game['uid'])
+         for game in game_event_list if game['eventType'] == 'Game'),
+        reverse=True
+    )
+    seen = []
+    before = None
+    while True:
+        page = games_page_json(event_collection.get_games_page(before=before, limit=3), 3)
+        seen.extend((game['timestamp'], str(game['uid'])) for game in page['games'])
+        if not page['next_cursor']:
+            break
+        before = decode_cursor(page['next_cursor'])
+    assert seen == expected
+    assert event_collection.get_data_version() == (len(expected), expected[0][0])
+    assert event_collection.get_data_version(end_timestamp=expected[-1][0] - 1) == (0, 0)
+
+
+def test_games_page_version(game_event_list, tracker_info_data):
+    event_collection = make_event_collection(game_event_list, tracker_info_data)
+    games = event_collection.get_games_page(limit=2)
+    before = (games[-1].timestamp, games[-1].uid)
+    version = event_collection.get_games_page_version(limit=2)
+    assert version == (2, (games[0].timestamp, games[0].uid), before)
+    next_version = event_collection.get_games_page_version(before=before, limit=2)
+    # a newer game changes the first page, not the pages after it
+    newer = dict(game_event_list[0], uid='1', timestamp=games[0].timestamp + 60)
+    del newer['_id']
+    event_collection.save_event_dict(newer)
+    assert event_collection.get_games_page_version(limit=2) != version
+    assert event_collection.get_games_page_version(before=before, limit=2) == next_version
+    assert event_collection.get_games_page_version(before=(0, '0')) == (0, (), ())
@@ -0,0 +1,72 @@
+""" metrics tests """
+import asyncio
+
+import pytest
+
+from apex_metrics import MetricsRegistry, serve_metrics
+
+
+# pylint: disable=missing-function-docstring
+def test_counter_and_gauge():
+    metrics = MetricsRegistry()
+    fetches = metrics.counter('fetches_total', "Fetches", ('outcome',))
+    fetches.inc(outcome='ok')
+    fetches.inc(2, outcome='ok')
+    fetches.inc(outcome='time"out')
+    assert fetches.value(outcome='ok') == 3
+    with pytest.raises(ValueError):
+        fetches.inc(-1, outcome='ok')
+    with pytest.raises(ValueError):
+        fetches.inc(player='x')
+    delay = metrics.gauge('delay_seconds', "Delay", ('player',))
+    delay.set(15.5, player='a')
+    delay.inc(-0.5, player='a')
+    assert metrics.counter('fetches_total', "Fetches", ('outcome',)) is fetches
+    with pytest.raises(ValueError):
+        metrics.gauge('fetches_total', "Fetches", ('outcome',))
+    assert metrics.exposition() == (
+        '# HELP delay_seconds Delay\n'
+        '# TYPE delay_seconds gauge\n'
+        'delay_seconds{player="a"} 15\n'
+        '# HELP fetches_total Fetches\n'
+        '# TYPE fetches_total counter\n'
+        'fetches_total{outcome="ok"} 3\n'
+        'fetches_total{outcome="time\\"out"} 1\n'
+    )
+
+
+def test_histogram():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram('latency_seconds', "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+    assert latency.count() == 4
+    assert latency.exposition().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 2.65',
+        'latency_seconds_count 4',
+    ]
+
+
+def test_serve_metrics():
+    metrics = MetricsRegistry()
+    metrics.counter('polls_total', "Polls").inc()
+
+    async def get(path: str) -> bytes:
+        server = await serve_metrics('127.0.0.1', 0, metrics)
+        port: int = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response: bytes = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(get('/metrics'))
+    assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert response.endswith(b'\r\n\r\n# HELP polls_total Polls\n# TYPE polls_total counter\n'
+                             b'polls_total 1\n')
+    assert asyncio.run(get('/')).startswith(b'HTTP/1.1 404 Not Found\r\n')
@@ -0,0 +1,29 @@
+""" shared MongoClient registry tests """
+from types import SimpleNamespace
+
+from apex_mongo import client_options, close_mongo_clients, get_mongo_client
+
+
+# pylint: disable=missing-function-docstring
+def configuration(**settings) -> SimpleNamespace:
+    return SimpleNamespace(MONGO_HOST='localhost', MONGO_USERNAME=None, MONGO_PASSWORD=None,
+                           MONGO_DB='apex', **settings)
+
+
+def test_client_options():
+    options = client_options(configuration(MONGO_MAX_POOL_SIZE=10,
+                                           MONGO_SERVER_SELECTION_TIMEOUT_MS=500))
+    assert options['maxPoolSize'] == 10
+    assert options['serverSelectionTimeoutMS'] == 500
+    assert options['connect'] is False
+    assert 'socketTimeoutMS' not in options
+
+
+def test_clients_are_shared():
+    close_mongo_clients()
+    client = get_mongo_client(configuration())
+    assert get_mongo_client(configuration()) is client
+    assert get_mongo_client(configuration(MONGO_MAX_POOL_SIZE=5)) is not client
+    close_mongo_clients()
+    assert get_mongo_client(configuration()) is not client
+    close_mongo_clients()
@@ -0,0 +1,137 @@
+""" tracked player registry tests """
+import threading
+import time
+
+import mongomock
+import pytest
+from pymongo.errors import OperationFailure
+
+from apex_player_registry import PlayerSnapshot, TrackedPlayerRegistry
+from models.player import Player, PlayerCollection
+
+
+# pylint: disable=missing-function-docstring
+def make_player(uid: int, name: str) -> Player:
+    return Player(uid=uid, is_online=0, name=name, platform='PC', selected_legend='Wraith',
+                  level=1, battlepass_level=1, discord_id=0, clan='NOT_SET')
+
+
+class FakeChangeStream:
+    """ Stands in for a pymongo change stream """
+    def __init__(self, changes: list):
+        self.changes = changes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)
+        time.sleep(0.01)
+        return None
+
+
+class ChangeStreamPlayerCollection(PlayerCollection):
+    """ mongomock has no change streams """
+    def __init__(self, database, changes=None):
+        super().__init__(database)
+        self.changes = changes
+        self.watched = threading.Event()
+
+    def watch(self, max_await_time_ms: int = 1000):
+        self.watched.set()
+        if self.changes is None:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+        return FakeChangeStream(self.changes)
+
+
+def wait_for(condition) -> bool:
+    for _ in range(200):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_snapshot_is_immutable():
+    snapshot = PlayerSnapshot.from_players([make_player(1, 'one'), make_player(2, 'two')])
+    assert [player.uid for player in snapshot.players] == [1, 2]
+    with pytest.raises(TypeError):
+        snapshot.by_uid[3] = make_player(3, 'three')
+
+
+def test_polling_registry():
+    player_collection = PlayerCollection(mongomock.MongoClient().db)
+    player_collection.save_player(make_player(1, 'one'))
+    registry = TrackedPlayerRegistry(player_collection, poll_interval=0.01,
+                                     use_change_stream=False)
+    snapshot = registry.snapshot()
+    assert registry.snapshot() is snapshot
+    player_collection.save_player(make_player(2, 'two'))
+    renamed = make_player(1, 'renamed')
+    player_collection.save_player(renamed)
+    assert wait_for(lambda: len(registry.snapshot().players) == 2)
+    assert wait_for(lambda: registry.snapshot().by_uid[1].name == 'renamed')
+    # the earlier snapshot didn't change
+    assert [player.name for player in snapshot.players] == ['one']
+    registry.stop()
+
+
+def test_change_stream_falls_back_to_polling():
+    player_collection = ChangeStreamPlayerCollection(mongomock.MongoClient().db)
+    registry = TrackedPlayerRegistry(player_collection, poll_interval=0.01)
+    assert registry.snapshot().players == ()
+    assert wait_for(lambda: not registry.use_change_stream)
+    player_collection.save_player(make_player(1, 'one'))
+    assert wait_for(lambda: 1 in registry.snapshot().by_uid)
+    registry.stop()
+
+
+def test_change_stream_registry():
+    database = mongomock.MongoClient().db
+    changes: list = []
+    player_collection = ChangeStreamPlayerCollection(database, changes)
+    player_collection.save_player(make_player(1, 'one'))
+    registry = TrackedPlayerRegistry(player_collection, poll_interval=0.01)
+    registry.snapshot()
+    assert player_collection.watched.wait(1)
+    player = make_player(2, 'two')
+    player_collection.save_player(player)
+    changes.append({'operationType': 'insert', 'fullDocument': player.dict()})
+    assert wait_for(lambda: 2 in registry.snapshot().by_uid)
+    database.player.delete_one({'uid': 1})
+    changes.append({'operationType': 'delete', 'documentKey': {'_id': 'id'}})
+    assert wait_for(lambda: 1 not in registry.snapshot().by_uid)
+    registry.stop()
+
+
+def test_change_stream_skips_invalid_players():
+    database = mongomock.MongoClient().db
+    changes: list = [{'operationType': 'insert', 'fullDocument': {'uid': 2, 'name': 'invalid'}}]
+    player_collection = ChangeStreamPlayerCollection(database, changes)
+    registry = TrackedPlayerRegistry(player_collection, poll_interval=0.01)
+    registry.snapshot()
+    assert wait_for(lambda: not changes)
+    player = make_player(3, 'three')
+    changes.append({'operationType': 'insert', 'fullDocument': player.dict()})
+    assert wait_for(lambda: 3 in registry.snapshot().by_uid)
+    assert 2 not in registry.snapshot().by_uid
+    registry.stop()
+
+
+def test_polling_survives_unexpected_errors():
+    database = mongomock.MongoClient().db
+    player_collection = PlayerCollection(database)
+    registry = TrackedPlayerRegistry(player_collection, poll_interval=0.01,
+                                     use_change_stream=False)
+    registry.snapshot()
+    # fails validation on every poll until it's deleted
+    database.player.insert_one({'uid': 1, 'name': 'invalid', 'updated_at': time.time()})
+    time.sleep(0.05)
+    database.player.delete_one({'uid': 1})
+    player_collection.save_player(make_player(2, 'two'))
+    assert wait_for(lambda: 2 in registry.snapshot().by_uid)
+    registry.stop()
@@ -0,0 +1,50 @@
+""" rate limiter tests """
+import asyncio
+import time
+
+from apex_rate_limiter import AdaptiveRateLimiter
+
+
+# pylint: disable=missing-function-docstring
+def test_burst_then_rate():
+    limiter = AdaptiveRateLimiter(rate=50.0, burst=2.0)
+
+    async def acquire_all():
+        return [await limiter.acquire() for _ in range(5)]
+
+    start = time.monotonic()
+    waits = asyncio.run(acquire_all())
+    # two from the burst, then one every 20ms
+    assert waits[0] < 0.005 and waits[1] < 0.005
+    assert time.monotonic() - start >= 0.055
+
+
+def test_tasks_share_the_budget():
+    limiter = AdaptiveRateLimiter(rate=100.0, burst=1.0)
+
+    async def poll_together():
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+
+    start = time.monotonic()
+    asyncio.run(poll_together())
+    assert time.monotonic() - start >= 0.045
+
+
+def test_aimd():
+    limiter = AdaptiveRateLimiter(rate=8.0, min_rate=1.5, increase=1000.0, decrease_cooldown=60)
+    assert limiter.slow_down()
+    assert limiter.rate == 4.0
+    # the other requests sent at the old rate don't lower it again
+    assert not limiter.slow_down()
+    assert limiter.rate == 4.0
+    assert limiter.slow_downs == 2
+    limiter.decrease_cooldown = 0
+    assert limiter.slow_down()
+    assert limiter.slow_down()
+    assert limiter.rate == 1.5
+    time.sleep(0.002)
+    limiter.succeeded()
+    assert 1.5 < limiter.rate <= 8.0
+    time.sleep(0.01)
+    limiter.succeeded()
+    assert limiter.rate == 8.0
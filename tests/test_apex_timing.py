@@ -0,0 +1,66 @@
+""" request timing tests """
+import time
+
+import apex_timing
+from apex_timing import TimingStats, percentile, span
+
+
+# pylint: disable=missing-function-docstring
+def test_spans_only_count_their_own_time():
+    timing = apex_timing.start_request(1.0)
+    with span('compute'):
+        time.sleep(0.01)
+        # a Mongo command which took 20ms
+        time.sleep(0.02)
+        timing.add('db', 20.0)
+        with span('render'):
+            time.sleep(0.01)
+    assert apex_timing.finish_request() is timing
+    phase_ms = timing.phase_ms()
+    assert phase_ms['db'] == 20.0
+    assert 10.0 <= phase_ms['render'] < 20.0
+    # the 'db' and nested 'render' time is taken out of 'compute'
+    assert 0.0 <= phase_ms['compute'] < 20.0
+    assert ', compute;dur=' in timing.server_timing()
+    assert ', total;dur=' in timing.server_timing()
+    assert 'db;dur=20.00;desc="1 spans"' in timing.server_timing()
+
+
+def test_unsampled_requests_do_nothing():
+    assert apex_timing.start_request(0.0) is None
+    with span('compute'):
+        pass
+    assert list(apex_timing.timed_iterator('render', ['a', 'b'])) == ['a', 'b']
+    assert apex_timing.finish_request() is None
+
+
+def test_timed_iterator():
+    timing = apex_timing.start_request(1.0)
+    assert list(apex_timing.timed_iterator('render', ['a', 'b'])) == ['a', 'b']
+    apex_timing.finish_request()
+    assert timing.phases['render'][1] == 3
+
+
+def test_percentiles():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_timing_stats():
+    stats = TimingStats(max_samples=2)
+    for _ in range(3):
+        timing = apex_timing.start_request(1.0)
+        timing.add('db', 5.0)
+        apex_timing.finish_request()
+        stats.record('index', timing)
+    summary = stats.summary()['index']
+    assert summary['requests'] == 3
+    assert summary['samples'] == 2
+    assert summary['db'] == {'p50': 5.0, 'p95': 5.0, 'p99': 5.0}
+    assert summary['total']['p99'] >= 0
+    stats.clear()
+    assert not stats.summary()
@@ -0,0 +1,54 @@
+""" utility function tests """
+from types import SimpleNamespace
+
+import arrow
+
+from apex_utilities import competition_ranks, players_sorted_by_key, DayBuckets, pacific_day, \
+    pacific_days, pacific_midnight, pacific_time_of_day, get_arrow_date_prev_next_date_to_use
+
+
+# pylint: disable=missing-function-docstring
+def test_competition_ranks():
+    players = [
+        SimpleNamespace(uid=uid, kills=kills)
+        for uid, kills in ((1, 3), (2, 7), (3, 3), (4, 0), (5, 7), (6, 1))
+    ]
+    ranks = competition_ranks(players_sorted_by_key(players, 'kills'), 'kills')
+    assert ranks == {2: 1, 5: 1, 1: 3, 3: 3, 6: 5, 4: 6}
+    assert not competition_ranks([], 'kills')
+
+
+def test_competition_ranks_missing_key():
+    players = [SimpleNamespace(uid=1, wins=2), SimpleNamespace(uid=2)]
+    assert competition_ranks(players_sorted_by_key(players, 'wins'), 'wins') == {1: 1, 2: 2}
+
+
+def test_pacific_day_buckets_across_dst():
+    # 2022-03-13 (23 hours) and 2022-11-06 (25 hours) are the DST changes
+    buckets = DayBuckets('2022-03-12', '2022-11-07')
+    timestamps = list(range(
+        arrow.get('2022-03-12T00:00:00-08:00').int_timestamp,
+        arrow.get('2022-11-08T00:00:00-08:00').int_timestamp,
+        1799
+    ))
+    expected = [arrow.get(timestamp).to('US/Pacific').format('YYYY-MM-DD')
+                for timestamp in timestamps]
+    assert buckets.days_for_timestamps(timestamps) == expected
+    assert pacific_days(timestamps) == expected
+    assert [pacific_day(timestamp) for timestamp in timestamps] == expected
+    assert [pacific_time_of_day(timestamp) for timestamp in timestamps] == \
+           [arrow.get(timestamp).to('US/Pacific').format('h:mma') for timestamp in timestamps]
+    assert buckets.day_for_timestamp(timestamps[0] - 1) is None
+    assert pacific_midnight('2022-11-07') - pacific_midnight('2022-11-06') == 25 * 60 * 60
+
+
+def test_pacific_day_year_boundary():
+    new_year = arrow.get('2022-01-01T00:00:00-08:00').int_timestamp
+    assert pacific_day(new_year - 1) == '2021-12-31'
+    assert pacific_day(new_year) == '2022-01-01'
+
+
+def test_prev_next_day():
+    date_to_use, prev_day, next_day, day = get_arrow_date_prev_next_date_to_use('2022-3-1')
+    assert date_to_use == arrow.get('2022-03-01T00:00:00-08:00')
+    assert (prev_day, next_day, day) == ('2022-02-28', '2022-03-02', '2022-3-1')
@@ -1,5 +1,5 @@
 """ basic info model tests """
-from models import Config, RankedDivisionInfo
+from models import Config, RankedDivisionInfo, RankTier
 
 
 # pylint: disable=missing-function-docstring
@@ -25,3 +25,30 @@ def test_to_dict(config_dict):
     del config_dict['_id']
     apex_info_object_to_dict: dict = apex_info_object.dict()
     assert apex_info_object_to_dict == config_dict
+
+
+def legacy_rank_tier(config_object: Config, rank_points: int):
+    lower_rp: int = 0
+    for division in config_object.ranked_division_info.divisions:
+        for tier in config_object.ranked_division_info.tiers:
+            upper_rp = lower_rp + division.rp_between_tiers
+            if rank_points in range(lower_rp, upper_rp):
+                return division.name, tier, upper_rp - rank_points
+            lower_rp = upper_rp
+    return None
+
+
+def test_rank_div_tier_for_points(config_dict):
+    config_object: Config = Config(**config_dict)
+    scores = list(range(-5, 10010))
+    batch = config_object.get_rank_div_tiers_for_points(scores)
+    for rank_points, batch_tier in zip(scores, batch):
+        rank_tier = config_object.get_rank_div_tier_for_points(rank_points)
+        assert rank_tier is batch_tier
+        expected = legacy_rank_tier(config_object, rank_points)
+        if expected is None:
+            assert rank_tier is None
+        else:
+            assert (rank_tier.division, rank_tier.tier, rank_tier.distance_to_next) == expected
+    assert config_object.get_rank_div_tier_for_points(1200) == \
+           RankTier(division='Silver', tier='IV', distance_to_next=400)
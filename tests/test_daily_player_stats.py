@@ -0,0 +1,55 @@
+""" daily player stats rollup tests """
+import mongomock
+
+from apex_game_store import GameStore, CATEGORIES
+from models.daily_player_stats import DailyPlayerStatsCollection
+from models.event import EventCollection
+
+
+# pylint: disable=missing-function-docstring
+def test_rollup_matches_games(game_event_list, tracker_info_data):
+    database = mongomock.MongoClient().db
+    for game in game_event_list:
+        del game['_id']
+    database.event.insert_many(game_event_list)
+    event_collection = EventCollection(database, tracker_info_data)
+    games = event_collection.get_games()
+    stats_collection = DailyPlayerStatsCollection(database)
+    assert stats_collection.rebuild(event_collection) > 0
+    rebuilt = sorted(stats_collection.get_totals(), key=str)
+
+    store = GameStore(games)
+    rollup_store = GameStore.from_totals(rebuilt)
+    for day in store.days():
+        for legend in store.legends(day=day) + [None]:
+            assert rollup_store.count(day=day, legend=legend) == store.count(day=day, legend=legend)
+            for category in CATEGORIES:
+                assert rollup_store.total(category, day=day, legend=legend) == \
+                       store.total(category, day=day, legend=legend)
+
+    database.daily_player_stats.delete_many({})
+    for game in games:
+        stats_collection.add_game(game)
+    assert sorted(stats_collection.get_totals(), key=str) == rebuilt
+
+    first_day = min(store.days())
+    assert {record['day'] for record in stats_collection.get_totals(end_day=first_day)} == \
+           {first_day}
+
+
+def test_get_days(game_event_list, tracker_info_data):
+    database = mongomock.MongoClient().db
+    for game in game_event_list:
+        del game['_id']
+    database.event.insert_many(game_event_list)
+    event_collection = EventCollection(database, tracker_info_data)
+    stats_collection = DailyPlayerStatsCollection(database)
+    stats_collection.rebuild(event_collection)
+    for uid in {int(game['uid']) for game in game_event_list}:
+        days = sorted(
+            {game.day_of_event for game in event_collection.get_games(player_uid=uid)},
+            reverse=True
+        )
+        assert stats_collection.get_days(uid) == days
+        assert stats_collection.get_days(uid, limit=1) == days[:1]
+        assert stats_collection.get_days(uid, before_day=days[0]) == days[1:]
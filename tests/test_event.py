@@ -1,5 +1,9 @@
 """ event model tests """
-from models.event import GameEvent, LevelEvent, RankEvent, SessionEvent
+import mongomock
+
+from apex_game_store import GameStore
+from models.event import GameEvent, GameEventDetail, GameProfile, LevelEvent, RankEvent, \
+    SessionEvent, EventCollection
 
 
 # pylint: disable=missing-function-docstring
@@ -35,3 +39,88 @@ def test_session_from_list(session_event_list):
         assert session_event.dict() != session
         del session['_id']
         assert session_event.dict() == session
+
+
+def test_player_totals_match_games(game_event_list, tracker_info_data):
+    database = mongomock.MongoClient().db
+    for game in game_event_list:
+        del game['_id']
+    # an arena game and a game with no trackers
+    game_event_list[0]['event'].append({'key': 'arenas_kills', 'value': 3, 'name': 'Arenas'})
+    game_event_list[1]['event'] = []
+    database.event.insert_many(game_event_list)
+    event_collection = EventCollection(database, tracker_info_data)
+    end_timestamp: int = max(game['timestamp'] for game in game_event_list)
+    start_timestamp: int = min(game['timestamp'] for game in game_event_list)
+    for game_mode in (None, 'BR', 'Arena'):
+        games = [
+            game for game in event_collection.get_games()
+            if not game_mode or game_mode == game.game_mode
+        ]
+        store = GameStore(games)
+        totals_list = event_collection.get_player_totals(start_timestamp, end_timestamp, game_mode)
+        aggregated_store = GameStore.from_totals(totals_list)
+        assert len(totals_list) == len({game.uid for game in games})
+        for totals in totals_list:
+            uid = totals['uid']
+            assert aggregated_store.count(uid=uid) == store.count(uid=uid)
+            for category in ('kills', 'wins', 'damage', 'xp_progress', 'game_length'):
+                assert totals[category] == store.total(category, uid=uid)
+                assert aggregated_store.total(category, uid=uid) == store.total(category, uid=uid)
+
+
+def test_apply_trackers(game_event_list, tracker_info_data):
+    event_collection = EventCollection(mongomock.MongoClient().db, tracker_info_data)
+    # pylint: disable=protected-access
+    tracker_info_list = event_collection._tracker_info_collection.tracker_info_list
+    for game in game_event_list:
+        game['event'].append({'key': 'unknown_key', 'value': 7, 'name': 'Unknown'})
+        single_pass: GameEvent = event_collection.game_from_dict(game)
+        linear: GameEvent = GameEvent(**game)
+        for tracker in linear.event:
+            matches = [info for info in tracker_info_list if info.tracker_key == tracker.key]
+            category = matches[0].category if matches else tracker.key
+            if hasattr(linear, category):
+                setattr(linear, category, tracker.value)
+            linear.game_mode = matches[0].mode if matches else 'BR'
+        for field in ('kills', 'wins', 'damage', 'game_mode', 'xp_progress', 'game_length'):
+            assert getattr(single_pass, field) == getattr(linear, field)
+
+
+def test_trusted_decode_matches_strict(game_event_list, tracker_info_data):
+    event_collection = EventCollection(mongomock.MongoClient().db, tracker_info_data)
+    for game in game_event_list:
+        del game['_id']
+        strict_game: GameEvent = event_collection.game_from_dict(game, strict=True)
+        trusted_game: GameEvent = event_collection.game_from_dict(game)
+        assert all(isinstance(tracker, GameEventDetail) for tracker in trusted_game.event)
+        assert trusted_game.dict() == strict_game.dict()
+        for field in ('kills', 'wins', 'damage', 'game_mode', 'event_type'):
+            assert getattr(trusted_game, field) == getattr(strict_game, field)
+        assert trusted_game.day_of_event == strict_game.day_of_event
+
+
+def test_game_profiles(game_event_list, tracker_info_data):
+    database = mongomock.MongoClient().db
+    for game in game_event_list:
+        del game['_id']
+    database.event.insert_many(game_event_list)
+    event_collection = EventCollection(database, tracker_info_data)
+    full_games = event_collection.get_games()
+    profile_fields = {
+        GameProfile.LEADERBOARD: ('kills', 'wins', 'damage', 'game_mode', 'legend_played',
+                                  'game_length', 'xp_progress', 'rank_score_change'),
+        GameProfile.DAY_DETAIL: ('kills', 'wins', 'damage', 'game_mode', 'player',
+                                 'legend_played', 'game_length', 'xp_progress',
+                                 'rank_score_change', 'current_rank_score', 'formatted_time'),
+        GameProfile.RANKED_PLOT: ('rank_score_change', 'current_rank_score'),
+    }
+    for profile, fields in profile_fields.items():
+        games = event_collection.get_games(profile=profile)
+        assert len(games) == len(full_games)
+        for game, full_game in zip(games, full_games):
+            for field in ('uid', 'timestamp', 'day_of_event') + fields:
+                assert getattr(game, field) == getattr(full_game, field)
+    ranked_game = event_collection.get_games(profile='ranked_plot')[0]
+    assert not ranked_game.event
+    assert 'xp_progress' not in ranked_game.dict()
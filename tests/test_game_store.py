@@ -0,0 +1,55 @@
+""" game store tests """
+from typing import List
+
+import pytest
+
+from apex_db_helper import filter_game_list
+from apex_game_store import GameStore, ColumnarGameStore, CATEGORIES
+from models.event import GameEvent
+
+
+# pylint: disable=missing-function-docstring
+@pytest.mark.parametrize('store_class', [GameStore, ColumnarGameStore])
+def test_store_matches_filter_game_list(game_event_list, store_class):
+    games: List[GameEvent] = [GameEvent(**game) for game in game_event_list]
+    store = store_class(games)
+    uids = {int(game.uid) for game in games} | {None}
+    days = {game.day_of_event for game in games} | {None}
+    legends = {game.legend_played for game in games} | {None}
+    for uid in uids:
+        for day in days:
+            for legend in legends:
+                filtered = filter_game_list(games, uid=uid, day=day, legend=legend)
+                assert store.games(uid=uid, day=day, legend=legend) == filtered
+                assert store.count(uid=uid, day=day, legend=legend) == len(filtered)
+                for category in CATEGORIES + ('not_a_category',):
+                    total = sum(game.category_total(category) for game in filtered)
+                    assert store.total(category, uid=uid, day=day, legend=legend) == total
+                    maximum = max((game.category_total(category) for game in filtered), default=0)
+                    assert store.maximum(category, uid=uid, day=day, legend=legend) == maximum
+
+
+@pytest.mark.parametrize('store_class', [GameStore, ColumnarGameStore])
+def test_store_days_and_legends(game_event_list, store_class):
+    games: List[GameEvent] = [GameEvent(**game) for game in game_event_list]
+    store = store_class(games)
+    assert sorted(store.days()) == sorted({game.day_of_event for game in games})
+    for day in store.days():
+        assert sorted(store.legends(day=day)) == sorted(
+            {game.legend_played for game in games if game.day_of_event == day}
+        )
+    assert store.average('kills', uid=1) == 0.0
+
+
+@pytest.mark.parametrize('store_class', [GameStore, ColumnarGameStore])
+def test_store_day_legend_totals(game_event_list, store_class):
+    games: List[GameEvent] = [GameEvent(**game) for game in game_event_list]
+    store = store_class(games)
+    day_legends = store.day_legend_totals()
+    assert sorted(day_legends) == sorted(store.days())
+    for day, legends in day_legends.items():
+        assert sorted(legend for legend in legends if legend) == sorted(store.legends(day=day))
+        for legend, (count, totals) in legends.items():
+            assert count == store.count(day=day, legend=legend)
+            for category in CATEGORIES:
+                assert totals[category] == store.total(category, day=day, legend=legend)
@@ -0,0 +1,53 @@
+""" respawn ingestion task tests """
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+
+from models.player import Player
+from models.respawn_ingestion_task import RespawnIngestionTaskCollection
+
+
+# pylint: disable=missing-function-docstring
+def make_player(uid: int, name: str) -> Player:
+    return Player(uid=uid, is_online=0, name=name, platform='PC', selected_legend='Wraith',
+                  level=1, battlepass_level=1, discord_id=0, clan='NOT_SET')
+
+
+def test_progress_is_flushed_together():
+    database = mongomock.MongoClient().db
+    collection = RespawnIngestionTaskCollection(database)
+    collection.init_tasks([make_player(1, 'one'), make_player(2, 'two')])
+    collection.fetched_record('one')
+    collection.fetched_record('one')
+    collection.inserted_record('one')
+    collection.fetch_error('two')
+    assert database.respawn_ingestion_task.find_one({'player_name': 'one'})['records_fetched'] == 0
+    assert collection.flush() == 2
+    assert collection.flush() == 0
+    one = database.respawn_ingestion_task.find_one({'player_name': 'one'})
+    two = database.respawn_ingestion_task.find_one({'player_name': 'two'})
+    assert (one['records_fetched'], one['records_inserted'], one['fetch_errors']) == (2, 1, 0)
+    assert (two['records_fetched'], two['records_inserted'], two['fetch_errors']) == (0, 0, 1)
+
+
+class PartlyFailingCollection:
+    """ Fails the second update of every bulk write """
+    def __init__(self):
+        self.requests = []
+
+    def bulk_write(self, requests, ordered):
+        assert not ordered
+        self.requests = requests
+        raise BulkWriteError({'writeErrors': [{'index': 1, 'code': 2, 'errmsg': 'failed'}]})
+
+
+def test_only_failed_progress_is_kept():
+    collection = RespawnIngestionTaskCollection(mongomock.MongoClient().db)
+    # pylint: disable=protected-access
+    collection._collection = PartlyFailingCollection()
+    collection.fetched_record('one')
+    collection.fetched_record('two')
+    collection.fetch_error('two')
+    with pytest.raises(BulkWriteError):
+        collection.flush()
+    assert collection._pending == {'two': {'records_fetched': 1, 'fetch_errors': 1}}